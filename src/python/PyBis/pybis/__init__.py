@@ -3,4 +3,14 @@ __version__ = '0.1.0'
 
 from . import pybis
 from .pybis import Openbis
+from .pybis import AsyncOpenbis
 from .pybis import DataSet
+from .pybis import concat_results
+from .pybis import RetryPolicy
+from .pybis import RateGovernor, shared_governor
+from .pybis import Instrumentation
+from .pybis import RecordingAdapter, ReplayAdapter
+from .pybis import JacksonView
+from .pybis import Query, prop, attr
+from .pybis import OpenbisError, OpenbisConnectionError, OpenbisHTTPError, OpenbisServerError
+from .pybis import OpenbisTimeoutError, Deadline
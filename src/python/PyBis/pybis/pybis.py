@@ -9,28 +9,146 @@ Work with openBIS from Python.
 """
 
 import os
+import io
+import base64
 import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
 import time
-from datetime import datetime
+import asyncio
+import random
+from datetime import datetime, date, timedelta, timezone
 import json
 import re
 from urllib.parse import urlparse
 import zlib
-from collections import namedtuple
+import codecs
+from collections import namedtuple, defaultdict, deque
+from collections.abc import Mapping
 
 
+import numpy as np
 import pandas as pd
 from pandas import DataFrame, Series
 
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
 import threading
 from threading import Thread
 from queue import Queue
+import concurrent.futures
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+import itertools
+import functools
+import abc
+import bisect
 DROPBOX_PLUGIN = "jupyter-uploader-api"
 
 
+# all requests and responses are encoded / decoded with one of these codecs.
+# dumps() returns bytes, loads() accepts bytes, so no intermediate str copies are made.
+JSONCodec = namedtuple('JSONCodec', ['name', 'dumps', 'loads'])
+
+json_codecs = {
+    'json': JSONCodec('json', lambda obj: json.dumps(obj).encode('utf-8'), json.loads),
+}
+if ujson is not None:
+    json_codecs['ujson'] = JSONCodec(
+        'ujson',
+        lambda obj: ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False).encode('utf-8'),
+        ujson.loads
+    )
+if orjson is not None:
+    json_codecs['orjson'] = JSONCodec('orjson', orjson.dumps, orjson.loads)
+
+# use the fastest codec available
+_json_codec = json_codecs.get('orjson') or json_codecs.get('ujson') or json_codecs['json']
+
+
+def set_json_codec(name):
+    """ Selects the library used to encode requests and decode responses:
+    'orjson', 'ujson' or 'json' (the standard library). By default, the fastest installed
+    library is used.
+    """
+    global _json_codec
+    if name not in json_codecs:
+        raise ValueError("JSON codec not available: {}. Choose one of: {}".format(
+            name, ", ".join(sorted(json_codecs)))
+        )
+    _json_codec = json_codecs[name]
+
+
+def get_json_codec():
+    """ Returns the name of the JSON codec currently in use.
+    """
+    return _json_codec.name
+
+
+def _json_dumps(obj):
+    return _json_codec.dumps(obj)
+
+
+def _json_loads(data):
+    return _json_codec.loads(data)
+
+
+class _Interner():
+    """ Shares repeated strings and identical small objects while a response is decoded.
+    Small objects are those without nested objects, lists or references, e.g. the
+    properties of a sample; shared ones must not be modified.
+    """
+
+    def __init__(self):
+        self.strings = {}
+        self.objects = {}
+
+    def object_pairs_hook(self, pairs):
+        strings = self.strings
+        small = True
+        for i, (key, value) in enumerate(pairs):
+            value_type = type(value)
+            if value_type is str:
+                pairs[i] = (key, strings.setdefault(value, value))
+            elif value_type is dict or value_type is list or key in jackson_interesting or key == '@id':
+                small = False
+        if not small:
+            return dict(pairs)
+        pairs = tuple(pairs)
+        obj = self.objects.get(pairs)
+        if obj is None:
+            obj = self.objects[pairs] = dict(pairs)
+        return obj
+
+
+def _json_loads_interned(data):
+    """ like _json_loads, but repeated strings and identical small objects in data are
+    shared (always decoded with the standard library)
+    """
+    return json.loads(data, object_pairs_hook=_Interner().object_pairs_hook)
+
+
 def _definitions(what):
     entities = {
         "Sample": {
@@ -119,68 +237,603 @@ fetch_option = {
 }
 
 
-def parse_jackson(input_json):
+class Slot():
+    """ A placeholder in a RequestTemplate, filled in when the request is rendered.
+    If a default is given, it is serialized once and used when no value is passed.
+    """
+
+    def __init__(self, name, default=None):
+        self.name = name
+        self.default = default
+
+
+class RenderedRequest():
+    """ A JSON-RPC request which is already serialized, see RequestTemplate
+    """
+    __slots__ = ('method', 'body')
+
+    def __init__(self, method, body):
+        self.method = method
+        self.body = body
+
+    def to_dict(self):
+        return _json_loads(self.body)
+
+
+class RequestTemplate():
+    """ A JSON-RPC request whose static parts (method, fetch options, ...) are serialized
+    only once. The params may contain Slots, which are serialized and spliced in by render():
+
+        template = RequestTemplate("getDataSets", [Slot("token"), [Slot("id")], options])
+        request = template.render(token=o.token, id={"permId": ..., "@type": ...})
+
+    The JSON-RPC id is a Slot as well, "1" by default.
+    """
+
+    def __init__(self, method, params):
+        self.method = method
+        slots = []
+
+        def mark(obj):
+            if isinstance(obj, Slot):
+                slots.append(obj)
+                return '__slot_{}__'.format(len(slots) - 1)
+            if isinstance(obj, dict):
+                return { key: mark(value) for key, value in obj.items() }
+            if isinstance(obj, list):
+                return [ mark(value) for value in obj ]
+            return obj
+
+        request = mark({
+            "id": Slot("id", default="1"), "jsonrpc": "2.0", "method": method, "params": params
+        })
+        text = json.dumps(request, separators=(',', ':')).encode('utf-8')
+
+        # split the serialized request at the markers: static, slot, static, slot, ... static
+        self._static = []
+        for i in range(len(slots)):
+            before, text = text.split('"__slot_{}__"'.format(i).encode('utf-8'), 1)
+            self._static.append(before)
+        self._static.append(text)
+        self._names = [slot.name for slot in slots]
+        self._defaults = [
+            None if slot.default is None else _json_dumps(slot.default) for slot in slots
+        ]
+
+    def render(self, **values):
+        """ returns the RenderedRequest with the values filled in
+        """
+        static = self._static
+        parts = [static[0]]
+        for i, name in enumerate(self._names):
+            if name in values:
+                parts.append(_json_dumps(values[name]))
+            elif self._defaults[i] is not None:
+                parts.append(self._defaults[i])
+            else:
+                raise ValueError("no value for slot {} of {}".format(name, self.method))
+            parts.append(static[i+1])
+        return RenderedRequest(self.method, b''.join(parts))
+
+
+def _serialize_request(data):
+    """ returns method and body of a request, which is either a dict or a RenderedRequest
+    """
+    if isinstance(data, RenderedRequest):
+        return data.method, data.body
+    if "id" not in data:
+        data["id"] = "1"
+    if "jsonrpc" not in data:
+        data["jsonrpc"] = "2.0"
+    return data.get("method"), _json_dumps(data)
+
+
+search_samples_options = {
+    "properties": fetch_option['properties'],
+    "tags": fetch_option['tags'],
+    "registrator": fetch_option['registrator'],
+    "modifier": fetch_option['modifier'],
+    "experiment": fetch_option['experiment'],
+    "type": { "@type": "as.dto.sample.fetchoptions.SampleTypeFetchOptions" },
+    "@type": "as.dto.sample.fetchoptions.SampleFetchOptions",
+}
+
+search_experiments_options = {
+    "properties": fetch_option['properties'],
+    "tags": fetch_option['tags'],
+    "registrator": fetch_option['registrator'],
+    "modifier": fetch_option['modifier'],
+    "project": fetch_option['project'],
+    "type": { "@type": "as.dto.experiment.fetchoptions.ExperimentTypeFetchOptions" },
+    "@type": "as.dto.experiment.fetchoptions.ExperimentFetchOptions",
+}
+
+search_datasets_options = {
+    "containers": { "@type": "as.dto.dataset.fetchoptions.DataSetFetchOptions" },
+    "type": { "@type": "as.dto.dataset.fetchoptions.DataSetTypeFetchOptions" },
+    "tags": fetch_option['tags'],
+    "properties": fetch_option['properties'],
+    "sample": fetch_option['sample'],
+}
+
+search_projects_options = {
+    "registrator": { "@type": "as.dto.person.fetchoptions.PersonFetchOptions" },
+    "modifier": { "@type": "as.dto.person.fetchoptions.PersonFetchOptions" },
+    "experiments": { "@type": "as.dto.experiment.fetchoptions.ExperimentFetchOptions", },
+    "space": { "@type": "as.dto.space.fetchoptions.SpaceFetchOptions" },
+    "@type": "as.dto.project.fetchoptions.ProjectFetchOptions"
+}
+
+search_samples_template = RequestTemplate("searchSamples", [
+    Slot("token"), Slot("criteria"), Slot("options", default=search_samples_options),
+])
+
+search_experiments_template = RequestTemplate("searchExperiments", [
+    Slot("token"), Slot("criteria"), Slot("options", default=search_experiments_options),
+])
+
+search_datasets_template = RequestTemplate("searchDataSets", [
+    Slot("token"), Slot("criteria"), Slot("options", default=search_datasets_options),
+])
+
+search_projects_template = RequestTemplate("searchProjects", [
+    Slot("token"), Slot("criteria"), Slot("options", default=search_projects_options),
+])
+
+def _count_options(entity):
+    """ fetch options which fetch no objects at all, only the totalCount of the result
+    """
+    return {
+        "@type": "as.dto.{}.fetchoptions.{}FetchOptions".format(entity.lower(), entity),
+        "from": 0,
+        "count": 0,
+    }
+
+def _paged_options(options, entity, start, count):
+    """ returns a copy of the fetch options which fetches count objects, starting at
+    start, of the result sorted by permId. entity is e.g. 'Sample' or 'DataSet'.
+    """
+    options = dict(options)
+    options["from"] = start
+    options["count"] = count
+    options["sort"] = {
+        "@type": "as.dto.{}.fetchoptions.{}SortOptions".format(entity.lower(), entity),
+        "sortings": [{
+            "@type": "as.dto.common.fetchoptions.Sorting",
+            "field": "PERM_ID",
+            "order": { "@type": "as.dto.common.fetchoptions.SortOrder", "asc": True },
+        }],
+    }
+    return options
+
+def _read_pages(fetch, page_size, read_ahead=1, ordered=True):
+    """ yields the pages of a paged search, fetch(start) returns (totalCount, objects) of
+    the page starting at start. The first page tells how many pages there are, then up to
+    read_ahead pages are fetched in background threads while the current one is processed.
+    If ordered is False, the pages are yielded as soon as they arrive. Empty pages are not
+    yielded.
+    """
+    executor = ThreadPoolExecutor(max_workers=read_ahead) if read_ahead > 0 else None
+    pending = deque()
+    try:
+        total, objects = fetch(0)
+        next_start = page_size
+        # a page which is not full is the last one
+        last = len(objects) < page_size
+        while True:
+            while executor is not None and len(pending) < read_ahead and not last and \
+                    (total is None or next_start < total):
+                pending.append(executor.submit(fetch, next_start))
+                next_start += page_size
+            if len(objects) > 0:
+                yield objects
+            last = last or len(objects) < page_size
+            if pending and ordered:
+                if last:
+                    # the pending pages all come after the last one
+                    break
+                total, objects = pending.popleft().result()
+            elif pending:
+                done, not_done = wait(pending, return_when=FIRST_COMPLETED)
+                future = done.pop()
+                pending.remove(future)
+                total, objects = future.result()
+            elif not last and (total is None or next_start < total):
+                total, objects = fetch(next_start)
+                next_start += page_size
+            else:
+                break
+    finally:
+        # the consumer stopped early (or a request failed): pages not yet fetched are dropped
+        for future in pending:
+            future.cancel()
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+get_sample_options = {
+    "type": { "@type": "as.dto.sample.fetchoptions.SampleTypeFetchOptions" },
+    "parents": { "@type": "as.dto.sample.fetchoptions.SampleFetchOptions" },
+    "children": { "@type": "as.dto.sample.fetchoptions.SampleFetchOptions" },
+    "experiment": { "@type": "as.dto.experiment.fetchoptions.ExperimentFetchOptions" },
+    "dataSets": {
+        "@type": "as.dto.dataset.fetchoptions.DataSetFetchOptions",
+        "properties": { "@type": "as.dto.property.fetchoptions.PropertyFetchOptions" },
+        "type": { "@type": "as.dto.dataset.fetchoptions.DataSetTypeFetchOptions" },
+    },
+    "space":       fetch_option['space'],
+    "properties":  fetch_option['properties'],
+    "registrator": fetch_option['registrator'],
+    "tags":        fetch_option['tags'],
+}
+
+get_experiment_options = {
+    "@type": "as.dto.experiment.fetchoptions.ExperimentFetchOptions",
+    "tags": fetch_option['tags'],
+    "properties": fetch_option['properties'],
+    "attachments": fetch_option['attachments'],
+    "project": fetch_option['project'],
+}
+
+get_dataset_options = {
+    "parents":      { "@type": "as.dto.dataset.fetchoptions.DataSetFetchOptions" },
+    "children":     { "@type": "as.dto.dataset.fetchoptions.DataSetFetchOptions" },
+    "containers":   { "@type": "as.dto.dataset.fetchoptions.DataSetFetchOptions" },
+    "@type":        "as.dto.dataset.fetchoptions.DataSetFetchOptions",
+    "tags":         fetch_option['tags'],
+    "properties":   fetch_option['properties'],
+    "dataStore":    fetch_option['dataStore'],
+    "physicalData": fetch_option['physicalData'],
+    "linkedData":   fetch_option['linkedData'],
+    "experiment":   fetch_option['experiment'],
+    "sample":       fetch_option['sample'],
+}
+
+get_sample_template = RequestTemplate("getSamples", [
+    Slot("token"), [ Slot("sample_id") ], Slot("options", default=get_sample_options),
+])
+
+get_experiment_template = RequestTemplate("getExperiments", [
+    Slot("token"), [ Slot("experiment_id") ], Slot("options", default=get_experiment_options),
+])
+
+get_dataset_template = RequestTemplate("getDataSets", [
+    Slot("token"),
+    [ { "permId": Slot("permid"), "@type": "as.dto.dataset.id.DataSetPermId" } ],
+    Slot("options", default=get_dataset_options),
+])
+
+def _render_search(template, token, criteria, options=None):
+    """ renders a search template, with its default fetch options if options is None
+    """
+    if options is None:
+        return template.render(token=token, criteria=criteria)
+    return template.render(token=token, criteria=criteria, options=options)
+
+def _projected_options(options, fetch):
+    """ the fetch options reduced to the related objects in fetch (keys of the options,
+    e.g. 'sample' or 'properties'). Returns None (the unchanged options) if fetch is None.
+    """
+    if fetch is None:
+        return None
+    if isinstance(fetch, str):
+        fetch = [fetch]
+    unknown = [key for key in fetch if key not in options or key == '@type']
+    if unknown:
+        raise ValueError("cannot fetch {}, choose from: {}".format(
+            ", ".join(unknown), ", ".join(sorted(key for key in options if key != '@type'))))
+    projected = {key: options[key] for key in fetch}
+    if '@type' in options:
+        projected['@type'] = options['@type']
+    return projected
+
+
+# keys under which jackson puts objects that may be referenced by their @id elsewhere
+jackson_interesting = frozenset([
+    'tags', 'registrator', 'modifier', 'type', 'parents', 'children', 'containers',
+    'properties', 'experiment', 'sample', 'project', 'space', 'propertyType'
+])
+
+def parse_jackson(input_json, found=None):
     """openBIS uses a library called «jackson» to automatically generate the JSON RPC output.
        Objects that are found the first time are added an attribute «@id».
        Any further findings only carry this reference id.
        This function is used to dereference the output.
+       To dereference a response piece by piece, pass the same «found» dict to every call:
+       it collects the objects seen so far.
+
+       The response is walked once, without recursion, so deep parent/child graphs
+       are no problem. References are replaced after the walk, which therefore never
+       follows them and visits every node exactly once, even if the result contains cycles.
     """
-    interesting=['tags', 'registrator', 'modifier', 'type', 'parents', 
-        'children', 'containers', 'properties', 'experiment', 'sample',
-        'project', 'space', 'propertyType' 
-    ]
-    found = {} 
-    def build_cache(graph):
-        if isinstance(graph, list):
-            for item in graph:
-                build_cache(item)
-        elif isinstance(graph, dict) and len(graph) > 0:
-            for key, value in graph.items():
+    interesting = jackson_interesting
+    if found is None:
+        found = {}
+    # references to replace after the walk, as flat container, key (or index), @id triples.
+    # Required references must be found, optional ones are left as they are if unknown.
+    required = []
+    optional = []
+
+    # stack of nodes, each followed by its flags: inactive nodes are only searched for
+    # objects, references are replaced in ACTIVE nodes. CANDIDATEs are registered if they
+    # carry an @id, which also makes them active. (Flat, to avoid allocating a tuple per node.)
+    ACTIVE, CANDIDATE = 1, 2
+    stack = [input_json, ACTIVE]
+    pop = stack.pop
+    push = stack.append
+    add_required = required.extend
+    add_optional = optional.extend
+    while stack:
+        flags = pop()
+        node = pop()
+        node_type = type(node)
+        if node_type is dict:
+            if flags & CANDIDATE and '@id' in node:
+                found[node['@id']] = node
+                flags = ACTIVE
+            active = flags & ACTIVE
+            # pushed in reverse, so that the children are visited in document order
+            for key, value in reversed(node.items()):
+                value_type = type(value)
                 if key in interesting:
-                    if isinstance(value, dict):
-                        if '@id' in value:
-                            found[value['@id']] = value
-                        build_cache(value)
-                    elif isinstance(value, list):
-                        for item in value:
-                            if isinstance(item, dict):
-                                if '@id' in item:
-                                    found[item['@id']] = item
-                                build_cache(item)
-                elif isinstance(value, dict):
-                    build_cache(value)
-                elif isinstance(value, list):
-                    build_cache(value)
-                    
-    def deref_graph(graph):            
-        if isinstance(graph, list):
-            for i, list_item in enumerate(graph):
-                if isinstance(list_item, int):
-                    graph[i] = found[list_item]
-                else:
-                    deref_graph(list_item)
-        elif isinstance(graph, dict) and len(graph) > 0:
-            for key, value in graph.items():
-                if key in interesting:
-                    if isinstance(value, dict):
-                        deref_graph(value)
-                    elif isinstance(value, int):
-                        graph[key] = found[value]
-                    elif isinstance(value, list):
-                        for i, list_item in enumerate(value):
-                            if isinstance(list_item, int):
-                                if list_item in found:
-                                    value[i] = found[list_item]
-                                else:
-                                    value[i] = list_item
-                elif isinstance(value, dict):
-                    deref_graph(value)
-                elif isinstance(value, list):
-                    deref_graph(value)
-
-    build_cache(input_json)
-    deref_graph(found)
-    deref_graph(input_json)
+                    if value_type is dict:
+                        push(value)
+                        push(active | CANDIDATE)
+                    elif value_type is list:
+                        for i in range(len(value) - 1, -1, -1):
+                            item = value[i]
+                            if type(item) is dict:
+                                push(item)
+                                push(CANDIDATE)
+                            elif active and isinstance(item, int):
+                                add_optional((value, i, item))
+                    elif active and isinstance(value, int):
+                        add_required((node, key, value))
+                elif value_type is dict or value_type is list:
+                    push(value)
+                    push(active)
+        elif node_type is list:
+            active = flags & ACTIVE
+            for i in range(len(node) - 1, -1, -1):
+                item = node[i]
+                item_type = type(item)
+                if item_type is dict or item_type is list:
+                    push(item)
+                    push(active)
+                elif active and isinstance(item, int):
+                    add_required((node, i, item))
+
+    for i in range(0, len(required), 3):
+        required[i][required[i+1]] = found[required[i+2]]
+    for i in range(0, len(optional), 3):
+        ref = optional[i+2]
+        if ref in found:
+            optional[i][optional[i+1]] = found[ref]
+
+
+class _JacksonIndex():
+    """ The objects of one or more jackson responses by their @id, found on demand:
+    since jackson numbers the objects in document order and only refers back to objects
+    already serialized, the responses are only scanned as far as needed to find an @id.
+    """
+
+    def __init__(self):
+        self.found = {}
+        # flat stack of node, candidate, like in parse_jackson
+        self._stack = []
+        self._pending = []
+
+    def add(self, input_json, scan=False):
+        """ adds a response (or a part of it) to be searched. If scan is True, the objects
+        in it are registered right away, so that it does not need to be kept around.
+        """
+        self._pending.append(input_json)
+        if scan:
+            self._scan()
+
+    def lookup(self, ref):
+        """ the object with the given @id, or None
+        """
+        if ref not in self.found:
+            self._scan(ref)
+        return self.found.get(ref)
+
+    def _scan(self, ref=None):
+        """ registers objects until the one with @id ref is found, or all if ref is None
+        """
+        found = self.found
+        interesting = jackson_interesting
+        stack = self._stack
+        pop = stack.pop
+        push = stack.append
+        while ref is None or ref not in found:
+            if not stack:
+                if not self._pending:
+                    return
+                push(self._pending.pop(0))
+                push(False)
+            candidate = pop()
+            node = pop()
+            node_type = type(node)
+            if node_type is dict:
+                if candidate and '@id' in node:
+                    found[node['@id']] = node
+                for key, value in reversed(node.items()):
+                    value_type = type(value)
+                    if key in interesting:
+                        if value_type is dict:
+                            push(value)
+                            push(True)
+                        elif value_type is list:
+                            for item in reversed(value):
+                                if type(item) is dict:
+                                    push(item)
+                                    push(True)
+                    elif value_type is dict or value_type is list:
+                        push(value)
+                        push(False)
+            elif node_type is list:
+                for item in reversed(node):
+                    item_type = type(item)
+                    if item_type is dict or item_type is list:
+                        push(item)
+                        push(False)
+
+    def resolve(self, ref):
+        obj = self.lookup(ref)
+        if obj is None:
+            raise ValueError("unknown jackson reference: {}".format(ref))
+        return JacksonView(obj, self)
+
+    def view(self, key, value, active):
+        """ what a JacksonView returns for key: references resolved like parse_jackson does,
+        objects and lists wrapped in views
+        """
+        value_type = type(value)
+        if key in jackson_interesting:
+            if value_type is dict:
+                return JacksonView(value, self, active or '@id' in value)
+            if value_type is list:
+                items = []
+                for item in value:
+                    if type(item) is dict:
+                        items.append(JacksonView(item, self, '@id' in item))
+                    elif active and isinstance(item, int):
+                        obj = self.lookup(item)
+                        items.append(item if obj is None else JacksonView(obj, self))
+                    else:
+                        items.append(item)
+                return items
+            if active and isinstance(value, int):
+                return self.resolve(value)
+            return value
+        if value_type is dict:
+            return JacksonView(value, self, active)
+        if value_type is list:
+            return self.view_list(value, active)
+        return value
+
+    def view_list(self, value, active):
+        items = []
+        for item in value:
+            item_type = type(item)
+            if item_type is dict:
+                items.append(JacksonView(item, self, active))
+            elif item_type is list:
+                items.append(self.view_list(item, active))
+            elif active and isinstance(item, int):
+                items.append(self.resolve(item))
+            else:
+                items.append(item)
+        return items
+
+
+class JacksonView(Mapping):
+    """ A read-only view of an object of a jackson response, which resolves @id references
+    only when a field is accessed. Nested objects are views as well. The response itself is
+    not modified. See jackson_views()
+    """
+    __slots__ = ('_obj', '_index', '_active')
+
+    def __init__(self, obj, index, active=True):
+        self._obj = obj
+        self._index = index
+        self._active = active
+
+    def __getitem__(self, key):
+        return self._index.view(key, self._obj[key], self._active)
+
+    def __iter__(self):
+        return iter(self._obj)
+
+    def __len__(self):
+        return len(self._obj)
+
+    def __contains__(self, key):
+        return key in self._obj
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+def jackson_views(input_json):
+    """ The lazy alternative to parse_jackson(): returns JacksonViews of the objects of a
+    response (a list of views for a list), which resolve references only when they are
+    accessed, so that reading a few fields of every object is cheap.
+    """
+    index = _JacksonIndex()
+    index.add(input_json)
+    if isinstance(input_json, list):
+        return index.view_list(input_json, True)
+    if isinstance(input_json, dict):
+        return JacksonView(input_json, index)
+    return input_json
+
+
+def _iter_json_objects(chunks, key='objects'):
+    """ Incrementally parses a JSON-RPC response which arrives in chunks of bytes and yields
+    the items of the array «key» inside the result, as soon as each item is complete.
+    Only the current item is kept in memory, not the whole response.
+    The items are decoded with the standard library, which tells where an item ends, not
+    with the codec selected by set_json_codec(). An incomplete item is only decoded again
+    once the data received for it has doubled, so that items which span many chunks are
+    not decoded over and over.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8')()
+    marker = '"{}"'.format(key)
+    buf = ''
+    pos = 0
+    # the text received since buf was decoded last
+    pending = []
+    pending_size = 0
+    retry_size = 0
+    in_array = False
+    # None flushes the text which is still pending at the end
+    for chunk in itertools.chain(chunks, [None]):
+        if chunk is None:
+            pending.append(text.decode(b'', final=True))
+        else:
+            pending.append(text.decode(chunk))
+            pending_size += len(pending[-1])
+            if pending_size < retry_size:
+                continue
+        buf = buf[pos:] + ''.join(pending)
+        pending = []
+        pending_size = 0
+        retry_size = 0
+        pos = 0
+        if not in_array:
+            start = buf.find(marker)
+            if start < 0:
+                continue
+            bracket = buf.find('[', start)
+            if bracket < 0:
+                continue
+            pos = bracket + 1
+            in_array = True
+
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            if pos >= len(buf):
+                break
+            if buf[pos] == ']':
+                return
+            try:
+                item, pos = decoder.raw_decode(buf, pos)
+            except ValueError:
+                # the item is not complete yet, wait until its data has doubled
+                retry_size = len(buf) - pos
+                break
+            yield item
+
+    if not in_array:
+        # no such array: most likely an error response
+        result = _result_of(json.loads(buf))
+        if result is not None and key in result:
+            raise ValueError('incomplete response from openBIS')
+    else:
+        raise ValueError('incomplete response from openBIS')
 
 def check_datatype(type_name, value):
     if type_name == 'INTEGER':
@@ -227,7 +880,7 @@ def format_timestamp(ts):
     return datetime.fromtimestamp(round(ts/1000)).strftime('%Y-%m-%d %H:%M:%S')
 
 def extract_code(obj):
-    if not isinstance(obj, dict):
+    if not isinstance(obj, Mapping):
         return str(obj)
     return obj['code']
 
@@ -242,29 +895,29 @@ def extract_deletion(obj):
     return del_objs
 
 def extract_identifier(ident):
-    if not isinstance(ident, dict): 
+    if not isinstance(ident, Mapping):
         return str(ident)
     return ident['identifier']
 
 def extract_nested_identifier(ident):
-    if not isinstance(ident, dict): 
+    if not isinstance(ident, Mapping):
         return str(ident)
     return ident['identifier']['identifier']
 
 def extract_permid(permid):
-    if not isinstance(permid, dict):
+    if not isinstance(permid, Mapping):
         return str(permid)
     return permid['permId']
 
 def extract_nested_permid(permid):
-    if not isinstance(permid, dict):
+    if not isinstance(permid, Mapping):
         return str(permid)
     return permid['permId']['permId']
 
 def extract_property_assignments(pas):
     pa_strings = []
     for pa in pas:
-        if not isinstance(pa['propertyType'], dict):
+        if not isinstance(pa['propertyType'], Mapping):
             pa_strings.append(pa['propertyType'])
         else:
             pa_strings.append(pa['propertyType']['label'])
@@ -272,15 +925,30 @@ def extract_property_assignments(pas):
 
 
 def extract_person(person):
-    if not isinstance(person, dict):
+    if not isinstance(person, Mapping):
         return str(person)
     if 'email' in person and person['email'] is not '':
         return "%s %s <%s>" % (person['firstName'], person['lastName'], person['email'])
     else:
         return "%s %s" % (person['firstName'], person['lastName'])
 
+def _memoize_by_identity(func):
+    """ returns func, but computed only once for every object. This pays off for the
+    objects which dereferenced responses share between rows, like persons.
+    """
+    cache = {}
+    def memoized(obj):
+        if type(obj) is not dict:
+            return func(obj)
+        key = id(obj)
+        if key not in cache:
+            # keep obj, so that its id is not reused
+            cache[key] = (obj, func(obj))
+        return cache[key][1]
+    return memoized
+
 def extract_properties(prop):
-    if isinstance(prop, dict):
+    if isinstance(prop, Mapping):
         newline = "; "
         props = []
         for key in prop:
@@ -288,7 +956,7 @@ def extract_properties(prop):
         return newline.join(props)
 
 def extract_tags(tags):
-    if isinstance(tags, dict):
+    if isinstance(tags, Mapping):
         tags = [tags]
     new_tags = []
     for tag in tags:
@@ -301,6 +969,334 @@ def extract_attachments(attachments):
         att.append(attachment['fileName'])
     return att
 
+def local_datetimes(timestamps):
+    """ Converts openBIS timestamps (milliseconds since the epoch, None if missing) to a
+    datetime64 array in local time, rounded to seconds like format_timestamp(), but without
+    a Python call per value. The UTC offset is looked up once per quarter of an hour
+    that occurs, which is where daylight saving time may begin or end.
+    """
+    seconds = np.round(np.array(timestamps, dtype='float64') / 1000)
+    valid = ~np.isnan(seconds)
+    seconds = seconds[valid].astype('int64')
+    quarters, inverse = np.unique(seconds // 900, return_inverse=True)
+    offsets = np.array(
+        [time.localtime(int(quarter) * 900).tm_gmtoff for quarter in quarters], dtype='int64'
+    )
+    result = np.full(len(valid), np.datetime64('NaT'), dtype='datetime64[s]')
+    result[valid] = (seconds + offsets[inverse.reshape(-1)]).astype('datetime64[s]')
+    return result.astype('datetime64[ns]')
+
+# extract function for timestamp columns, which are converted all at once
+_datetime = object()
+_person = object()
+
+# columns with few distinct values, which become categorical (dictionary-encoded) columns
+categorical_columns = frozenset([
+    'sample_type', 'type', 'space', 'project', 'experiment', 'registrator', 'modifier',
+])
+
+class _Categories():
+    """ the categories of one categorical column. All pages of a query share the same
+    _Categories for a column: a value has the same code on every page, and the categories
+    of a page start with the categories of the pages before it.
+    """
+
+    def __init__(self):
+        self.index = {None: -1}
+        self.categories = []
+
+    def encode(self, values):
+        """ returns the codes (int32, -1 for None) of the values, new values are added to the
+        categories in order of appearance
+        """
+        index = self.index
+        for value in dict.fromkeys(values):
+            if value not in index:
+                index[value] = len(self.categories)
+                self.categories.append(value)
+        return np.fromiter(map(index.__getitem__, values), dtype=np.int32, count=len(values))
+
+def _shared_categories():
+    """ the categories of all categorical columns of one query, by column
+    """
+    return defaultdict(_Categories)
+
+def _columns(objects, columns):
+    """ extracts the columns of a search result from the objects (dicts or JacksonViews)
+    column by column. columns is a list of (column, field, extract): the value of the field
+    is passed through extract, or used as it is if extract is None. Timestamps (extract
+    _datetime) become datetime64 arrays, see local_datetimes(), persons (extract _person)
+    are formatted with extract_person.
+    Returns a dict column -> list or array of values.
+    """
+    person = _memoize_by_identity(extract_person)
+    data = {}
+    for column, field, extract in columns:
+        if extract is None:
+            data[column] = [obj.get(field) for obj in objects]
+        elif extract is _datetime:
+            data[column] = local_datetimes([obj.get(field) for obj in objects])
+        else:
+            if extract is _person:
+                extract = person
+            data[column] = [extract(obj.get(field)) for obj in objects]
+    return data
+
+_sample_columns = [
+    ('identifier',       'identifier',       extract_identifier),
+    ('permId',           'permId',           extract_permid),
+    ('experiment',       'experiment',       extract_nested_identifier),
+    ('sample_type',      'type',             extract_nested_permid),
+    ('registrator',      'registrator',      _person),
+    ('registrationDate', 'registrationDate', _datetime),
+    ('modifier',         'modifier',         _person),
+    ('modificationDate', 'modificationDate', _datetime),
+]
+
+_experiment_columns = [
+    ('code',             'code',             None),
+    ('identifier',       'identifier',       extract_identifier),
+    ('project',          'project',          extract_code),
+    ('type',             'type',             extract_code),
+    ('registrator',      'registrator',      _person),
+    ('registrationDate', 'registrationDate', _datetime),
+    ('modifier',         'modifier',         _person),
+    ('modificationDate', 'modificationDate', _datetime),
+]
+
+_dataset_columns = [
+    ('code',             'code',             None),
+    ('properties',       'properties',       None),
+    ('type',             'type',             extract_code),
+    ('sample',           'sample',           extract_nested_identifier),
+    ('registrationDate', 'registrationDate', _datetime),
+    ('modificationDate', 'modificationDate', _datetime),
+]
+
+_project_columns = [
+    ('code',             'code',             None),
+    ('space',            'space',            extract_code),
+    ('registrator',      'registrator',      _person),
+    ('registrationDate', 'registrationDate', _datetime),
+    ('modifier',         'modifier',         _person),
+    ('modificationDate', 'modificationDate', _datetime),
+    ('permid',           'permId',           extract_permid),
+    ('identifier',       'identifier',       extract_identifier),
+]
+
+_space_columns = [
+    ('code',             'code',             None),
+    ('description',      'description',      None),
+    ('registrationDate', 'registrationDate', _datetime),
+    ('modificationDate', 'modificationDate', _datetime),
+]
+
+def _select_columns(columns, fields=None):
+    """ the column specs of the given fields (column names), in that order. All columns if
+    fields is None.
+    """
+    if fields is None:
+        return columns
+    if isinstance(fields, str):
+        fields = [fields]
+    by_name = {spec[0]: spec for spec in columns}
+    unknown = [field for field in fields if field not in by_name]
+    if unknown:
+        raise ValueError("unknown fields: {}, choose from: {}".format(
+            ", ".join(unknown), ", ".join(by_name)))
+    return [by_name[field] for field in fields]
+
+def _fields_options(options, columns, fields=None, with_properties=False):
+    """ the minimal search fetch options for the given fields: only the related objects
+    their columns are extracted from. Returns None (the unchanged options) if fields is None.
+    """
+    if fields is None:
+        return None
+    fetch = [field for column, field, extract in _select_columns(columns, fields) if field in options]
+    if with_properties:
+        # the property columns need the properties and the entity types
+        fetch += [key for key in ('properties', 'type') if key in options]
+    return _projected_options(options, list(dict.fromkeys(fetch)))
+
+def _projection(columns, options, fields=None, with_properties=False):
+    """ the column specs and the search fetch options for the given fields, both unchanged
+    if fields is None
+    """
+    if fields is None:
+        return columns, options
+    return _select_columns(columns, fields), _fields_options(options, columns, fields, with_properties)
+
+def _type_codes(objects):
+    """ the distinct entity type codes of the (dereferenced) objects, in order of appearance
+    """
+    codes = {}
+    for obj in objects:
+        code = extract_code(obj.get('type'))
+        if code is not None:
+            codes[code] = None
+    return list(codes)
+
+def _assigned_data_types(property_assignments):
+    """ maps the property codes of one or more PropertyAssignments to their dataType
+    """
+    data_types = {}
+    for assignments in property_assignments:
+        if not isinstance(assignments, PropertyAssignments):
+            continue
+        for pa in assignments.data['propertyAssignments']:
+            property_type = pa['propertyType']
+            data_types.setdefault(property_type['code'], property_type['dataType'])
+    return data_types
+
+def _typed_column(values, data_type, categories=None):
+    """ converts the property values (strings, as openBIS delivers them, or None) of one
+    property to a Series whose dtype matches the dataType of the property. Values which
+    cannot be converted become missing values. Controlled vocabularies are encoded with
+    categories (a _Categories) if given.
+    """
+    if data_type == 'CONTROLLEDVOCABULARY' and categories is not None:
+        return pd.Series(_categorical(values, categories))
+    series = pd.Series(values, dtype=object)
+    if data_type in ('INTEGER', 'REAL'):
+        dtype = 'Int64' if data_type == 'INTEGER' else 'float64'
+        try:
+            return series.astype(dtype)
+        except (ValueError, TypeError):
+            # some values are no numbers: the slower conversion turns them into NaN
+            numbers = pd.to_numeric(series, errors='coerce')
+            if data_type == 'INTEGER':
+                numbers = numbers.where(numbers == numbers.round())
+            return numbers.astype(dtype)
+    if data_type == 'BOOLEAN':
+        return series.str.lower().map({'true': True, 'false': False}).astype('boolean')
+    if data_type == 'TIMESTAMP':
+        return pd.to_datetime(series, errors='coerce', utc=True)
+    if data_type == 'DATE':
+        return pd.to_datetime(series, errors='coerce')
+    if data_type == 'CONTROLLEDVOCABULARY':
+        return series.astype('category')
+    return series
+
+def _property_values(objects, data_types):
+    """ the values of every property of the objects, as a dict code -> (values, dataType).
+    The codes in data_types (code -> dataType) come first, properties which are set but not
+    assigned to any of the entity types follow with dataType None.
+    """
+    properties = [obj.get('properties') or {} for obj in objects]
+    codes = dict.fromkeys(data_types)
+    for props in properties:
+        if not codes.keys() >= props.keys():
+            codes.update(dict.fromkeys(props))
+    return {
+        code: ([props.get(code) for props in properties], data_types.get(code))
+        for code in codes
+    }
+
+def _categorical(values, categories):
+    codes = categories.encode(values)
+    return pd.Categorical.from_codes(codes, categories=list(categories.categories))
+
+def _pandas_result(data, properties, dictionaries):
+    for column in data:
+        if column in categorical_columns:
+            data[column] = _categorical(data[column], dictionaries[column])
+    for code, (values, data_type) in properties.items():
+        data[code] = _typed_column(values, data_type, dictionaries[code])
+    return DataFrame(data)
+
+def _arrow_result(data, properties, dictionaries):
+    if pa is None:
+        raise ImportError("result_format='arrow' needs the pyarrow package: pip install pyarrow")
+    # from_pandas only means that NaT and NaN become nulls, the columns never pass through pandas
+    arrays = {}
+    for column, values in data.items():
+        if column in categorical_columns:
+            arrays[column] = _dictionary_array(values, dictionaries[column])
+        else:
+            arrays[column] = pa.array(values, from_pandas=True)
+    for code, (values, data_type) in properties.items():
+        if data_type is None:
+            arrays[code] = pa.array(values, type=pa.string())
+        elif data_type == 'CONTROLLEDVOCABULARY':
+            arrays[code] = _dictionary_array(values, dictionaries[code])
+        else:
+            arrays[code] = pa.Array.from_pandas(_typed_column(values, data_type))
+    return pa.table(arrays)
+
+def _dictionary_array(values, categories):
+    # the same index type on every page, so that the pages can be concatenated
+    codes = categories.encode(values)
+    return pa.DictionaryArray.from_arrays(
+        pa.array(codes, mask=codes < 0), pa.array(categories.categories, type=pa.string())
+    )
+
+def _records_result(data, properties, dictionaries):
+    for column, values in data.items():
+        if isinstance(values, np.ndarray) and values.dtype.kind == 'M':
+            # datetime.datetime objects, None for missing timestamps
+            data[column] = values.astype('datetime64[us]').tolist()
+    for code, (values, data_type) in properties.items():
+        data[code] = values
+    columns = list(data)
+    return [dict(zip(columns, row)) for row in zip(*data.values())]
+
+result_formats = {
+    'pandas': _pandas_result,
+    'arrow': _arrow_result,
+    'records': _records_result,
+}
+
+def _build_result(objects, columns, result_format='pandas', data_types=None, dictionaries=None):
+    """ builds a search result from the (dereferenced) objects:
+    - 'pandas': a DataFrame
+    - 'arrow': a pyarrow.Table, built from the columns directly
+    - 'records': a list of dicts, one per object, with plain Python values
+    If data_types (property code -> dataType) is given, the properties are flattened into
+    one column per property code (replacing a properties column), typed after data_types.
+    Records keep the property values as openBIS delivers them.
+    The categorical_columns and controlled vocabularies are dictionary-encoded with
+    dictionaries (see _shared_categories()), which the pages of one query share.
+    """
+    if dictionaries is None:
+        dictionaries = _shared_categories()
+    data = _columns(objects, columns)
+    properties = {}
+    if data_types is not None:
+        data.pop('properties', None)
+        properties = _property_values(objects, data_types)
+    return result_formats[result_format](data, properties, dictionaries)
+
+def concat_results(pages):
+    """ concatenates the pages of a query (e.g. from stream_samples()): DataFrames,
+    pyarrow.Tables or lists of records. Categorical columns stay categorical, with the
+    categories of all pages.
+    """
+    pages = list(pages)
+    if len(pages) == 0:
+        raise ValueError("no pages to concatenate")
+    if isinstance(pages[0], list):
+        return [record for page in pages for record in page]
+    if pa is not None and isinstance(pages[0], pa.Table):
+        return pa.concat_tables(pages).unify_dictionaries()
+
+    categories = {}
+    for df in pages:
+        for column in df.select_dtypes('category'):
+            categories.setdefault(column, {}).update(dict.fromkeys(df[column].cat.categories))
+    pages = [
+        df.assign(**{
+            column: df[column].cat.set_categories(list(values))
+            for column, values in categories.items()
+        })
+        for df in pages
+    ]
+    return pd.concat(pages, ignore_index=True)
+
+def _samples_df(objects):
+    """ builds the DataFrame returned by get_samples() from the (dereferenced) objects
+    """
+    return _build_result(objects, _sample_columns)
+
 def signed_to_unsigned(sig_int):
     """openBIS delivers crc32 checksums as signed integers.
     If the number is negative, we just have to add 2**32
@@ -582,77 +1578,1189 @@ def _subcriteria_for_code(code, object_type):
     })
     return criteria
 
-class Openbis:
-    """Interface for communicating with openBIS. A current version of openBIS is needed.
-    (minimum version 16.05).
+class Query(abc.ABC):
+    """ A search condition which is evaluated by openBIS, built from prop() and attr()
+    and combined with & (and), | (or) and ~ (not):
+
+        o.get_samples(space='MY_SPACE', where=(prop('CONCENTRATION') > 0.5) & attr('code').startswith('TEST'))
+        o.get_datasets(where=attr('registrationDate').between('2017-01-01', '2017-03-31'))
+
+    ~ and != are compiled to negated criteria, which need openBIS 20.10 or newer, see
+    Openbis(negated_criteria=True).
     """
 
-    def __init__(self, url='https://localhost:8443', verify_certificates=True, token=None):
-        """Initialize a new connection to an openBIS server.
+    def __and__(self, other):
+        return And(self, other)
 
-        :param host:
+    def __or__(self, other):
+        return Or(self, other)
+
+    def __invert__(self):
+        return Not(self)
+
+    def __bool__(self):
+        raise ValueError("combine queries with &, | and ~ instead of and, or and not")
+
+    @abc.abstractmethod
+    def criteria(self, entity):
+        """ the v3 search criteria of the query, for entity 'Sample', 'Experiment' or 'DataSet'
         """
 
-        url_obj = urlparse(url)
-        if  url_obj.netloc is None:
-            raise ValueError("please provide the url in this format: https://openbis.host.ch:8443")
 
-        self.url_obj = url_obj
-        self.url     = url_obj.geturl()
-        self.port    = url_obj.port
-        self.hostname = url_obj.hostname
-        self.as_v3 = '/openbis/openbis/rmi-application-server-v3.json'
-        self.as_v1 = '/openbis/openbis/rmi-general-information-v1.json'
-        self.reg_v1 = '/openbis/openbis/rmi-query-v1.json'
-        self.verify_certificates = verify_certificates
-        self.token = token
-        self.datastores = []
+class _Group(Query):
+    """ queries combined with an operator, compiled to a nested search criteria of the entity
+    """
+    operator = 'AND'
+    negated = False
+
+    def __init__(self, *queries):
+        for query in queries:
+            if not isinstance(query, Query):
+                raise ValueError("cannot combine a query with {!r}".format(query))
+        # (a & b) & c is the same as a & b & c
+        self.queries = []
+        for query in queries:
+            if type(query) is type(self) and not self.negated:
+                self.queries.extend(query.queries)
+            else:
+                self.queries.append(query)
 
-        self.dataset_types = None
-        self.sample_types = None
-        self.files_in_wsp = []
-        self.token_path = None
+    def criteria(self, entity):
+        criteria = {
+            "@type": "as.dto.{}.search.{}SearchCriteria".format(entity.lower(), entity),
+            "operator": self.operator,
+            "criteria": [query.criteria(entity) for query in self.queries],
+        }
+        if self.negated:
+            criteria["negated"] = True
+        return criteria
 
-        # some default settings for working with samples etc.
-        self.default_space = None
-        self.default_project = None
-        self.default_experiment = None
-        self.default_sample_type = None
 
-        # use an existing token, if available
-        if self.token is None:
-            self.token = self._get_cached_token()
+class And(_Group):
+    operator = 'AND'
 
-    @property
-    def spaces(self):
-        return self.get_spaces()
 
+class Or(_Group):
+    operator = 'OR'
 
-    @property
-    def projects(self):
-        return self.get_projects()
 
+class Not(_Group):
+    negated = True
 
-    def _get_cached_token(self):
-        """Read the token from the cache, and set the token ivar to it, if there, otherwise None.
-        If the token is not valid anymore, delete it. 
+    def __invert__(self):
+        return self.queries[0]
+
+
+_string_values = {
+    'eq': 'StringEqualToValue', 'startswith': 'StringStartsWithValue',
+    'endswith': 'StringEndsWithValue', 'contains': 'StringContainsValue',
+}
+_number_values = {
+    'eq': 'NumberEqualToValue', 'lt': 'NumberLessThanValue', 'le': 'NumberLessThanOrEqualToValue',
+    'gt': 'NumberGreaterThanValue', 'ge': 'NumberGreaterThanOrEqualToValue',
+}
+_date_values = {
+    'eq': 'DateEqualToValue', 'le': 'DateEarlierThanOrEqualValue', 'ge': 'DateLaterThanOrEqualValue',
+}
+_attribute_criteria = {
+    'code':             ('as.dto.common.search.CodeSearchCriteria', _string_values),
+    'permId':           ('as.dto.common.search.PermIdSearchCriteria', _string_values),
+    'registrationDate': ('as.dto.common.search.RegistrationDateSearchCriteria', _date_values),
+    'modificationDate': ('as.dto.common.search.ModificationDateSearchCriteria', _date_values),
+}
+
+def _search_date(value):
+    """ a date or datetime as openBIS parses it in search criteria, strings are passed as they are
+    """
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+
+class Condition(Query):
+    """ a comparison of a property or attribute with a value, see Field
+    """
+
+    def __init__(self, field, comparison, value):
+        self.field = field
+        self.comparison = comparison
+        self.value = value
+        # fail early, not when the query is sent
+        self.criteria(None)
+
+    def criteria(self, entity):
+        field, comparison, value = self.field, self.comparison, self.value
+        if field.is_property:
+            if isinstance(value, bool):
+                search_type, values, value = 'StringPropertySearchCriteria', _string_values, str(value).lower()
+            elif isinstance(value, (int, float, np.number)):
+                search_type, values = 'NumberPropertySearchCriteria', _number_values
+            elif isinstance(value, date):
+                search_type, values = 'DatePropertySearchCriteria', _date_values
+            else:
+                search_type, values = 'StringPropertySearchCriteria', _string_values
+            criteria = {
+                "@type": "as.dto.common.search." + search_type,
+                "fieldName": field.name.upper(),
+                "fieldType": "PROPERTY",
+            }
+        else:
+            search_type, values = _attribute_criteria[field.name]
+            criteria = { "@type": search_type }
+            if values is _string_values and not isinstance(value, str):
+                raise ValueError("{} must be compared with a string, not {!r}".format(field.name, value))
+            if field.name == 'code':
+                value = value.upper()
+
+        if comparison not in values:
+            if values is _date_values:
+                raise ValueError("dates can only be compared with ==, <= and >= (or between())")
+            raise ValueError("{} cannot be compared with {!r}".format(field.name, value))
+        if values is _date_values:
+            if isinstance(value, datetime) and value.tzinfo is not None:
+                # otherwise openBIS reads dates in the time zone of the server
+                value = value.astimezone(timezone.utc)
+                criteria["timeZone"] = { "@type": "as.dto.common.search.TimeZone", "hourOffset": 0 }
+            value = _search_date(value)
+        elif values is _number_values:
+            value = value.item() if isinstance(value, np.number) else value
+        criteria["fieldValue"] = {
+            "value": value,
+            "@type": "as.dto.common.search." + values[comparison],
+        }
+        return criteria
+
+
+class Field():
+    """ a property or attribute in a Query, see prop() and attr(). Comparing it with a
+    value (==, !=, <, <=, >, >=) or calling one of its methods returns a Query.
+    """
+
+    def __init__(self, name, is_property):
+        self.name = name
+        self.is_property = is_property
+
+    def __eq__(self, value):
+        return Condition(self, 'eq', value)
+
+    def __ne__(self, value):
+        return Not(Condition(self, 'eq', value))
+
+    def __lt__(self, value):
+        return Condition(self, 'lt', value)
+
+    def __le__(self, value):
+        return Condition(self, 'le', value)
+
+    def __gt__(self, value):
+        return Condition(self, 'gt', value)
+
+    def __ge__(self, value):
+        return Condition(self, 'ge', value)
+
+    __hash__ = None
+
+    def between(self, low, high):
+        """ low <= value <= high
         """
-        token_path = self.gen_token_path()
-        if not os.path.exists(token_path):
-            return None
+        return And(Condition(self, 'ge', low), Condition(self, 'le', high))
+
+    def isin(self, values):
+        """ the value is one of values
+        """
+        values = list(values)
+        if not values:
+            # an OR of no criteria would match everything
+            raise ValueError("isin() needs at least one value")
+        return Or(*[Condition(self, 'eq', value) for value in values])
+
+    def startswith(self, prefix):
+        return Condition(self, 'startswith', prefix)
+
+    def endswith(self, suffix):
+        return Condition(self, 'endswith', suffix)
+
+    def contains(self, text):
+        return Condition(self, 'contains', text)
+
+
+def prop(code):
+    """ the property with the given code, for a Query. Compared with numbers it is searched
+    as a number, with dates as a date and as a string otherwise.
+    """
+    return Field(code, is_property=True)
+
+def attr(name):
+    """ the attribute code, permId, registrationDate or modificationDate, for a Query
+    """
+    if name not in _attribute_criteria:
+        raise ValueError("cannot search for {}, choose from: {}".format(
+            name, ", ".join(_attribute_criteria)))
+    return Field(name, is_property=False)
+
+def _subcriteria_for_query(where, entity, negated_criteria=False):
+    if not isinstance(where, Query):
+        raise ValueError("where must be a Query, e.g. prop('NAME') == 'value', not {!r}".format(where))
+    criteria = where.criteria(entity)
+    if not negated_criteria and _is_negated(criteria):
+        raise ValueError("queries with ~ and != need openBIS 20.10 or newer, "
+                         "see Openbis(negated_criteria=True)")
+    return criteria
+
+def _is_negated(criteria):
+    """ True if the criteria or any of its sub criteria are negated
+    """
+    return criteria.get("negated", False) or any(
+        _is_negated(subcriteria) for subcriteria in criteria.get("criteria", []))
+
+def _is_read_only(method):
+    """ True for JSON-RPC methods of the v1 and v3 API which do not change anything on the
+    server, i.e. which are safe to share or to repeat.
+    """
+    if method is None:
+        return False
+    return method.startswith(('search', 'get', 'list')) or method == 'isSessionActive'
+
+
+class SingleFlight():
+    """ Concurrent calls with the same key share one execution: the first caller runs the
+    function, everybody else arriving before it finished waits for the same result (or
+    exception).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, func, deadline=None):
+        with self.lock:
+            future = self.calls.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self.calls[key] = future
+
+        if not is_leader:
+            if deadline is None:
+                return future.result()
+            try:
+                return future.result(max(deadline.remaining(), 0))
+            except concurrent.futures.TimeoutError:
+                deadline.check()
+                raise
+
         try:
-            with open(token_path) as f:
-                token = f.read()
-                if not self.is_token_valid(token):
-                    os.remove(token_path)
-                    return None
-                else:
-                    return token
-        except FileNotFoundError:
-            return None
+            result = func()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                del self.calls[key]
 
 
-    def gen_token_path(self, parent_folder=None):
+class OpenbisError(ValueError):
+    """ Base class of all errors which occur while talking to openBIS. It derives from
+    ValueError, which is what pybis used to raise for all of them.
+    """
+
+    def __init__(self, message, method=None, status_code=None):
+        super(OpenbisError, self).__init__(message)
+        self.method = method
+        self.status_code = status_code
+
+
+class OpenbisConnectionError(OpenbisError):
+    """ openBIS could not be reached, or the connection broke down (e.g. reset by peer).
+    """
+
+
+class OpenbisTimeoutError(OpenbisConnectionError):
+    """ openBIS did not answer in time, or the deadline of an operation has passed.
+    read_timeout is True if the request was sent, but the response did not arrive in time.
+    """
+
+    def __init__(self, message, method=None, status_code=None, read_timeout=False):
+        super(OpenbisTimeoutError, self).__init__(message, method, status_code)
+        self.read_timeout = read_timeout
+
+
+class OpenbisHTTPError(OpenbisError):
+    """ openBIS (or a proxy in front of it) answered with an HTTP error status.
+    """
+
+
+class OpenbisServerError(OpenbisError):
+    """ openBIS processed the request and returned an error, e.g. an invalid session
+    or a missing permission. Repeating the request will not help.
+    """
+
+
+# default (connect, read) timeouts in seconds for some JSON-RPC methods, and for
+# file uploads and downloads. All other methods use the timeout given to Openbis().
+default_timeouts = {
+    'login':                              (10, 60),
+    'logout':                             (10, 60),
+    'isSessionActive':                    (10, 60),
+    'listDataStores':                     (10, 60),
+    'listFilesForDataSet':                (10, 600),
+    'createReportFromAggregationService': (10, 3600),
+    'upload':                             (10, 600),
+    'download':                           (10, 600),
+}
+
+
+class Deadline():
+    """ A point in time by which an operation (and everything it involves) has to be finished.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return self.expires - time.monotonic()
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def check(self, method=None):
+        """ raises an OpenbisTimeoutError if the deadline has passed
+        """
+        if self.expired():
+            raise OpenbisTimeoutError(
+                'deadline of {} seconds exceeded'.format(self.seconds), method=method
+            )
+
+
+def _as_deadline(deadline):
+    """ accepts a Deadline, a number of seconds or None
+    """
+    if deadline is None or isinstance(deadline, Deadline):
+        return deadline
+    return Deadline(deadline)
+
+
+def _timeout_until(timeout, deadline, method=None):
+    """ the (connect, read) timeout for a request, shortened so that it does not exceed
+    the deadline (if any)
+    """
+    if deadline is None:
+        return timeout
+    deadline.check(method)
+    remaining = deadline.remaining()
+    if timeout is None:
+        return (remaining, remaining)
+    if not isinstance(timeout, tuple):
+        timeout = (timeout, timeout)
+    return (min(timeout[0], remaining), min(timeout[1], remaining))
+
+
+def _within_deadline(func):
+    """ decorates a method of Openbis (or of an object with an openbis attribute) with a
+    deadline argument (in seconds, or a Deadline): the method runs inside openbis.deadline()
+    """
+    @functools.wraps(func)
+    def method(self, *args, deadline=None, **kwargs):
+        openbis = getattr(self, 'openbis', self)
+        with openbis.deadline(deadline):
+            return func(self, *args, **kwargs)
+    return method
+
+
+def _join_queue(queue, deadline=None, method=None):
+    """ waits until all items of a queue are processed, or until the deadline has passed
+    """
+    if deadline is None:
+        queue.join()
+        return
+    with queue.all_tasks_done:
+        while queue.unfinished_tasks:
+            remaining = deadline.remaining()
+            if remaining <= 0:
+                break
+            queue.all_tasks_done.wait(remaining)
+    deadline.check(method)
+
+
+class RetryPolicy():
+    """ Decides whether and when a failed read-only request (search*, get*, list*,
+    isSessionActive) is sent again. Requests which change something are never retried.
+
+    :param max_attempts: how often a request is sent at most (including the first time)
+    :param backoff: delay before the first retry, in seconds. It doubles with every further retry
+    :param max_backoff: upper limit for the delay, in seconds
+    :param jitter: if True, the delay is chosen randomly between 0 and the computed delay, so that
+    many clients failing at the same time do not retry at the same time
+    :param budget: retries are only allowed as long as they do not exceed this fraction of all
+    requests (plus a small reserve), so that an unavailable server is not flooded with retries
+    :param retry_statuses: HTTP status codes which are worth a retry
+    :param retry_read_timeouts: if True, requests whose response did not arrive within the
+    read timeout are retried as well. By default they are not: the server is probably still
+    busy with the request, and every attempt could take the full read timeout again.
+    """
+
+    def __init__(self, max_attempts=4, backoff=0.5, max_backoff=30, jitter=True, budget=0.2,
+                 retry_statuses=(429, 502, 503, 504), retry_read_timeouts=False):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.budget = budget
+        self.retry_statuses = retry_statuses
+        self.retry_read_timeouts = retry_read_timeouts
+        self.reserve = 10
+        self._tokens = self.reserve
+        self._lock = threading.Lock()
+
+    def request_sent(self):
+        """ every first attempt adds a fraction of a retry to the budget
+        """
+        with self._lock:
+            self._tokens = min(self._tokens + self.budget, self.reserve + 100 * self.budget)
+
+    def is_retryable(self, exc):
+        if isinstance(exc, OpenbisTimeoutError) and exc.read_timeout:
+            return self.retry_read_timeouts
+        if isinstance(exc, OpenbisConnectionError):
+            return True
+        if isinstance(exc, OpenbisHTTPError):
+            return exc.status_code in self.retry_statuses
+        return False
+
+    def should_retry(self, exc, attempt):
+        """ attempt is the number of the attempt that failed (starting at 1)
+        """
+        if attempt >= self.max_attempts or not self.is_retryable(exc):
+            return False
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+        return True
+
+    def delay(self, attempt):
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+
+class RateGovernor():
+    """ Protects an openBIS server from being overloaded by the requests of a process.
+    A token bucket limits the request rate (if rate is given), and an adaptive limit restricts
+    the number of concurrent requests: it grows slowly (additive increase) while requests are
+    answered quickly, and shrinks fast (multiplicative decrease) when requests fail with
+    overload errors or take much longer than usual. Use Openbis(governor=True) to share one
+    governor per server among all Openbis instances of the process. Its current state is
+    returned by stats().
+
+    :param rate: maximum number of requests per second, None for no limit
+    :param burst: number of requests which may be sent at once when the rate limit applies
+    :param initial_limit: number of concurrent requests allowed at the beginning
+    :param min_limit: the concurrency limit never drops below this
+    :param max_limit: the concurrency limit never grows beyond this
+    :param latency_tolerance: a request counts as slow if it takes longer than this factor
+    times the usual latency of its method
+    :param decrease_factor: the concurrency limit is multiplied by this when overload is detected
+    """
+
+    def __init__(self, rate=None, burst=10, initial_limit=8, min_limit=1, max_limit=64,
+                 latency_tolerance=3.0, decrease_factor=0.7):
+        self.rate = rate
+        self.burst = burst
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.decrease_factor = decrease_factor
+
+        self._cond = threading.Condition()
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._last_decrease = 0
+        self._inflight = 0
+        self._waiting = 0
+        self._latency = None
+        # usual latency per method
+        self._baselines = {}
+
+        self.requests = 0
+        self.overloads = 0
+        self.decreases = 0
+
+    def _refill(self, now):
+        if self.rate is not None:
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self, deadline=None):
+        """ waits for a free slot. Returns False if none became free before the deadline.
+        """
+        with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    self._refill(time.monotonic())
+                    has_token = self.rate is None or self._tokens >= 1
+                    if has_token and self._inflight < int(self.limit):
+                        break
+                    wait = None
+                    if not has_token:
+                        wait = (1 - self._tokens) / self.rate
+                    if deadline is not None:
+                        remaining = deadline.remaining()
+                        if remaining <= 0:
+                            return False
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+
+                if self.rate is not None:
+                    self._tokens -= 1
+                self._inflight += 1
+                return True
+            finally:
+                self._waiting -= 1
+
+    def release(self, method, latency, overloaded=False):
+        """ gives the slot back and adapts the concurrency limit
+        """
+        with self._cond:
+            self._inflight -= 1
+            self.requests += 1
+            if self._latency is None:
+                self._latency = latency
+            else:
+                self._latency = 0.9 * self._latency + 0.1 * latency
+
+            baseline = self._baselines.get(method)
+            if baseline is None or latency < baseline:
+                self._baselines[method] = baseline = latency
+            else:
+                # follow lasting changes slowly
+                self._baselines[method] = 0.99 * baseline + 0.01 * latency
+
+            if overloaded:
+                self.overloads += 1
+            if overloaded or latency > baseline * self.latency_tolerance + 0.01:
+                # decrease at most once per round trip, so that a burst of failures
+                # from the same moment does not make the limit collapse
+                now = time.monotonic()
+                if now - self._last_decrease > baseline:
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self.decreases += 1
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, method=None, deadline=None):
+        """ a request is sent inside the with-block
+        """
+        if not self.acquire(deadline):
+            raise OpenbisTimeoutError('deadline exceeded while waiting for a free slot', method=method)
+        start = time.monotonic()
+        overloaded = False
+        try:
+            yield
+        except OpenbisConnectionError:
+            overloaded = True
+            raise
+        except OpenbisHTTPError as exc:
+            overloaded = exc.status_code == 429 or exc.status_code >= 500
+            raise
+        finally:
+            self.release(method, time.monotonic() - start, overloaded)
+
+    def stats(self):
+        """ the current state of the governor
+        """
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                "limit": self.limit,
+                "inflight": self._inflight,
+                "waiting": self._waiting,
+                "rate": self.rate,
+                "tokens": self._tokens if self.rate is not None else None,
+                "latency": self._latency,
+                "requests": self.requests,
+                "overloads": self.overloads,
+                "decreases": self.decreases,
+            }
+
+
+_shared_governors = {}
+_shared_governors_lock = threading.Lock()
+
+def shared_governor(url):
+    """ Returns the RateGovernor shared by all Openbis instances of this process which talk to
+    the server at url.
+    """
+    netloc = urlparse(url).netloc
+    with _shared_governors_lock:
+        if netloc not in _shared_governors:
+            _shared_governors[netloc] = RateGovernor()
+        return _shared_governors[netloc]
+
+
+# upper bounds (seconds) of the latency histogram buckets
+latency_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float('inf'))
+
+
+class _NoTimer():
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *args):
+        pass
+
+_no_timer = _NoTimer()
+
+
+class _PhaseTimer():
+    __slots__ = ('instrumentation', 'method', 'phase', 'start')
+
+    def __init__(self, instrumentation, method, phase):
+        self.instrumentation = instrumentation
+        self.method = method
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *args):
+        self.instrumentation.record_phase(self.method, self.phase, time.perf_counter() - self.start)
+
+
+class Instrumentation():
+    """ Collects per-method statistics of the requests sent to openBIS: number of requests
+    and errors, a latency histogram, request and response sizes in bytes and the time spent
+    in the phases of processing a response ('decode', 'parse_jackson', 'dataframe').
+    The network time of a request is its latency.
+    Callbacks receive every measurement as an event (a dict) when it is made, e.g.
+    {'event': 'request', 'method': 'searchSamples', 'latency': 0.12, 'request_bytes': 842,
+    'response_bytes': 1203322, 'error': None} or
+    {'event': 'phase', 'method': 'searchSamples', 'phase': 'decode', 'duration': 0.03}.
+    They are called in the thread which made the request and should return quickly.
+    When disabled, nothing is measured.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.callbacks = []
+        self._lock = threading.Lock()
+        self._methods = {}
+
+    def _method_stats(self, method):
+        stats = self._methods.get(method)
+        if stats is None:
+            stats = self._methods[method] = {
+                "count": 0,
+                "errors": 0,
+                "latency": 0.0,
+                "latency_max": 0.0,
+                "latency_histogram": [0] * len(latency_buckets),
+                "request_bytes": 0,
+                "response_bytes": 0,
+                "phases": {},
+            }
+        return stats
+
+    def _emit(self, event):
+        for callback in self.callbacks:
+            callback(event)
+
+    def record_request(self, method, start, request_bytes, response_bytes=0, error=None):
+        """ records a request which was started at start (time.perf_counter())
+        """
+        if not self.enabled:
+            return
+        latency = time.perf_counter() - start
+        with self._lock:
+            stats = self._method_stats(method)
+            stats["count"] += 1
+            if error is not None:
+                stats["errors"] += 1
+            stats["latency"] += latency
+            stats["latency_max"] = max(stats["latency_max"], latency)
+            stats["latency_histogram"][bisect.bisect_left(latency_buckets, latency)] += 1
+            stats["request_bytes"] += request_bytes
+            stats["response_bytes"] += response_bytes
+        if self.callbacks:
+            self._emit({
+                "event": "request", "method": method, "latency": latency,
+                "request_bytes": request_bytes, "response_bytes": response_bytes, "error": error,
+            })
+
+    def record_phase(self, method, phase, duration):
+        if not self.enabled:
+            return
+        with self._lock:
+            phases = self._method_stats(method)["phases"]
+            phases[phase] = phases.get(phase, 0.0) + duration
+        if self.callbacks:
+            self._emit({"event": "phase", "method": method, "phase": phase, "duration": duration})
+
+    def timer(self, method, phase):
+        """ returns a context manager which records the time spent in its with-block
+        """
+        if not self.enabled:
+            return _no_timer
+        return _PhaseTimer(self, method, phase)
+
+    def stats(self):
+        """ returns a copy of the statistics, keyed by method. The latency histogram
+        is a dict of bucket upper bound: number of requests.
+        """
+        with self._lock:
+            result = {}
+            for method, stats in self._methods.items():
+                copy = dict(stats)
+                copy["latency_histogram"] = dict(zip(latency_buckets, stats["latency_histogram"]))
+                copy["phases"] = dict(stats["phases"])
+                result[method] = copy
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._methods = {}
+
+
+def _result_of(data, method=None):
+    """ extracts the result of a JSON-RPC response or raises its error.
+    """
+    if 'error' in data:
+        raise OpenbisServerError('an error has occured: ' + data['error']['message'], method=method)
+    elif 'result' in data:
+        return data['result']
+    else:
+        raise OpenbisServerError('request did not return either result nor error', method=method)
+
+
+def _transport_error(exc, method=None):
+    """ the OpenbisError for an exception of requests (timeout or connection error)
+    """
+    if isinstance(exc, requests.exceptions.Timeout):
+        return OpenbisTimeoutError(
+            'timeout while performing post request: {}'.format(exc), method=method,
+            read_timeout=isinstance(exc, requests.exceptions.ReadTimeout),
+        )
+    return OpenbisConnectionError(
+        'connection error while performing post request: {}'.format(exc), method=method
+    )
+
+def _http_error(status_code, content, method=None):
+    """ the exception for an HTTP error response. If the body contains a JSON-RPC error
+    (the AS sends some of them with status 500), its message is used.
+    """
+    try:
+        data = _json_loads(content)
+        if isinstance(data, dict) and isinstance(data.get('error'), dict):
+            return OpenbisServerError(
+                'an error has occured: ' + str(data['error'].get('message')),
+                method=method, status_code=status_code
+            )
+    except Exception:
+        pass
+    return OpenbisHTTPError(
+        'general error while performing post request (HTTP {})'.format(status_code),
+        method=method, status_code=status_code
+    )
+
+
+# session tokens look like admin-161216151709412xD5FF0B8C9A2A9DAB32B1D4DC1F1CB7A0
+_token_pattern = re.compile(rb'[\w.@]+-\d{15,17}x[0-9A-Fa-f]{16,}')
+
+# JSON-RPC methods whose parameters are credentials
+_login_methods = ('login', 'loginAs')
+
+def _without_credentials(body):
+    """ the request body with the parameters of login requests replaced by placeholders
+    """
+    if b'"login' not in body:
+        return body
+    try:
+        request = json.loads(body.decode('utf-8'))
+    except ValueError:
+        return body
+    if not isinstance(request, dict) or request.get('method') not in _login_methods:
+        return body
+    request['params'] = ['<credentials>' for param in request.get('params') or []]
+    return json.dumps(request, sort_keys=True).encode('utf-8')
+
+def _normalize_request(method, url, body):
+    """ the key under which an exchange is stored in a cassette: session tokens and
+    credentials are replaced, so that a cassette can be replayed with any token and login.
+    """
+    url_obj = urlparse(url)
+    target = url_obj.path
+    if url_obj.query:
+        target += '?' + url_obj.query
+    if body is None:
+        body = b''
+    elif isinstance(body, str):
+        body = body.encode('utf-8')
+    body = _without_credentials(body)
+    return "{} {} {}".format(
+        method,
+        _token_pattern.sub(b'<token>', target.encode('utf-8')).decode('utf-8'),
+        _token_pattern.sub(b'<token>', body).decode('utf-8', 'replace')
+    )
+
+
+class RecordingAdapter(HTTPAdapter):
+    """ A transport adapter which sends requests like the default one and records every
+    exchange (request, status, headers and response body) in a cassette, see Openbis.record().
+    Session tokens and login credentials are not recorded.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(RecordingAdapter, self).__init__(*args, **kwargs)
+        self.interactions = []
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        resp = super(RecordingAdapter, self).send(request, **kwargs)
+        # reads the whole body, even of streamed responses; it stays available in resp.content
+        content = _token_pattern.sub(b'<token>', resp.content)
+        interaction = {
+            "request": _normalize_request(request.method, request.url, request.body),
+            "status": resp.status_code,
+            "headers": {k: v for k, v in resp.headers.items()
+                        if k.lower() not in ('content-encoding', 'transfer-encoding', 'connection')},
+        }
+        try:
+            interaction["body"] = content.decode('utf-8')
+        except UnicodeDecodeError:
+            interaction["body_base64"] = base64.b64encode(content).decode('ascii')
+        with self._lock:
+            self.interactions.append(interaction)
+        return resp
+
+    def save(self, path):
+        with self._lock:
+            interactions = list(self.interactions)
+        with open(path, 'w') as f:
+            json.dump({"interactions": interactions}, f, indent=1)
+
+
+class _ThrottledReader(io.RawIOBase):
+    """ a file-like response body which is delivered at the given bandwidth (bytes/s)
+    """
+
+    def __init__(self, content, bandwidth):
+        self._buffer = io.BytesIO(content)
+        self.bandwidth = bandwidth
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        data = self._buffer.read(size)
+        if self.bandwidth and data:
+            time.sleep(len(data) / self.bandwidth)
+        return data
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+
+class ReplayAdapter(BaseAdapter):
+    """ A transport adapter which answers requests from a cassette recorded with
+    Openbis.record(), without any network access. Requests are matched by HTTP method,
+    path, query and body, ignoring session tokens. Identical requests get the recorded
+    responses in the recorded order; the last one is repeated.
+    latency (seconds) is added to every response and the body is delivered at bandwidth
+    (bytes/s, None for no limit), to simulate a real server.
+    """
+
+    def __init__(self, path, latency=0.0, bandwidth=None):
+        super(ReplayAdapter, self).__init__()
+        self.latency = latency
+        self.bandwidth = bandwidth
+        with open(path) as f:
+            interactions = json.load(f)["interactions"]
+        self._responses = {}
+        for interaction in interactions:
+            self._responses.setdefault(interaction["request"], []).append(interaction)
+        self._lock = threading.Lock()
+
+    def send(self, request, stream=False, **kwargs):
+        key = _normalize_request(request.method, request.url, request.body)
+        with self._lock:
+            responses = self._responses.get(key)
+            if not responses:
+                raise requests.exceptions.ConnectionError(
+                    'no recorded response for {}'.format(key[:200]), request=request
+                )
+            interaction = responses.pop(0) if len(responses) > 1 else responses[0]
+
+        if self.latency:
+            time.sleep(self.latency)
+        if "body_base64" in interaction:
+            content = base64.b64decode(interaction["body_base64"])
+        else:
+            content = interaction["body"].encode('utf-8')
+
+        resp = requests.Response()
+        resp.status_code = interaction["status"]
+        resp.headers = CaseInsensitiveDict(interaction["headers"])
+        resp.headers['Content-Length'] = str(len(content))
+        resp.raw = _ThrottledReader(content, self.bandwidth)
+        resp.url = request.url
+        resp.request = request
+        resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+        if not stream:
+            resp.content
+        return resp
+
+    def close(self):
+        pass
+
+
+class Openbis:
+    """Interface for communicating with openBIS. A current version of openBIS is needed.
+    (minimum version 16.05).
+    """
+
+    def __init__(self, url='https://localhost:8443', verify_certificates=True, token=None,
+                 pool_connections=10, pool_maxsize=20, pool_block=False, keep_alive=True,
+                 coalesce_requests=True, retry_policy=None, timeout=(10, 600), timeouts=None,
+                 governor=None, instrument=False, lazy_references=False, interning=False,
+                 result_format='pandas', check_cached_token=True, negated_criteria=False):
+        """Initialize a new connection to an openBIS server.
+
+        :param host:
+        :param pool_connections: number of hosts (AS, DSS) for which a connection pool is kept
+        :param pool_maxsize: maximum number of connections kept open per host
+        :param pool_block: if True, wait for a free connection instead of opening a new one
+        :param keep_alive: if False, every connection is closed after the request
+        :param coalesce_requests: if True, identical read-only requests made at the same time
+        (e.g. from several threads) are sent only once and share the response
+        :param retry_policy: a RetryPolicy which decides how failed read-only requests are
+        retried. By default, a RetryPolicy with default settings is used. To switch off retries,
+        use RetryPolicy(max_attempts=1)
+        :param timeout: (connect, read) timeout in seconds for every request, unless specified
+        otherwise in timeouts. None waits forever.
+        :param timeouts: (connect, read) timeouts for specific methods, e.g.
+        {'searchSamples': (10, 1800)}. They override the entries in default_timeouts
+        :param governor: True to send all requests through the RateGovernor which is shared by
+        all Openbis instances of this process that talk to the same server, or a RateGovernor.
+        By default, requests are not governed.
+        :param instrument: if True, statistics about the requests are collected, see stats()
+        :param lazy_references: if True, references in search results are not resolved up front
+        (parse_jackson), but only for the fields that are actually used (jackson_views)
+        :param interning: if True, repeated strings and identical small objects in responses
+        are shared, which saves memory for large search results but makes decoding slower
+        :param result_format: what the search methods (get_samples() etc.) return by default:
+        'pandas' (Things holding a DataFrame), 'arrow' (a pyarrow.Table) or 'records'
+        (a list of dicts)
+        :param check_cached_token: if False, a token from the token cache is used without
+        asking the server whether it is still valid
+        :param negated_criteria: set to True if the server is openBIS 20.10 or newer, which
+        supports negated search criteria. Otherwise queries with ~ and != are refused, older
+        servers might ignore the negation and return the opposite.
+        """
+
+        url_obj = urlparse(url)
+        if  url_obj.netloc is None:
+            raise ValueError("please provide the url in this format: https://openbis.host.ch:8443")
+
+        self.url_obj = url_obj
+        self.url     = url_obj.geturl()
+        self.port    = url_obj.port
+        self.hostname = url_obj.hostname
+        self.as_v3 = '/openbis/openbis/rmi-application-server-v3.json'
+        self.as_v1 = '/openbis/openbis/rmi-general-information-v1.json'
+        self.reg_v1 = '/openbis/openbis/rmi-query-v1.json'
+        self.verify_certificates = verify_certificates
+        self.token = token
+        self.datastores = []
+
+        self.dataset_types = None
+        self.sample_types = None
+        self.files_in_wsp = []
+        self.token_path = None
+
+        # some default settings for working with samples etc.
+        self.default_space = None
+        self.default_project = None
+        self.default_experiment = None
+        self.default_sample_type = None
+
+        # thread-local state, e.g. the currently active batch
+        self._local = threading.local()
+
+        self.coalesce_requests = coalesce_requests
+        self._single_flight = SingleFlight()
+        if retry_policy is None:
+            retry_policy = RetryPolicy()
+        self.retry_policy = retry_policy
+
+        self.timeout = timeout
+        self.timeouts = dict(default_timeouts)
+        if timeouts is not None:
+            self.timeouts.update(timeouts)
+
+        if governor is True:
+            governor = shared_governor(self.url)
+        self.governor = governor
+
+        self.instrumentation = Instrumentation(enabled=instrument)
+        self.lazy_references = lazy_references
+        self.interning = interning
+        self.result_format = self._result_format(result_format or 'pandas')
+        self.negated_criteria = negated_criteria
+
+        # all requests to the AS and the DSS go through this session,
+        # so that connections are pooled and kept alive.
+        self.session = self._create_session(
+            pool_connections, pool_maxsize, pool_block, keep_alive
+        )
+
+        # use an existing token, if available
+        if self.token is None:
+            self.token = self._get_cached_token(check_cached_token)
+
+    @property
+    def spaces(self):
+        return self.get_spaces()
+
+
+    @property
+    def projects(self):
+        return self.get_projects()
+
+
+    def _create_session(self, pool_connections, pool_maxsize, pool_block, keep_alive):
+        """internal method, creates the requests.Session (with its connection pools)
+        which is shared by all requests to the AS and DSS.
+        """
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.verify = self.verify_certificates
+        if not keep_alive:
+            session.headers['Connection'] = 'close'
+        return session
+
+
+    def close(self):
+        """ Closes all pooled connections to the AS and DSS. The session token stays valid.
+        """
+        self.session.close()
+
+
+    @contextmanager
+    def record(self, path):
+        """ Records all exchanges with the AS and the DSS inside the with-block and saves them
+        to the cassette file at path, e.g. for offline benchmarks with replay().
+        The recording adapter uses the pool settings of the adapter it replaces.
+        """
+        current = self.session.adapters['https://']
+        if isinstance(current, HTTPAdapter):
+            adapter = RecordingAdapter(
+                pool_connections=current._pool_connections,
+                pool_maxsize=current._pool_maxsize,
+                pool_block=current._pool_block,
+                max_retries=current.max_retries
+            )
+        else:
+            adapter = RecordingAdapter()
+        previous = self._mount(adapter)
+        try:
+            yield adapter
+        finally:
+            self._mount(*previous)
+            adapter.save(path)
+            adapter.close()
+
+
+    @contextmanager
+    def replay(self, path, latency=0.0, bandwidth=None):
+        """ Inside the with-block, requests to the AS and the DSS are answered from the
+        cassette file at path (see record()) instead of the server. latency (seconds) and
+        bandwidth (bytes/s) simulate the network.
+        """
+        adapter = ReplayAdapter(path, latency=latency, bandwidth=bandwidth)
+        previous = self._mount(adapter)
+        try:
+            yield adapter
+        finally:
+            self._mount(*previous)
+
+
+    def _mount(self, https_adapter, http_adapter=None):
+        """ internal method, replaces the transport adapters of the session.
+        Returns the previous ones.
+        """
+        previous = (self.session.adapters['https://'], self.session.adapters['http://'])
+        self.session.mount('https://', https_adapter)
+        self.session.mount('http://', http_adapter or https_adapter)
+        return previous
+
+
+    def stats(self):
+        """ Returns statistics about the requests sent so far, keyed by method: number of
+        requests and errors, total and maximum latency, a latency histogram, request and
+        response bytes and the time spent decoding, resolving references (parse_jackson) and
+        building DataFrames. Requires instrument=True (or instrumentation.enabled = True).
+        """
+        return self.instrumentation.stats()
+
+
+    def reset_stats(self):
+        self.instrumentation.reset()
+
+
+    def add_callback(self, callback):
+        """ Registers a function which receives every measurement as an event (a dict), e.g.
+        to export them to a monitoring system. Switches on the instrumentation.
+        See Instrumentation for the events.
+        """
+        self.instrumentation.callbacks.append(callback)
+        self.instrumentation.enabled = True
+        return callback
+
+
+    def remove_callback(self, callback):
+        self.instrumentation.callbacks.remove(callback)
+
+
+    def _get_cached_token(self, check=True):
+        """Read the token from the cache, and set the token ivar to it, if there, otherwise None.
+        If the token is not valid anymore, delete it (unless check is False).
+        """
+        token_path = self.gen_token_path()
+        if not os.path.exists(token_path):
+            return None
+        try:
+            with open(token_path) as f:
+                token = f.read()
+                if check and not self.is_token_valid(token):
+                    os.remove(token_path)
+                    return None
+                else:
+                    return token
+        except FileNotFoundError:
+            return None
+
+
+    def gen_token_path(self, parent_folder=None):
         """generates a path to the token file.
         The token is usually saved in a file called
         ~/.pybis/hostname.token
@@ -667,57 +2775,553 @@ class Openbis:
         return path
 
 
-    def save_token(self, token=None, parent_folder=None):
-        """ saves the session token to the disk, usually here: ~/.pybis/hostname.token. When a new Openbis instance is created, it tries to read this saved token by default.
+    def save_token(self, token=None, parent_folder=None):
+        """ saves the session token to the disk, usually here: ~/.pybis/hostname.token. When a new Openbis instance is created, it tries to read this saved token by default.
+        """
+        if token is None:
+            token = self.token
+
+        token_path = None;
+        if parent_folder is None:
+            token_path = self.gen_token_path()
+        else:
+            token_path = self.gen_token_path(parent_folder)
+
+        # create the necessary directories, if they don't exist yet
+        os.makedirs(os.path.dirname(token_path), exist_ok=True)
+        with open(token_path, 'w') as f:
+            f.write(token)
+            self.token_path = token_path
+
+
+    def delete_token(self, token_path=None):
+        """ deletes a stored session token.
+        """
+        if token_path is None:
+            token_path = self.token_path
+        os.remove(token_path)
+
+
+    def _post_request(self, resource, data):
+        """ internal method, used to handle all post requests and serializing / deserializing
+        data
+        """
+        method, body = _serialize_request(data)
+        read_only = _is_read_only(method)
+
+        instrumentation = self.instrumentation
+        start = time.perf_counter()
+        try:
+            if self.coalesce_requests and read_only:
+                # identical read-only requests which are already on their way share the response.
+                # The body contains method, params and token, so it serves as the key.
+                content = self._single_flight.do(
+                    (resource, body), lambda: self._send(self.url + resource, body, method, read_only),
+                    self._current_deadline()
+                )
+            else:
+                content = self._send(self.url + resource, body, method, read_only)
+        except OpenbisError as exc:
+            instrumentation.record_request(method, start, len(body), error=exc)
+            raise
+        instrumentation.record_request(method, start, len(body), len(content))
+
+        # every caller decodes its own copy, so nobody shares mutable results
+        with instrumentation.timer(method, 'decode'):
+            data = _json_loads_interned(content) if self.interning else _json_loads(content)
+        return _result_of(data, method)
+
+
+    def _send(self, url, body, method=None, read_only=False, stream=False):
+        """ internal method, posts an already serialized request and returns the raw response body
+        (or the response to stream it from, see _http_post()).
+        Read-only requests are retried according to the retry_policy.
+        """
+        retry_policy = self.retry_policy if read_only else None
+        if retry_policy is not None:
+            retry_policy.request_sent()
+
+        attempt = 1
+        while True:
+            try:
+                if self.governor is None:
+                    return self._http_post(url, body, method, stream)
+                with self.governor.slot(method, self._current_deadline()):
+                    return self._http_post(url, body, method, stream)
+            except OpenbisError as exc:
+                if retry_policy is None or not retry_policy.should_retry(exc, attempt):
+                    raise
+                delay = retry_policy.delay(attempt)
+                deadline = self._current_deadline()
+                if deadline is not None and deadline.remaining() <= delay:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+
+    def _http_post(self, url, body, method=None, stream=False):
+        """ internal method, a single POST request. All failures are turned into OpenbisErrors.
+        With stream=True, the response is returned as soon as its headers have arrived, to
+        read the body from with iter_content(), see _stream_objects().
+        """
+        timeout = self._timeout_for(method)
+        try:
+            resp = self.session.post(url, body, verify=self.verify_certificates, timeout=timeout,
+                                     stream=stream)
+            if stream and resp.ok:
+                return resp
+            content = resp.content
+        except requests.exceptions.RequestException as exc:
+            raise _transport_error(exc, method) from exc
+
+        if resp.ok:
+            return content
+        else:
+            raise _http_error(resp.status_code, content, method)
+
+
+    def _post_batch(self, resource, requests_list):
+        """ internal method, sends several JSON-RPC requests as one batch (a JSON array).
+        Every request needs a unique id. Returns the responses, keyed by their id.
+        """
+        for request in requests_list:
+            if "jsonrpc" not in request:
+                request["jsonrpc"] = "2.0"
+        # the batchable methods only read, so the batch is safe to retry
+        read_only = all(_is_read_only(request.get("method")) for request in requests_list)
+        body = _json_dumps(requests_list)
+        start = time.perf_counter()
+        try:
+            content = self._send(self.url + resource, body, None, read_only)
+        except OpenbisError as exc:
+            self.instrumentation.record_request('batch', start, len(body), error=exc)
+            raise
+        self.instrumentation.record_request('batch', start, len(body), len(content))
+        with self.instrumentation.timer('batch', 'decode'):
+            data = _json_loads(content)
+        if isinstance(data, dict):
+            # the batch was rejected as a whole
+            _result_of(data)
+            raise ValueError('batch request did not return a list of responses')
+        return { item.get('id'): item for item in data }
+
+
+    def _deferrable(self, resource, request, handler):
+        """ internal method for requests that can be part of a batch.
+        Outside of a batch, the request is sent immediately and the result of the handler is
+        returned. Inside a batch, the request is queued and a future is returned instead.
+        """
+        batch = getattr(self._local, 'batch', None)
+        if batch is None:
+            return handler(self._post_request(resource, request))
+        else:
+            return batch.add(resource, request, handler)
+
+
+    @contextmanager
+    def deadline(self, seconds=None):
+        """ All requests made inside the with-block have to be finished within the given
+        number of seconds (or Deadline). Requests are not even started once the deadline has
+        passed, an OpenbisTimeoutError is raised instead:
+
+            with o.deadline(60):
+                samples = o.get_samples(space='MY_SPACE')
+                datasets = o.get_datasets(type='RAW_DATA')
+
+        If deadlines are nested, the earlier one counts.
+        """
+        outer = self._current_deadline()
+        self._local.deadline = self._earliest_deadline(seconds)
+        try:
+            yield self._local.deadline
+        finally:
+            self._local.deadline = outer
+
+
+    def _current_deadline(self):
+        return getattr(self._local, 'deadline', None)
+
+
+    def _earliest_deadline(self, deadline):
+        """ internal method, returns the earlier of the given and the current deadline
+        """
+        current = self._current_deadline()
+        deadline = _as_deadline(deadline)
+        if deadline is None or (current is not None and current.expires < deadline.expires):
+            return current
+        return deadline
+
+
+    def _timeout_for(self, method):
+        """ internal method, the (connect, read) timeout for a method, limited by the deadline
+        """
+        timeout = self.timeouts.get(method, self.timeout)
+        return _timeout_until(timeout, self._current_deadline(), method)
+
+
+    @contextmanager
+    def batch(self):
+        """ Collects the get_sample(), get_experiment(), get_dataset(), get_space() and
+        get_project() calls made inside the with-block and sends them as one JSON-RPC batch
+        request when the block is left. Inside the block, these methods return futures:
+
+            with o.batch():
+                futures = [o.get_sample(permid) for permid in permids]
+            samples = [f.result() for f in futures]
+
+        Calling result() on a future inside the block sends everything queued so far.
+        """
+        batch = getattr(self._local, 'batch', None)
+        if batch is not None:
+            # nested batches are merged into the outer one
+            yield batch
+            return
+
+        batch = Batch(self)
+        self._local.batch = batch
+        try:
+            yield batch
+        except BaseException:
+            self._local.batch = None
+            batch.cancel()
+            raise
+        self._local.batch = None
+        batch.send()
+
+
+    def _dereference(self, method, objects):
+        """ internal method, resolves the references between the objects of a search result,
+        either in place or lazily (see lazy_references)
+        """
+        with self.instrumentation.timer(method, 'parse_jackson'):
+            if self.lazy_references:
+                return jackson_views(objects)
+            parse_jackson(objects)
+            return objects
+
+
+    def _stream_objects(self, resource, data, chunksize=1000, found=None):
+        """ internal method, sends a search request and yields the found objects in lists of at
+        most chunksize items, while the response is still being downloaded. References
+        between objects are resolved on the fly.
+        The request goes through _send(), with its retries, governor and timeouts, but it is
+        never coalesced with identical requests, as a stream cannot be shared. Once objects
+        have been yielded, a failure is raised as it is, without retry.
+        found collects the related objects (persons, types, experiments, ...) which later
+        objects may refer to by @id; their number depends on the distinct related objects,
+        not on the number of results.
+        """
+        method, body = _serialize_request(data)
+        start = time.perf_counter()
+        try:
+            resp = self._send(self.url + resource, body, method, _is_read_only(method), stream=True)
+        except OpenbisError as exc:
+            self.instrumentation.record_request(method, start, len(body), error=exc)
+            raise
+
+        # downloading, decoding and parsing are interleaved, so only the totals are recorded
+        response_bytes = [0]
+        def chunks():
+            try:
+                for chunk in resp.iter_content(chunk_size=65536):
+                    response_bytes[0] += len(chunk)
+                    yield chunk
+            except requests.exceptions.RequestException as exc:
+                error = _transport_error(exc, method)
+                self.instrumentation.record_request(method, start, len(body), response_bytes[0], error)
+                raise error from exc
+
+        if found is None:
+            found = {}
+        index = _JacksonIndex()
+        objects = []
+        with resp:
+            for obj in _iter_json_objects(chunks()):
+                if self.lazy_references:
+                    # only the objects which can be referenced stay in memory
+                    index.add(obj, scan=True)
+                    obj = JacksonView(obj, index)
+                else:
+                    parse_jackson(obj, found)
+                objects.append(obj)
+                if len(objects) >= chunksize:
+                    yield objects
+                    objects = []
+        if len(objects) > 0:
+            yield objects
+        self.instrumentation.record_request(method, start, len(body), response_bytes[0])
+
+
+    def stream_samples(self, chunksize=1000, with_properties=False, result_format=None, fields=None,
+                       **kwargs):
+        """ Like get_samples(), but yields DataFrames of at most chunksize samples while the
+        response is downloaded, so that memory consumption stays bounded:
+
+            for df in o.stream_samples(space='HUGE_SPACE'):
+                ...
+
+        With result_format='arrow' or 'records', the chunks are pyarrow.Tables or lists of dicts.
+        """
+        request = self._samples_request(fields=fields, with_properties=with_properties, **kwargs)
+        chunks = self._stream_objects(self.as_v3, request, chunksize)
+        columns = _select_columns(_sample_columns, fields)
+        return self._results(chunks, columns, with_properties and 'Sample', result_format)
+
+
+    def stream_experiments(self, chunksize=1000, with_properties=False, result_format=None, fields=None,
+                           **kwargs):
+        """ Like get_experiments(), but yields DataFrames of at most chunksize experiments.
+        """
+        request = self._experiments_request(fields=fields, with_properties=with_properties, **kwargs)
+        chunks = self._stream_objects(self.as_v3, request, chunksize)
+        columns = _select_columns(_experiment_columns, fields)
+        return self._results(chunks, columns, with_properties and 'Experiment', result_format)
+
+
+    def stream_datasets(self, chunksize=1000, with_properties=False, result_format=None, fields=None,
+                        **kwargs):
+        """ Like get_datasets(), but yields DataFrames of at most chunksize datasets.
+        """
+        request = self._datasets_request(fields=fields, with_properties=with_properties, **kwargs)
+        chunks = self._stream_objects(self.as_v3, request, chunksize)
+        columns = _select_columns(_dataset_columns, fields)
+        return self._results(chunks, columns, with_properties and 'DataSet', result_format)
+
+
+    def count_samples(self, **kwargs):
+        """ Returns the number of samples get_samples() would find with the same arguments,
+        without fetching them. Unlike get_samples(), no samples is no error: 0 is returned.
+        """
+        return self._count(search_samples_template, self._samples_criteria(**kwargs), 'Sample')
+
+
+    def count_experiments(self, **kwargs):
+        """ Returns the number of experiments get_experiments() would find, see count_samples().
+        """
+        return self._count(search_experiments_template, self._experiments_criteria(**kwargs), 'Experiment')
+
+
+    def count_datasets(self, **kwargs):
+        """ Returns the number of datasets get_datasets() would find, see count_samples().
+        """
+        return self._count(search_datasets_template, self._datasets_criteria(**kwargs), 'DataSet')
+
+
+    def count_samples_by(self, group_by, groups=None, workers=4, **kwargs):
+        """ Counts the samples per group, e.g. per type and space:
+
+            o.count_samples_by('type', space='MY_SPACE')
+            o.count_samples_by('space', ['LAB_A', 'LAB_B'], type='CELL')
+
+        group_by is an argument of get_samples(), groups are its values (all spaces or
+        sample types if not given). The counts are requested concurrently by up to workers
+        threads and returned as a Series indexed by group.
+        """
+        return self._count_by(self.count_samples, 'Sample', group_by, groups, workers, kwargs)
+
+
+    def count_experiments_by(self, group_by, groups=None, workers=4, **kwargs):
+        """ Counts the experiments per group, see count_samples_by().
+        """
+        return self._count_by(self.count_experiments, 'Experiment', group_by, groups, workers, kwargs)
+
+
+    def count_datasets_by(self, group_by, groups=None, workers=4, **kwargs):
+        """ Counts the datasets per group, see count_samples_by().
+        """
+        return self._count_by(self.count_datasets, 'DataSet', group_by, groups, workers, kwargs)
+
+
+    def _count(self, template, criteria, entity):
+        request = template.render(token=self.token, criteria=criteria, options=_count_options(entity))
+        resp = self._post_request(self.as_v3, request)
+        return resp['totalCount']
+
+
+    def _count_by(self, count, entity, group_by, groups, workers, kwargs):
+        if group_by in kwargs:
+            raise ValueError("{} is already used to group by".format(group_by))
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if groups is None:
+            groups = self._all_groups(entity, group_by)
+        groups = list(groups)
+        # the deadline is kept per thread, the groups are counted in other threads
+        deadline = self._current_deadline()
+
+        def count_group(group):
+            with self.deadline(deadline):
+                return count(**dict(kwargs, **{group_by: group}))
+
+        if len(groups) <= 1 or workers == 1:
+            counts = [count_group(group) for group in groups]
+        else:
+            with ThreadPoolExecutor(max_workers=min(workers, len(groups))) as executor:
+                counts = list(executor.map(count_group, groups))
+        return Series(counts, index=pd.Index(groups, name=group_by), name='count')
+
+
+    def _all_groups(self, entity, group_by):
+        """ all values of group_by, for the groups which can be listed
+        """
+        if group_by == 'space':
+            return list(self.get_spaces(result_format='pandas').df['code'])
+        if group_by == 'type':
+            get_types = {
+                'Sample': self.get_sample_types,
+                'Experiment': self.get_experiment_types,
+                'DataSet': self.get_dataset_types,
+            }[entity]
+            return list(get_types()['code'])
+        raise ValueError("please give the groups to count for {}".format(group_by))
+
+
+    def iter_samples(self, page_size=1000, read_ahead=1, with_properties=False, result_format=None,
+                     fields=None, **kwargs):
+        """ Like get_samples(), but fetches the samples page by page, page_size samples per
+        request, and yields a DataFrame (or Table, records) per page:
+
+            for df in o.iter_samples(space='HUGE_SPACE', page_size=5000):
+                ...
+
+        The samples are sorted by permId. While a page is processed, up to read_ahead
+        further pages are fetched in the background, so at most read_ahead + 1 pages are
+        held in memory. Samples which are registered or deleted during the iteration can
+        shift the pages.
+        """
+        columns, options = _projection(_sample_columns, search_samples_options, fields, with_properties)
+        pages = self._search_pages(search_samples_template, self._samples_criteria(**kwargs),
+                                   options, 'Sample', page_size, read_ahead)
+        return self._results(pages, columns, with_properties and 'Sample', result_format)
+
+
+    def iter_experiments(self, page_size=1000, read_ahead=1, with_properties=False, result_format=None,
+                         fields=None, **kwargs):
+        """ Like get_experiments(), but yields the experiments page by page, see iter_samples().
+        """
+        columns, options = _projection(_experiment_columns, search_experiments_options, fields, with_properties)
+        pages = self._search_pages(search_experiments_template, self._experiments_criteria(**kwargs),
+                                   options, 'Experiment', page_size, read_ahead)
+        return self._results(pages, columns, with_properties and 'Experiment', result_format)
+
+
+    def iter_datasets(self, page_size=1000, read_ahead=1, with_properties=False, result_format=None,
+                      fields=None, **kwargs):
+        """ Like get_datasets(), but yields the datasets page by page, see iter_samples().
+        """
+        columns, options = _projection(_dataset_columns, search_datasets_options, fields, with_properties)
+        pages = self._search_pages(search_datasets_template, self._datasets_criteria(**kwargs),
+                                   options, 'DataSet', page_size, read_ahead)
+        return self._results(pages, columns, with_properties and 'DataSet', result_format)
+
+
+    def iter_projects(self, page_size=1000, read_ahead=1, result_format=None, space=None, fields=None):
+        """ Like get_projects(), but yields the projects page by page, see iter_samples().
+        """
+        columns, options = _projection(_project_columns, search_projects_options, fields)
+        pages = self._search_pages(search_projects_template, self._projects_criteria(space),
+                                   options, 'Project', page_size, read_ahead)
+        return self._results(pages, columns, None, result_format)
+
+
+    def scan_samples(self, workers=4, page_size=1000, ordered=True, with_properties=False,
+                     result_format=None, fields=None, **kwargs):
+        """ Like iter_samples(), but fetches the pages with up to workers concurrent requests,
+        which is faster for huge results as long as the server keeps up. The pages are
+        yielded in order, or as they arrive if ordered is False. To get the whole result:
+
+            samples = concat_results(o.scan_samples(workers=8, space='HUGE_SPACE'))
         """
-        if token is None:
-            token = self.token
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        columns, options = _projection(_sample_columns, search_samples_options, fields, with_properties)
+        pages = self._search_pages(search_samples_template, self._samples_criteria(**kwargs),
+                                   options, 'Sample', page_size, workers, ordered)
+        return self._results(pages, columns, with_properties and 'Sample', result_format)
 
-        token_path = None;
-        if parent_folder is None:
-            token_path = self.gen_token_path()
-        else:
-            token_path = self.gen_token_path(parent_folder)
 
-        # create the necessary directories, if they don't exist yet
-        os.makedirs(os.path.dirname(token_path), exist_ok=True)
-        with open(token_path, 'w') as f:
-            f.write(token)
-            self.token_path = token_path
+    def scan_datasets(self, workers=4, page_size=1000, ordered=True, with_properties=False,
+                      result_format=None, fields=None, **kwargs):
+        """ Like iter_datasets(), but fetches the pages concurrently, see scan_samples().
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        columns, options = _projection(_dataset_columns, search_datasets_options, fields, with_properties)
+        pages = self._search_pages(search_datasets_template, self._datasets_criteria(**kwargs),
+                                   options, 'DataSet', page_size, workers, ordered)
+        return self._results(pages, columns, with_properties and 'DataSet', result_format)
 
 
-    def delete_token(self, token_path=None):
-        """ deletes a stored session token.
+    def _search_pages(self, template, criteria, options, entity, page_size, read_ahead, ordered=True):
+        """ internal method, yields the (dereferenced) objects found by a search template,
+        page by page, see _read_pages()
         """
-        if token_path is None:
-            token_path = self.token_path
-        os.remove(token_path)
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        if read_ahead < 0:
+            raise ValueError("read_ahead must not be negative")
+        token = self.token
+        # the deadline is kept per thread, the pages read ahead are fetched in other threads
+        deadline = self._current_deadline()
+
+        def fetch(start):
+            request = template.render(
+                token=token, criteria=criteria,
+                options=_paged_options(options, entity, start, page_size),
+            )
+            with self.deadline(deadline):
+                resp = self._post_request(self.as_v3, request)
+            return resp.get('totalCount'), self._dereference(template.method, resp['objects'])
 
+        return _read_pages(fetch, page_size, read_ahead, ordered)
 
-    def _post_request(self, resource, data):
-        """ internal method, used to handle all post requests and serializing / deserializing
-        data
+
+    def _results(self, pages, columns, property_entity=None, result_format=None):
+        """ internal method, builds a result (DataFrame, Table or records) for every page of
+        objects. The property assignments of every entity type are fetched once, and the
+        pages share their categories.
         """
-        if "id" not in data:
-            data["id"] = "1"
-        if "jsonrpc" not in data:
-            data["jsonrpc"] = "2.0"
-        resp = requests.post(
-            self.url + resource, 
-            json.dumps(data), 
-            verify=self.verify_certificates
-        )
+        result_format = self._result_format(result_format)
 
-        if resp.ok:
-            data = resp.json()
-            if 'error' in data:
-                raise ValueError('an error has occured: ' + data['error']['message'] )
-            elif 'result' in data:
-                return data['result']
-            else:
-                raise ValueError('request did not return either result nor error')
-        else:
-            raise ValueError('general error while performing post request')
+        def results():
+            assignments = {}
+            dictionaries = _shared_categories()
+            for objects in pages:
+                data_types = None
+                if property_entity:
+                    data_types = self._property_data_types(property_entity, _type_codes(objects), assignments)
+                yield _build_result(objects, columns, result_format, data_types, dictionaries)
+
+        return results()
+
+
+    def _result_format(self, result_format=None):
+        """ checks result_format, None stands for the default of this instance
+        """
+        if result_format is None:
+            return self.result_format
+        if result_format not in result_formats:
+            raise ValueError("result_format must be one of {}, not {!r}".format(
+                ", ".join(sorted(result_formats)), result_format))
+        return result_format
+
+
+    def _property_data_types(self, entity, type_codes, assignments=None):
+        """ maps the codes of the properties assigned to the given entity types
+        ('Sample', 'Experiment' or 'DataSet') to their dataType. assignments caches the
+        PropertyAssignments by type code.
+        """
+        get_type = {
+            'Sample': self.get_sample_type,
+            'Experiment': self.get_experiment_types,
+            'DataSet': self.get_dataset_types,
+        }[entity]
+        if assignments is None:
+            assignments = {}
+        for type_code in type_codes:
+            if type_code not in assignments:
+                assignments[type_code] = get_type(type_code)
+        return _assigned_data_types(assignments[type_code] for type_code in type_codes)
 
 
     def logout(self):
@@ -749,6 +3353,10 @@ class Openbis:
             "params":[username, password],
         }
         result = self._post_request(self.as_v3, login_request)
+        return self._login_for_response(result, save_token)
+
+
+    def _login_for_response(self, result, save_token=False):
         if result is None:
             raise ValueError("login to openBIS failed")
         else:
@@ -778,10 +3386,12 @@ class Openbis:
             return self.datastores
 
 
-    def get_spaces(self, code=None):
+    def get_spaces(self, code=None, result_format=None, fields=None):
         """ Get a list of all available spaces (DataFrame object). To create a sample or a
-        dataset, you need to specify in which space it should live.
+        dataset, you need to specify in which space it should live. For fields see get_samples().
         """
+        result_format = self._result_format(result_format)
+        columns = _select_columns(_space_columns, fields)
      
         criteria = {}
         options = {}
@@ -794,15 +3404,10 @@ class Openbis:
         }
         resp = self._post_request(self.as_v3, request)
         if resp is not None:
-            spaces = DataFrame(resp['objects'])
-            spaces['registrationDate']= spaces['registrationDate'].map(format_timestamp)
-            spaces['modificationDate']= spaces['modificationDate'].map(format_timestamp)
-            sp = Things(
-                self,
-                'space',
-                spaces[['code', 'description', 'registrationDate', 'modificationDate']]
-            )
-            return sp
+            spaces = _build_result(resp['objects'], columns, result_format)
+            if result_format != 'pandas':
+                return spaces
+            return Things(self, 'space', spaces)
         else:
             raise ValueError("No spaces found!")
 
@@ -812,6 +3417,13 @@ class Openbis:
         """
 
         spaceId = str(spaceId).upper()
+        request = self._space_request(spaceId)
+        return self._deferrable(
+            self.as_v3, request, lambda resp: self._space_for_response(resp, spaceId)
+        )
+
+
+    def _space_request(self, spaceId):
         request = {
         "method": "getSpaces",
             "params": [ 
@@ -831,17 +3443,51 @@ class Openbis:
             } 
             ],
         } 
-        resp = self._post_request(self.as_v3, request)
+        return request
+
+
+    def _space_for_response(self, resp, spaceId):
         if len(resp) == 0:
             raise ValueError("No such space: %s" % spaceId)
         return Space(self, resp[spaceId])
 
 
     def get_samples(self, code=None, permId=None, space=None, project=None, experiment=None, type=None,
-                    withParents=None, withChildren=None, tags=None, **properties):
-        """ Get a list of all samples for a given space/project/experiment (or any combination)
+                    withParents=None, withChildren=None, tags=None, with_properties=False,
+                    result_format=None, fields=None, where=None, **properties):
+        """ Get a list of all samples for a given space/project/experiment (or any combination).
+        with_properties=True adds one column per property, typed after the property
+        assignments of the sample types.
+        result_format overrides the result_format of this instance: 'pandas' returns Things,
+        'arrow' a pyarrow.Table and 'records' a list of dicts.
+        fields restricts the result to the given columns, e.g. ['identifier', 'registrator'].
+        Only the related objects these columns need are fetched, which makes the response
+        smaller and faster for big results.
+        where is a Query which openBIS evaluates in addition to the other arguments, e.g.
+        where=(prop('CONCENTRATION') > 0.5) | attr('code').startswith('CTRL'), see Query.
         """
 
+        result_format = self._result_format(result_format)
+        request = self._samples_request(code, permId, space, project, experiment, type,
+                                        withParents, withChildren, tags, where, fields=fields,
+                                        with_properties=with_properties, **properties)
+        resp = self._post_request(self.as_v3, request)
+        query = dict(code=code, permId=permId, space=space, project=project, experiment=experiment,
+                     type=type, withParents=withParents, withChildren=withChildren, tags=tags,
+                     where=where, with_properties=with_properties, fields=fields, **properties)
+        return self._samples_for_response(resp, with_properties, result_format=result_format,
+                                          fields=fields, query=('samples', query))
+
+
+    def _samples_request(self, *args, fields=None, with_properties=False, **kwargs):
+        criteria = self._samples_criteria(*args, **kwargs)
+        options = _fields_options(search_samples_options, _sample_columns, fields, with_properties)
+        return _render_search(search_samples_template, self.token, criteria, options)
+
+
+    def _samples_criteria(self, code=None, permId=None, space=None, project=None, experiment=None,
+                          type=None, withParents=None, withChildren=None, tags=None, where=None,
+                          **properties):
         if space is None:
             space = self.default_space
         if project is None:
@@ -874,6 +3520,8 @@ class Openbis:
             sub_criteria.append(_subcriteria_for_tags(tags))
         if code:
             sub_criteria.append(_criteria_for_code(code))
+        if where is not None:
+            sub_criteria.append(_subcriteria_for_query(where, 'Sample', self.negated_criteria))
         if permId:
             sub_criteria.append(_common_search("as.dto.common.search.PermIdSearchCriteria",permId))
         if withParents:
@@ -902,52 +3550,56 @@ class Openbis:
             "@type": "as.dto.sample.search.SampleSearchCriteria",
             "operator": "AND"
         }
+        return criteria
 
-        options = {
-            "properties": { "@type": "as.dto.property.fetchoptions.PropertyFetchOptions" },
-            "tags": { "@type": "as.dto.tag.fetchoptions.TagFetchOptions" },
-            "registrator": { "@type": "as.dto.person.fetchoptions.PersonFetchOptions" },
-            "modifier": { "@type": "as.dto.person.fetchoptions.PersonFetchOptions" },
-            "experiment": { "@type": "as.dto.experiment.fetchoptions.ExperimentFetchOptions" },
-            "type": { "@type": "as.dto.sample.fetchoptions.SampleTypeFetchOptions" },
-            "@type": "as.dto.sample.fetchoptions.SampleFetchOptions",
-        }
-
-        request = {
-            "method": "searchSamples",
-            "params": [ self.token, 
-                criteria,
-                options,
-            ],
-        }
 
-        resp = self._post_request(self.as_v3, request)
+    def _samples_for_response(self, resp, with_properties=False, data_types=None, result_format=None,
+                              fields=None, query=None):
+        result_format = self._result_format(result_format)
         if resp is not None:
             objects = resp['objects']
-            parse_jackson(objects)
+            objects = self._dereference('searchSamples', objects)
 
-            samples = DataFrame(objects)
-            if len(samples) is 0:
+            if len(objects) == 0:
                 raise ValueError("No samples found!")
 
-            samples['registrationDate']= samples['registrationDate'].map(format_timestamp)
-            samples['modificationDate']= samples['modificationDate'].map(format_timestamp)
-            samples['registrator'] = samples['registrator'].map(extract_person)
-            samples['modifier'] = samples['modifier'].map(extract_person)
-            samples['identifier'] = samples['identifier'].map(extract_identifier)
-            samples['permId'] = samples['permId'].map(extract_permid)
-            samples['experiment'] = samples['experiment'].map(extract_nested_identifier)
-            samples['sample_type'] = samples['type'].map(extract_nested_permid)
-
-            ss = samples[['identifier', 'permId', 'experiment', 'sample_type', 'registrator', 'registrationDate', 'modifier', 'modificationDate']]
-            return Things(self, 'sample', ss, 'identifier')
+            if with_properties and data_types is None:
+                data_types = self._property_data_types('Sample', _type_codes(objects))
+            with self.instrumentation.timer('searchSamples', 'dataframe'):
+                samples = _build_result(objects, _select_columns(_sample_columns, fields), result_format, data_types)
+            if result_format != 'pandas':
+                return samples
+            return Things(self, 'sample', samples, 'identifier', query)
         else:
             raise ValueError("No samples found!")
 
-    def get_experiments(self, code=None, type=None, space=None, project=None, tags=None, is_finished=None, **properties):
-        """ Get a list of all experiment for a given space or project (or any combination)
+    def get_experiments(self, code=None, type=None, space=None, project=None, tags=None, is_finished=None,
+                        with_properties=False, result_format=None, fields=None, where=None,
+                        **properties):
+        """ Get a list of all experiment for a given space or project (or any combination).
+        with_properties=True adds one typed column per property, for result_format, fields
+        and where see get_samples().
         """
 
+        result_format = self._result_format(result_format)
+        request = self._experiments_request(code, type, space, project, tags, is_finished, where, fields=fields,
+                                            with_properties=with_properties, **properties)
+        resp = self._post_request(self.as_v3, request)
+        query = dict(code=code, type=type, space=space, project=project, tags=tags,
+                     is_finished=is_finished, where=where, with_properties=with_properties,
+                     fields=fields, **properties)
+        return self._experiments_for_response(resp, with_properties, result_format=result_format,
+                                              fields=fields, query=('experiments', query))
+
+
+    def _experiments_request(self, *args, fields=None, with_properties=False, **kwargs):
+        criteria = self._experiments_criteria(*args, **kwargs)
+        options = _fields_options(search_experiments_options, _experiment_columns, fields, with_properties)
+        return _render_search(search_experiments_template, self.token, criteria, options)
+
+
+    def _experiments_criteria(self, code=None, type=None, space=None, project=None, tags=None,
+                              is_finished=None, where=None, **properties):
         if space is None:
             space = self.default_space
         if project is None:
@@ -969,52 +3621,59 @@ class Openbis:
         if properties is not None:
             for prop in properties:
                 sub_criteria.append(_subcriteria_for_properties(prop, properties[prop]))
+        if where is not None:
+            sub_criteria.append(_subcriteria_for_query(where, 'Experiment', self.negated_criteria))
 
         criteria = {
             "criteria": sub_criteria,
             "@type": "as.dto.experiment.search.ExperimentSearchCriteria",
             "operator": "AND"
         }
-        options = {
-            "properties": { "@type": "as.dto.property.fetchoptions.PropertyFetchOptions" },
-            "tags": { "@type": "as.dto.tag.fetchoptions.TagFetchOptions" },
-            "registrator": { "@type": "as.dto.person.fetchoptions.PersonFetchOptions" },
-            "modifier": { "@type": "as.dto.person.fetchoptions.PersonFetchOptions" },
-            "project": { "@type": "as.dto.project.fetchoptions.ProjectFetchOptions" },
-            "type": { "@type": "as.dto.experiment.fetchoptions.ExperimentTypeFetchOptions" },
-            "@type": "as.dto.experiment.fetchoptions.ExperimentFetchOptions" 
-        }
+        return criteria
 
-        request = {
-            "method": "searchExperiments",
-            "params": [ self.token, 
-                criteria,
-                options,
-            ],
-        }
-        resp = self._post_request(self.as_v3, request)
+
+    def _experiments_for_response(self, resp, with_properties=False, data_types=None, result_format=None,
+                                  fields=None, query=None):
+        result_format = self._result_format(result_format)
         if len(resp['objects']) == 0:
             raise ValueError("No experiments found!")
 
-        objects = resp['objects']
-        parse_jackson(objects)
+        objects = self._dereference('searchExperiments', resp['objects'])
+
+        if with_properties and data_types is None:
+            data_types = self._property_data_types('Experiment', _type_codes(objects))
+        with self.instrumentation.timer('searchExperiments', 'dataframe'):
+            experiments = _build_result(objects, _select_columns(_experiment_columns, fields), result_format, data_types)
+        if result_format != 'pandas':
+            return experiments
+        return Things(self, 'experiment', experiments, 'identifier', query)
 
-        experiments = DataFrame(objects)
-        experiments['registrationDate']= experiments['registrationDate'].map(format_timestamp)
-        experiments['modificationDate']= experiments['modificationDate'].map(format_timestamp)
-        experiments['project']= experiments['project'].map(extract_code)
-        experiments['registrator'] = experiments['registrator'].map(extract_person)
-        experiments['modifier'] = experiments['modifier'].map(extract_person)
-        experiments['identifier'] = experiments['identifier'].map(extract_identifier)
-        experiments['type'] = experiments['type'].map(extract_code)
 
-        exps = experiments[['code', 'identifier', 'project', 'type', 'registrator', 
-            'registrationDate', 'modifier', 'modificationDate']]
-        return Things(self, 'experiment', exps, 'identifier')
+    def get_datasets(self, code=None, type=None, withParents=None, withChildren=None, withSamples=None,
+                     with_properties=False, result_format=None, fields=None, where=None):
+        """ Get a list of datasets. with_properties=True replaces the properties column
+        by one typed column per property, for result_format, fields and where see get_samples().
+        """
+
+        result_format = self._result_format(result_format)
+        request = self._datasets_request(code, type, withParents, withChildren, withSamples, where,
+                                         fields=fields, with_properties=with_properties)
+        resp = self._post_request(self.as_v3, request)
+        query = dict(code=code, type=type, withParents=withParents, withChildren=withChildren,
+                     withSamples=withSamples, where=where, with_properties=with_properties,
+                     fields=fields)
+        return self._datasets_for_response(resp, with_properties, result_format=result_format,
+                                           fields=fields, query=('datasets', query))
+
 
+    def _datasets_request(self, *args, fields=None, with_properties=False, **kwargs):
+        criteria = self._datasets_criteria(*args, **kwargs)
+        options = _fields_options(search_datasets_options, _dataset_columns, fields, with_properties)
+        return _render_search(search_datasets_template, self.token, criteria, options)
 
-    def get_datasets(self, code=None, type=None, withParents=None, withChildren=None, withSamples=None):
 
+    def _datasets_criteria(self, code=None, type=None, withParents=None, withChildren=None,
+                           withSamples=None, where=None):
         sub_criteria = []
 
         if code:
@@ -1027,70 +3686,55 @@ class Openbis:
             sub_criteria.append(_subcriteria_for_permid(withChildren, 'DataSet', 'Children'))
         if withSamples:
             sub_criteria.append(_subcriteria_for_permid(withSamples, 'Sample'))
+        if where is not None:
+            sub_criteria.append(_subcriteria_for_query(where, 'DataSet', self.negated_criteria))
 
         criteria = {
             "criteria": sub_criteria,
             "@type": "as.dto.dataset.search.DataSetSearchCriteria",
             "operator": "AND"
         }
+        return criteria
 
-        fetchopts = {
-#            "parents":      { "@type": "as.dto.dataset.fetchoptions.DataSetFetchOptions" },
-#            "children":     { "@type": "as.dto.dataset.fetchoptions.DataSetFetchOptions" },
-            "containers":   { "@type": "as.dto.dataset.fetchoptions.DataSetFetchOptions" },
-            "type":         { "@type": "as.dto.dataset.fetchoptions.DataSetTypeFetchOptions" }
-        }
-
-        for option in ['tags', 'properties', 'sample']:
-            fetchopts[option] = fetch_option[option]
 
-        request = {
-            "method": "searchDataSets",
-            "params": [ self.token, 
-                criteria,
-                fetchopts,
-            ],
-        }
-        resp = self._post_request(self.as_v3, request)
+    def _datasets_for_response(self, resp, with_properties=False, data_types=None, result_format=None,
+                               fields=None, query=None):
+        result_format = self._result_format(result_format)
         objects = resp['objects']
         if len(objects) == 0:
             raise ValueError("no datasets found!")
         else:
-            parse_jackson(objects)
-            datasets = DataFrame(objects)
-            datasets['registrationDate']= datasets['registrationDate'].map(format_timestamp)
-            datasets['modificationDate']= datasets['modificationDate'].map(format_timestamp)
-            datasets['sample']= datasets['sample'].map(extract_nested_identifier)
-            datasets['type']= datasets['type'].map(extract_code)
-            ds = Things(
-                self,
-                'dataset',
-                datasets[['code', 'properties', 'type', 'sample', 'registrationDate', 'modificationDate']]
-            )
-            return ds
-
-
-    def get_experiment(self, expId):
-        """ Returns an experiment object for a given identifier (expId).
+            objects = self._dereference('searchDataSets', objects)
+            if with_properties and data_types is None:
+                data_types = self._property_data_types('DataSet', _type_codes(objects))
+            with self.instrumentation.timer('searchDataSets', 'dataframe'):
+                datasets = _build_result(objects, _select_columns(_dataset_columns, fields), result_format, data_types)
+            if result_format != 'pandas':
+                return datasets
+            return Things(self, 'dataset', datasets, query=query)
+
+
+    def get_experiment(self, expId, fetch=None):
+        """ Returns an experiment object for a given identifier (expId). fetch restricts the
+        related objects to the given ones, e.g. fetch=['properties'].
         """
+        request = self._experiment_request(expId, fetch)
+        return self._deferrable(
+            self.as_v3, request, lambda resp: self._experiment_for_response(resp, expId)
+        )
 
-        fetchopts = {
-            "@type": "as.dto.experiment.fetchoptions.ExperimentFetchOptions"
-        }
 
-        search_request = search_request_for_identifier(expId, 'experiment')
-        for option in ['tags', 'properties', 'attachments', 'project']:
-            fetchopts[option] = fetch_option[option]
+    def _experiment_request(self, expId, fetch=None):
+        experiment_id = search_request_for_identifier(expId, 'experiment')
+        options = _projected_options(get_experiment_options, fetch)
+        if options is None:
+            return get_experiment_template.render(token=self.token, experiment_id=experiment_id)
+        return get_experiment_template.render(
+            token=self.token, experiment_id=experiment_id, options=options
+        )
 
-        request = {
-        "method": "getExperiments",
-            "params": [ 
-                self.token,
-                [ search_request ],
-                fetchopts
-            ],
-        } 
-        resp = self._post_request(self.as_v3, request)
+
+    def _experiment_for_response(self, resp, expId):
         if len(resp) == 0:
             raise ValueError("No such experiment: %s" % expId)
         return Experiment(self, resp[expId])
@@ -1257,8 +3901,7 @@ class Openbis:
         new_objs = [] 
         for value in objects:
             del_objs = extract_deletion(value)
-            if len(del_objs) > 0:
-                new_objs.append(*del_objs)
+            new_objs.extend(del_objs)
 
         return DataFrame(new_objs)
 
@@ -1289,14 +3932,32 @@ class Openbis:
 
     def get_project(self, projectId):
         request = self._create_get_request('getProjects', 'project', projectId, ['attachments'])
-        resp = self._post_request(self.as_v3, request)
-        return resp
+        return self._deferrable(self.as_v3, request, lambda resp: resp)
 
 
-    def get_projects(self, space=None):
-        """ Get a list of all available projects (DataFrame object).
+    def get_projects(self, space=None, result_format=None, fields=None):
+        """ Get a list of all available projects (DataFrame object). For fields see get_samples().
         """
+        result_format = self._result_format(result_format)
+        options = _fields_options(search_projects_options, _project_columns, fields)
+        request = _render_search(search_projects_template, self.token, self._projects_criteria(space), options)
+        resp = self._post_request(self.as_v3, request)
+        if resp is not None:
+            objects = resp['objects']
+            parse_jackson(objects)
+
+            if len(objects) == 0:
+                raise ValueError("No projects found!")
+
+            pros = _build_result(objects, _select_columns(_project_columns, fields), result_format)
+            if result_format != 'pandas':
+                return pros
+            return Things(self, 'project', pros, 'identifier')
+        else:
+            raise ValueError("No projects found!")
 
+
+    def _projects_criteria(self, space=None):
         if space is None:
             space = self.default_space
 
@@ -1304,51 +3965,12 @@ class Openbis:
         if space:
             sub_criteria.append(_subcriteria_for_code(space, 'space'))
 
-        criteria = {
+        return {
             "criteria": sub_criteria,
             "@type": "as.dto.project.search.ProjectSearchCriteria",
             "operator": "AND"
         }
 
-        options = {
-            "registrator": { "@type": "as.dto.person.fetchoptions.PersonFetchOptions" },
-            "modifier": { "@type": "as.dto.person.fetchoptions.PersonFetchOptions" },
-            "experiments": { "@type": "as.dto.experiment.fetchoptions.ExperimentFetchOptions", },
-            "space": { "@type": "as.dto.space.fetchoptions.SpaceFetchOptions" },
-            "@type": "as.dto.project.fetchoptions.ProjectFetchOptions"
-        }
-
-        request = {
-            "method": "searchProjects",
-            "params": [ self.token, 
-                criteria,
-                options,
-            ],
-        }
-
-        resp = self._post_request(self.as_v3, request)
-        if resp is not None:
-            objects = resp['objects']
-            parse_jackson(objects)
-
-            projects = DataFrame(objects)
-            if len(projects) is 0:
-                raise ValueError("No projects found!")
-
-            projects['registrationDate']= projects['registrationDate'].map(format_timestamp)
-            projects['modificationDate']= projects['modificationDate'].map(format_timestamp)
-            projects['registrator'] = projects['registrator'].map(extract_person)
-            projects['modifier'] = projects['modifier'].map(extract_person)
-            projects['permid'] = projects['permId'].map(extract_permid)
-            projects['identifier'] = projects['identifier'].map(extract_identifier)
-            projects['space'] = projects['space'].map(extract_code)
-
-            pros=projects[['code', 'space', 'registrator', 'registrationDate', 
-                            'modifier', 'modificationDate', 'permid', 'identifier']]
-            return Things(self, 'project', pros, 'identifier')
-        else:
-            raise ValueError("No projects found!")
-
 
     def _create_get_request(self, method_name, entity_type, permids, options):
 
@@ -1390,7 +4012,13 @@ class Openbis:
         return self._get_types_of("searchSampleTypes", "Sample", type, ["generatedCodePrefix"])
 
     def get_sample_type(self, type):
-        return self._get_types_of("searchSampleTypes", "Sample", type, ["generatedCodePrefix"])
+        # while a batch is resolved, every sample type is fetched only once
+        cache = getattr(self._local, 'sample_types', None)
+        if cache is None:
+            return self._get_types_of("searchSampleTypes", "Sample", type, ["generatedCodePrefix"])
+        if type not in cache:
+            cache[type] = self._get_types_of("searchSampleTypes", "Sample", type, ["generatedCodePrefix"])
+        return cache[type]
 
 
     def get_experiment_types(self, type=None):
@@ -1456,8 +4084,12 @@ class Openbis:
         """ Returns a list of all available experiment types
         """
 
-        attributes = ['code', 'description'] + list(additional_attributes)
+        request = self._types_request(method_name, entity_type, type)
+        resp = self._post_request(self.as_v3, request)
+        return self._types_for_response(resp, type, additional_attributes)
+
 
+    def _types_request(self, method_name, entity_type, type=None):
         search_request = {}
         fetch_options = {}
 
@@ -1478,13 +4110,19 @@ class Openbis:
                 },
                 "@type": "as.dto.{}.fetchoptions.{}TypeFetchOptions".format(entity_type.lower(), entity_type)
             }
-            attributes.append('propertyAssignments')
         
         request = {
             "method": method_name,
             "params": [ self.token, search_request, fetch_options ],
         }
-        resp = self._post_request(self.as_v3, request)
+        return request
+
+
+    def _types_for_response(self, resp, type=None, additional_attributes=[]):
+        attributes = ['code', 'description'] + list(additional_attributes)
+        if type is not None:
+            attributes.append('propertyAssignments')
+
         parse_jackson(resp)
 
         if type is not None and len(resp['objects']) == 1:
@@ -1522,7 +4160,7 @@ class Openbis:
         return resp
 
 
-    def get_dataset(self, permid):
+    def get_dataset(self, permid, fetch=None):
         """fetch a dataset and some metadata attached to it:
         - properties
         - sample
@@ -1532,79 +4170,53 @@ class Openbis:
         - dataStore
         - physicalData
         - linkedData
+        fetch restricts the metadata to the given ones, e.g. fetch=['properties', 'sample'].
         :return: a DataSet object
         """
+        request = self._dataset_request(permid, fetch)
+        return self._deferrable(self.as_v3, request, self._dataset_for_response)
 
-        criteria = [{
-            "permId": permid,
-            "@type": "as.dto.dataset.id.DataSetPermId"
-        }]
-
-        fetchopts = {
-            "parents":      { "@type": "as.dto.dataset.fetchoptions.DataSetFetchOptions" },
-            "children":     { "@type": "as.dto.dataset.fetchoptions.DataSetFetchOptions" },
-            "containers":   { "@type": "as.dto.dataset.fetchoptions.DataSetFetchOptions" },
-            "@type":        "as.dto.dataset.fetchoptions.DataSetFetchOptions",
-        }
 
-        for option in ['tags', 'properties', 'dataStore', 'physicalData', 'linkedData', 
-                       'experiment', 'sample']:
-            fetchopts[option] = fetch_option[option]
+    def _dataset_request(self, permid, fetch=None):
+        options = _projected_options(get_dataset_options, fetch)
+        if options is None:
+            return get_dataset_template.render(token=self.token, permid=permid)
+        return get_dataset_template.render(token=self.token, permid=permid, options=options)
 
-        request = {
-            "method": "getDataSets",
-            "params": [ self.token, 
-                criteria,
-                fetchopts,
-            ],
-        }
 
-        resp = self._post_request(self.as_v3, request)
+    def _dataset_for_response(self, resp):
         if resp is not None:
             for permid in resp:
                 return DataSet(self, resp[permid])
 
 
-    def get_sample(self, sample_ident, only_data=False):
+    def get_sample(self, sample_ident, only_data=False, fetch=None):
         """Retrieve metadata for the sample.
         Get metadata for the sample and any directly connected parents of the sample to allow access
         to the same information visible in the ELN UI. The metadata will be on the file system.
         :param sample_identifiers: A list of sample identifiers to retrieve.
+        :param fetch: only fetch these related objects, e.g. ['parents', 'tags']. The type
+        and the properties are always fetched. Parents, children and tags which are not
+        fetched are None, and save() leaves them unchanged.
         """
+        request = self._sample_request(sample_ident, fetch)
+        return self._deferrable(
+            self.as_v3, request,
+            lambda resp: self._sample_for_response(resp, sample_ident, only_data)
+        )
 
-        search_request = search_request_for_identifier(sample_ident, 'sample')
-        fetch_options = {
-            "type": {
-                "@type": "as.dto.sample.fetchoptions.SampleTypeFetchOptions"
-            },
-            "parents": { "@type": "as.dto.sample.fetchoptions.SampleFetchOptions" },
-            "children": { "@type": "as.dto.sample.fetchoptions.SampleFetchOptions" },
-            "experiment": { "@type": "as.dto.experiment.fetchoptions.ExperimentFetchOptions" },
-            "dataSets": {
-                "@type": "as.dto.dataset.fetchoptions.DataSetFetchOptions",
-                "properties": {
-                    "@type": "as.dto.property.fetchoptions.PropertyFetchOptions"
-                },
-                "type": {
-                    "@type": "as.dto.dataset.fetchoptions.DataSetTypeFetchOptions"
-                },
-            },
-            "space":       fetch_option['space'],
-            "properties":  fetch_option['properties'],
-            "registrator": fetch_option['registrator'],
-            "tags":        fetch_option['tags'],
-        }
 
-        sample_request = {
-            "method": "getSamples",
-            "params": [
-                self.token,
-                [ search_request ],
-                fetch_options
-            ],
-        }
+    def _sample_request(self, sample_ident, fetch=None):
+        sample_id = search_request_for_identifier(sample_ident, 'sample')
+        if fetch is None:
+            return get_sample_template.render(token=self.token, sample_id=sample_id)
+        if isinstance(fetch, str):
+            fetch = [fetch]
+        options = _projected_options(get_sample_options, ['type', 'properties'] + list(fetch))
+        return get_sample_template.render(token=self.token, sample_id=sample_id, options=options)
 
-        resp = self._post_request(self.as_v3, sample_request)
+
+    def _sample_for_response(self, resp, sample_ident, only_data=False):
         parse_jackson(resp)
 
         if resp is None or len(resp) == 0:
@@ -1636,12 +4248,15 @@ class Openbis:
         return self.get_spaces(refresh=True)
 
 
+    @_within_deadline
     def new_analysis(self, name, description=None, sample=None, dss_code=None, result_files=None,
     notebook_files=None, parents=None):
 
         """ An analysis contains the Jupyter notebook file(s) and some result files.
             Technically this method involves uploading files to the session workspace
             and activating the dropbox aka dataset ingestion service "jupyter-uploader-api"
+            If a deadline (in seconds) is given, uploading and registering have to be
+            finished by then, otherwise the remaining work is cancelled.
         """
 
         if dss_code is None:
@@ -1670,7 +4285,7 @@ class Openbis:
         parentIds = []
         if parents is not None:
             if not isinstance(parents, list):
-                parants = [parents]
+                parents = [parents]
             for parent in parents:
                 parentIds.append(parent.permId)
         
@@ -1760,7 +4375,11 @@ class Openbis:
         
 
 
-    def upload_files(self, datastore_url=None, files=None, folder=None, wait_until_finished=False):
+    def upload_files(self, datastore_url=None, files=None, folder=None, wait_until_finished=False,
+                     deadline=None):
+        """ Uploads files (or whole folders) to the session workspace of the DSS, in parallel.
+        If a deadline (in seconds) is given, uploads which are not finished by then are cancelled.
+        """
 
         if datastore_url is None:
             datastore_url = self._get_dss_url()
@@ -1780,7 +4399,10 @@ class Openbis:
         self.endByte   = 0
     
         # define a queue to handle the upload threads
-        queue = DataSetUploadQueue()
+        queue = DataSetUploadQueue(
+            session=self.session, timeout=self.timeouts.get('upload'),
+            deadline=self._earliest_deadline(deadline)
+        )
 
         real_files = []
         for filename in files:
@@ -1810,12 +4432,321 @@ class Openbis:
         return self.files_in_wsp
 
 
+class AsyncOpenbis():
+    """ asyncio version of the metadata calls of Openbis. Requests are built and responses are
+    parsed by an ordinary Openbis instance (available as the openbis attribute), but they are
+    sent with a non-blocking aiohttp session, so that many lookups can run concurrently:
+
+        o = AsyncOpenbis('https://openbis.host.ch:8443')
+        await o.login(username, password)
+        samples = await asyncio.gather(*[o.get_sample(permid) for permid in permids])
+
+    The returned objects (Sample, DataSet, Things...) belong to the synchronous Openbis instance.
+    """
+
+    def __init__(self, url='https://localhost:8443', verify_certificates=True, token=None,
+                 pool_maxsize=100):
+        if aiohttp is None:
+            raise ImportError("AsyncOpenbis needs the aiohttp package: pip install aiohttp")
+        # checking a cached token would block the event loop, it is checked by the first request
+        self.openbis = Openbis(url, verify_certificates, token, check_cached_token=False)
+        self._unchecked_token = token is None and self.openbis.token is not None
+        self.pool_maxsize = pool_maxsize
+        self.session = None
+
+    @property
+    def token(self):
+        return self.openbis.token
+
+    @token.setter
+    def token(self, token):
+        self.openbis.token = token
+
+    def _get_session(self):
+        # the aiohttp session must be created inside a running event loop
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_maxsize,
+                ssl=None if self.openbis.verify_certificates else False
+            )
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    def _client_timeout(self, method):
+        # the same per-method timeouts as the synchronous Openbis. Deadlines are better
+        # expressed with asyncio.wait_for() here.
+        timeout = self.openbis.timeouts.get(method, self.openbis.timeout)
+        if timeout is None:
+            return aiohttp.ClientTimeout(total=None)
+        if not isinstance(timeout, tuple):
+            timeout = (timeout, timeout)
+        return aiohttp.ClientTimeout(total=None, sock_connect=timeout[0], sock_read=timeout[1])
+
+    async def close(self):
+        """ Closes the aiohttp session and all its connections.
+        """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def _check_cached_token(self):
+        """ forgets (and deletes) the token from the token cache if it is not valid anymore
+        """
+        self._unchecked_token = False
+        if not await self.is_token_valid():
+            self.token = None
+            try:
+                os.remove(self.openbis.gen_token_path())
+            except FileNotFoundError:
+                pass
+
+    async def _post_request(self, resource, data):
+        """ internal method, the non-blocking counterpart of Openbis._post_request
+        """
+        method, request_body = _serialize_request(data)
+        if self._unchecked_token:
+            if method == 'login':
+                self._unchecked_token = False
+            else:
+                await self._check_cached_token()
+        instrumentation = self.openbis.instrumentation
+        start = time.perf_counter()
+        try:
+            async with self._get_session().post(
+                self.openbis.url + resource,
+                data=request_body,
+                timeout=self._client_timeout(method),
+            ) as resp:
+                body = await resp.read()
+                if resp.status >= 400:
+                    raise _http_error(resp.status, body, method)
+        except Exception as exc:
+            instrumentation.record_request(method, start, len(request_body), error=exc)
+            raise
+        instrumentation.record_request(method, start, len(request_body), len(body))
+        with instrumentation.timer(method, 'decode'):
+            if self.openbis.interning:
+                result = _json_loads_interned(body)
+            else:
+                result = _json_loads(body)
+        return _result_of(result, method)
+
+    async def login(self, username=None, password=None, save_token=False):
+        login_request = {
+            "method":"login",
+            "params":[username, password],
+        }
+        result = await self._post_request(self.openbis.as_v3, login_request)
+        return self.openbis._login_for_response(result, save_token)
+
+    async def logout(self):
+        if self.token is None:
+            return
+        logout_request = {
+            "method":"logout",
+            "params":[self.token],
+        }
+        resp = await self._post_request(self.openbis.as_v3, logout_request)
+        self.token = None
+        return resp
+
+    async def is_token_valid(self, token=None):
+        if token is None:
+            token = self.token
+        if token is None:
+            return False
+        request = {
+            "method": "isSessionActive",
+            "params": [ token ],
+        }
+        return await self._post_request(self.openbis.as_v1, request)
+
+    async def get_samples(self, *args, with_properties=False, result_format=None, fields=None, **kwargs):
+        request = self.openbis._samples_request(*args, fields=fields, with_properties=with_properties, **kwargs)
+        resp = await self._post_request(self.openbis.as_v3, request)
+        data_types = await self._response_data_types('Sample', resp, with_properties)
+        return self.openbis._samples_for_response(resp, with_properties, data_types, result_format, fields)
+
+    async def get_experiments(self, *args, with_properties=False, result_format=None, fields=None, **kwargs):
+        request = self.openbis._experiments_request(*args, fields=fields, with_properties=with_properties, **kwargs)
+        resp = await self._post_request(self.openbis.as_v3, request)
+        data_types = await self._response_data_types('Experiment', resp, with_properties)
+        return self.openbis._experiments_for_response(resp, with_properties, data_types, result_format, fields)
+
+    async def get_datasets(self, *args, with_properties=False, result_format=None, fields=None, **kwargs):
+        request = self.openbis._datasets_request(*args, fields=fields, with_properties=with_properties, **kwargs)
+        resp = await self._post_request(self.openbis.as_v3, request)
+        data_types = await self._response_data_types('DataSet', resp, with_properties)
+        return self.openbis._datasets_for_response(resp, with_properties, data_types, result_format, fields)
+
+    async def _response_data_types(self, entity, resp, with_properties):
+        # the entity types are read through views, which leave the response untouched
+        if not with_properties or resp is None or len(resp['objects']) == 0:
+            return None
+        get_type = {
+            'Sample': self.get_sample_type,
+            'Experiment': self.get_experiment_types,
+            'DataSet': self.get_dataset_types,
+        }[entity]
+        type_codes = _type_codes(jackson_views(resp['objects']))
+        assignments = await asyncio.gather(*[get_type(type_code) for type_code in type_codes])
+        return _assigned_data_types(assignments)
+
+    async def get_sample(self, sample_ident, only_data=False, fetch=None):
+        request = self.openbis._sample_request(sample_ident, fetch)
+        resp = await self._post_request(self.openbis.as_v3, request)
+        data = self.openbis._sample_for_response(resp, sample_ident, only_data=True)
+        if only_data:
+            return data
+        sample_type = await self.get_sample_type(data["type"]["code"])
+        return Sample(self.openbis, sample_type, data)
+
+    async def get_dataset(self, permid, fetch=None):
+        request = self.openbis._dataset_request(permid, fetch)
+        resp = await self._post_request(self.openbis.as_v3, request)
+        return self.openbis._dataset_for_response(resp)
+
+    async def get_experiment(self, expId, fetch=None):
+        request = self.openbis._experiment_request(expId, fetch)
+        resp = await self._post_request(self.openbis.as_v3, request)
+        return self.openbis._experiment_for_response(resp, expId)
+
+    async def _get_types_of(self, method_name, entity_type, type=None, additional_attributes=[]):
+        request = self.openbis._types_request(method_name, entity_type, type)
+        resp = await self._post_request(self.openbis.as_v3, request)
+        return self.openbis._types_for_response(resp, type, additional_attributes)
+
+    async def get_sample_types(self, type=None):
+        return await self._get_types_of("searchSampleTypes", "Sample", type, ["generatedCodePrefix"])
+
+    async def get_sample_type(self, type):
+        return await self._get_types_of("searchSampleTypes", "Sample", type, ["generatedCodePrefix"])
+
+    async def get_experiment_types(self, type=None):
+        return await self._get_types_of("searchExperimentTypes", "Experiment", type)
+
+    async def get_material_types(self, type=None):
+        return await self._get_types_of("searchMaterialTypes", "Material", type)
+
+    async def get_dataset_types(self, type=None):
+        return await self._get_types_of("searchDataSetTypes", "DataSet", type)
+
+
+class BatchFuture(Future):
+    """ The result of a call made inside Openbis.batch(). Asking for the result before the
+    batch was sent sends the batch.
+    """
+
+    def __init__(self, batch):
+        super(BatchFuture, self).__init__()
+        self.batch = batch
+
+    def result(self, timeout=None):
+        if not self.done():
+            self.batch.send()
+        return super(BatchFuture, self).result(timeout)
+
+    def exception(self, timeout=None):
+        if not self.done():
+            self.batch.send()
+        return super(BatchFuture, self).exception(timeout)
+
+
+class Batch():
+    """ Collects JSON-RPC requests and sends them as one batch per resource (AS v3, v1...).
+    Every request gets a unique id, which is used to hand the result (or the error)
+    back to the right future.
+    """
+
+    def __init__(self, openbis_obj):
+        self.openbis = openbis_obj
+        self.ids = itertools.count(1)
+        self.calls = []
+
+    def __len__(self):
+        return len(self.calls)
+
+    def add(self, resource, request, handler):
+        future = BatchFuture(self)
+        if isinstance(request, RenderedRequest):
+            request = request.to_dict()
+        else:
+            request = dict(request)
+        request["id"] = str(next(self.ids))
+        self.calls.append((resource, request, handler, future))
+        return future
+
+    def cancel(self):
+        calls, self.calls = self.calls, []
+        for resource, request, handler, future in calls:
+            future.cancel()
+
+    def send(self):
+        """ sends all queued requests and resolves their futures.
+        """
+        calls, self.calls = self.calls, []
+        if len(calls) == 0:
+            return
+
+        resources = []
+        for call in calls:
+            if call[0] not in resources:
+                resources.append(call[0])
+
+        responses = {}
+        errors = {}
+        for resource in resources:
+            requests_list = [call[1] for call in calls if call[0] == resource]
+            try:
+                responses.update(self.openbis._post_batch(resource, requests_list))
+            except Exception as exc:
+                for request in requests_list:
+                    errors[request["id"]] = exc
+
+        # the handlers run outside of the batch, so calls they make are sent immediately
+        local = self.openbis._local
+        active_batch = getattr(local, 'batch', None)
+        local.batch = None
+        local.sample_types = {}
+        try:
+            for resource, request, handler, future in calls:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    if request["id"] in errors:
+                        raise errors[request["id"]]
+                    if request["id"] not in responses:
+                        raise ValueError('no response for request ' + request["id"])
+                    future.set_result(handler(_result_of(responses[request["id"]])))
+                except Exception as exc:
+                    future.set_exception(exc)
+        finally:
+            local.batch = active_batch
+            local.sample_types = None
+
+
 class DataSetUploadQueue:
    
-    def __init__(self, workers=20):
+    def __init__(self, workers=20, session=None, timeout=None, deadline=None):
         # maximum files to be uploaded at once
         self.upload_queue = Queue()
 
+        # all workers share the connection pool of the session
+        if session is None:
+            session = requests.Session()
+        self.session = session
+
+        # uploads not finished by the deadline are cancelled
+        self.timeout = timeout
+        self.deadline = deadline
+        self.errors = []
+
         # define number of threads and start them
         for t in range(workers):
             t = Thread(target=self.upload_file)
@@ -1830,9 +4761,12 @@ class DataSetUploadQueue:
 
 
     def join(self):
-        """ needs to be called if you want to wait for all uploads to be finished
+        """ needs to be called if you want to wait for all uploads to be finished.
+        Raises the first error that occured during the uploads.
         """
-        self.upload_queue.join()
+        _join_queue(self.upload_queue, self.deadline, 'upload')
+        if self.errors:
+            raise self.errors[0]
 
 
     def upload_file(self):
@@ -1840,25 +4774,41 @@ class DataSetUploadQueue:
             # get the next item in the queue
             upload_url, filename, verify_certificates = self.upload_queue.get()
 
-            filesize = os.path.getsize(filename)
-
-            # upload the file to our DSS session workspace
-            with open(filename, 'rb') as f:
-                resp = requests.post(upload_url, data=f, verify=verify_certificates)
-                resp.raise_for_status()
-                data = resp.json()
-                assert filesize == int(data['size'])
+            try:
+                filesize = os.path.getsize(filename)
+                timeout = _timeout_until(self.timeout, self.deadline, 'upload')
 
-            # Tell the queue that we are done
-            self.upload_queue.task_done()
+                # upload the file to our DSS session workspace
+                with open(filename, 'rb') as f:
+                    resp = self.session.post(
+                        upload_url, data=f, verify=verify_certificates, timeout=timeout
+                    )
+                    resp.raise_for_status()
+                    data = _json_loads(resp.content)
+                    assert filesize == int(data['size'])
+            except Exception as exc:
+                self.errors.append(exc)
+            finally:
+                # Tell the queue that we are done
+                self.upload_queue.task_done()
 
 
 class DataSetDownloadQueue:
     
-    def __init__(self, workers=20):
+    def __init__(self, workers=20, session=None, timeout=None, deadline=None):
         # maximum files to be downloaded at once
         self.download_queue = Queue()
 
+        # all workers share the connection pool of the session
+        if session is None:
+            session = requests.Session()
+        self.session = session
+
+        # downloads not finished by the deadline are cancelled
+        self.timeout = timeout
+        self.deadline = deadline
+        self.errors = []
+
         # define number of threads
         for t in range(workers):
             t = Thread(target=self.download_file)
@@ -1873,26 +4823,36 @@ class DataSetDownloadQueue:
 
 
     def join(self):
-        """ needs to be called if you want to wait for all downloads to be finished
+        """ needs to be called if you want to wait for all downloads to be finished.
+        Raises the first error that occured during the downloads.
         """
-        self.download_queue.join()
+        _join_queue(self.download_queue, self.deadline, 'download')
+        if self.errors:
+            raise self.errors[0]
 
 
     def download_file(self):
         while True:
             url, filename, file_size, verify_certificates = self.download_queue.get()
-            # create the necessary directory structure if they don't exist yet
-            os.makedirs(os.path.dirname(filename), exist_ok=True)
-
-            # request the file in streaming mode
-            r = requests.get(url, stream=True, verify=verify_certificates)
-            with open(filename, 'wb') as f:
-                for chunk in r.iter_content(chunk_size=1024): 
-                    if chunk: # filter out keep-alive new chunks
-                        f.write(chunk)
-
-            assert os.path.getsize(filename) == int(file_size)
-            self.download_queue.task_done()
+            try:
+                # create the necessary directory structure if they don't exist yet
+                os.makedirs(os.path.dirname(filename), exist_ok=True)
+                timeout = _timeout_until(self.timeout, self.deadline, 'download')
+
+                # request the file in streaming mode
+                r = self.session.get(url, stream=True, verify=verify_certificates, timeout=timeout)
+                with open(filename, 'wb') as f:
+                    for chunk in r.iter_content(chunk_size=1024): 
+                        if chunk: # filter out keep-alive new chunks
+                            f.write(chunk)
+                        if self.deadline is not None:
+                            self.deadline.check('download')
+
+                assert os.path.getsize(filename) == int(file_size)
+            except Exception as exc:
+                self.errors.append(exc)
+            finally:
+                self.download_queue.task_done()
 
 
 class DataSet():
@@ -1904,7 +4864,7 @@ class DataSet():
         self.permid = data["code"]
         self.permId = data["code"]
         self.openbis = openbis_obj
-        if data['physicalData'] is None:
+        if data.get('physicalData') is None:
             self.shareId = None
             self.location = None
         else:
@@ -1927,14 +4887,16 @@ class DataSet():
   </tbody>
 </table>
         """
-        return html.format(self.permid, self.data['properties'], self.data['tags'])
+        return html.format(self.permid, self.data.get('properties'), self.data.get('tags'))
 
+    @_within_deadline
     def download(self, files=None, wait_until_finished=True, workers=10):
         """ download the actual files and put them by default in the following folder:
         __current_dir__/hostname/dataset_permid/
         If no files are specified, all files of a given dataset are downloaded.
         Files are usually downloaded in parallel, using 10 workers by default. If you want to wait until
         all the files are downloaded, set the wait_until_finished option to True.
+        If a deadline (in seconds) is given, downloads which are not finished by then are cancelled.
         """
 
         if files == None:
@@ -1944,7 +4906,10 @@ class DataSet():
 
         base_url = self.data['dataStore']['downloadUrl'] + '/datastore_server/' + self.permid + '/'
 
-        queue = DataSetDownloadQueue(workers=workers)
+        queue = DataSetDownloadQueue(
+            workers=workers, session=self.openbis.session,
+            timeout=self.openbis.timeouts.get('download'), deadline=self.openbis._current_deadline()
+        )
 
         # get file list and start download
         for filename in files:
@@ -2012,22 +4977,13 @@ class DataSet():
            "id":"1"
         }
 
-        resp = requests.post(
+        content = self.openbis._send(
             self.data["dataStore"]["downloadUrl"] + '/datastore_server/rmi-dss-api-v1.json',
-            json.dumps(request), 
-            verify=self.openbis.verify_certificates
+            _json_dumps(request), 
+            "listFilesForDataSet",
+            read_only=True
         )
-
-        if resp.ok:
-            data = resp.json()
-            if 'error' in data:
-                raise ValueError('Error from openBIS: ' + data['error'] )
-            elif 'result' in data:
-                return data['result']
-            else:
-                raise ValueError('request to openBIS did not return either result nor error')
-        else:
-            raise ValueError('internal error while performing post request')
+        return _result_of(_json_loads(content), "listFilesForDataSet")
 
 
 class Vocabulary():
@@ -2197,12 +5153,20 @@ class AttrHolder():
                 d = d['identifier']
             self.__dict__['_'+key] = d
 
+        # related objects which were not fetched (see get_sample(fetch=...)) stay None:
+        # they are unknown, not empty, and are left out of updates
         for key in "parents children".split():
+            if data.get(key) is None:
+                self.__dict__['_'+key] = None
+                continue
             self.__dict__['_'+key] = []
             for item in data[key]:
                 self.__dict__['_'+key].append(item['identifier'])
 
         for key in "tags".split():
+            if data.get(key) is None:
+                self.__dict__['_'+key] = None
+                continue
             self.__dict__['_'+key] = []
             for item in data[key]:
                 self.__dict__['_'+key].append({
@@ -2240,7 +5204,8 @@ class AttrHolder():
                     if attr in defs['multi']:
                         items = self.__dict__.get('_'+attr, [])
                         if items == None:
-                            items = []
+                            # not fetched, setting it would remove all items
+                            continue
                         request[ids] = {
                             "actions": [
                                 {
@@ -2536,17 +5501,80 @@ class Space(dict):
         return self.openbis.get_experiments(space=self.code)
 
 
+# the column (and the attribute to search it with) by which refresh() fetches entities
+# which joined a query
+_refresh_ids = {
+    'samples': ('permId', 'permId'), 'experiments': ('code', 'code'), 'datasets': ('code', 'code'),
+}
+
 
 class Things():
     """An object that contains a DataFrame object about an entity  available in openBIS.
        
     """
 
-    def __init__(self, openbis_obj, what, df, identifier_name='code'):
+    def __init__(self, openbis_obj, what, df, identifier_name='code', query=None):
         self.openbis = openbis_obj
         self.what = what
         self.df = df
         self.identifier_name = identifier_name
+        # ('samples', arguments of get_samples()) etc., for refresh()
+        self.query = query
+
+    def refresh(self, overlap=1):
+        """ Brings the DataFrame up to date in place, without fetching it again: the
+        entities modified since the newest modificationDate (minus overlap seconds, for
+        changes committed late) are fetched and replace their rows. Then the identifiers
+        of all entities of the query are listed (without any related objects): rows which
+        are no longer among them (deleted, moved elsewhere, ...) are dropped, and entities
+        which joined the query without being modified are fetched and added. Returns self.
+        """
+        if self.query is None:
+            raise ValueError("only the results of get_samples(), get_experiments() and get_datasets() can be refreshed")
+        entities, kwargs = self.query
+        key = self.identifier_name
+        for column in [key, 'modificationDate']:
+            if column not in self.df:
+                raise ValueError("cannot refresh without the {} column".format(column))
+        iterate = getattr(self.openbis, 'iter_' + entities)
+        df = self.df
+
+        modified = df['modificationDate'].max()
+        if not pd.isna(modified):
+            since = modified.to_pydatetime().astimezone() - timedelta(seconds=overlap)
+            where = attr('modificationDate') >= since
+            if kwargs.get('where') is not None:
+                where = kwargs['where'] & where
+            pages = list(iterate(result_format='pandas', **dict(kwargs, where=where)))
+            if pages:
+                changed = concat_results(pages)
+                df = concat_results([df[~df[key].isin(changed[key])], changed])
+
+            criteria = {name: value for name, value in kwargs.items() if name not in ('with_properties', 'fields')}
+            column, attribute = _refresh_ids[entities]
+            # the objects of the scan are small, so fewer and larger pages are cheaper
+            current = {}
+            for page in iterate(page_size=10000, result_format='records', fields=sorted({key, column}), **criteria):
+                current.update((row[key], row[column]) for row in page)
+            df = df[df[key].isin(current)]
+
+            missing = set(current) - set(df[key])
+            if missing:
+                where = attr(attribute).isin(sorted(set(current[name] for name in missing)))
+                if kwargs.get('where') is not None:
+                    where = kwargs['where'] & where
+                pages = list(iterate(result_format='pandas', **dict(kwargs, where=where)))
+                if pages:
+                    joined = concat_results(pages)
+                    # experiment codes are only unique within their project
+                    df = concat_results([df, joined[joined[key].isin(missing)]])
+
+        if pd.isna(modified):
+            pages = list(iterate(result_format='pandas', **kwargs))
+            df = concat_results(pages) if pages else df.iloc[:0]
+
+        self.df = df.reset_index(drop=True)
+        return self
 
     def _repr_html_(self):
         return self.df._repr_html_()
@@ -2577,10 +5605,10 @@ class Experiment():
         self.openbis = openbis_obj
         self.permId = data['permId']['permId']
         self.identifier  = data['identifier']['identifier']
-        self.properties = data['properties']
-        self.tags = extract_tags(data['tags'])
-        self.attachments = extract_attachments(data['attachments'])
-        self.project = data['project']['code']
+        self.properties = data.get('properties')
+        self.tags = extract_tags(data.get('tags') or [])
+        self.attachments = extract_attachments(data.get('attachments') or [])
+        self.project = data['project']['code'] if data.get('project') else None
         self.data = data
 
     def set_properties(self, properties):
@@ -17,6 +17,11 @@ setup(name='pybis',
           'pandas',
           'click'
       ],
+      extras_require={
+          'async': ['aiohttp'],
+          'fast': ['orjson'],
+          'arrow': ['pyarrow'],
+      },
       entry_points='''
         [console_scripts]
         pybis=pybis.scripts.cli:main
@@ -0,0 +1,72 @@
+"""
+bench_categories.py
+
+A get_samples() result of 10^6 rows, built in pages of 10^5 samples the way
+stream_samples() builds it: "strings" stores the low-cardinality columns (experiment,
+sample_type, registrator, modifier) as strings, "categorical" encodes them with
+categories shared between the pages. Compares the memory of the columns and the time
+of a groupby and of a filter on them.
+
+    python bench_categories.py [number_of_samples]
+
+"""
+
+import sys
+import time
+
+from pybis import pybis, concat_results
+from pybis.pybis import parse_jackson, _build_result, _sample_columns, _shared_categories
+from synthetic import search_samples_result
+
+
+page_size = 100000
+low_cardinality = ['experiment', 'sample_type', 'registrator', 'modifier']
+
+
+def build(n_samples):
+    """ returns the result and the time it took to build it (without generating the objects)
+    """
+    dictionaries = _shared_categories()
+    pages = []
+    elapsed = 0
+    for i in range(0, n_samples, page_size):
+        objects = search_samples_result(min(page_size, n_samples - i), n_experiments=200, seed=i)['objects']
+        parse_jackson(objects)
+        start = time.perf_counter()
+        pages.append(_build_result(objects, _sample_columns, dictionaries=dictionaries))
+        elapsed += time.perf_counter() - start
+        del objects
+    start = time.perf_counter()
+    df = concat_results(pages)
+    return df, elapsed + time.perf_counter() - start
+
+
+def timed(func, repeat=5):
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(n_samples=10**6):
+    print("{:>12} {:>12} {:>12} {:>12} {:>12}".format(
+        'columns', 'build (s)', 'memory (MB)', 'groupby (s)', 'filter (s)'))
+    categorical_columns = pybis.categorical_columns
+    for name, columns in [('strings', frozenset()), ('categorical', categorical_columns)]:
+        pybis.categorical_columns = columns
+        df, elapsed = build(n_samples)
+        pybis.categorical_columns = categorical_columns
+
+        memory = df[low_cardinality].memory_usage(deep=True, index=False).sum()
+        groupby = timed(lambda: df.groupby(['sample_type', 'registrator'], observed=True).size())
+        filter = timed(lambda: df[(df['sample_type'] == 'TYPE_1') & (df['modifier'] != 'User3 Tester <user3@ethz.ch>')])
+        print("{:>12} {:>12.2f} {:>12.1f} {:>12.4f} {:>12.4f}".format(
+            name, elapsed, memory / 1e6, groupby, filter))
+        del df
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,41 @@
+"""
+bench_connection_pool.py
+
+Requests per second for small metadata calls, with and without pooled keep-alive
+connections. "before" closes the connection after every request, which is what
+bare requests.post() did.
+
+    python bench_connection_pool.py [number_of_calls]
+
+"""
+
+import sys
+import time
+
+from pybis import Openbis
+from standin import StandinServer
+
+
+def run(openbis, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        openbis.is_token_valid()
+    return calls / (time.perf_counter() - start)
+
+
+def main(calls=2000):
+    with StandinServer() as server:
+        before = Openbis(server.url, token='dummy-token', keep_alive=False)
+        after = Openbis(server.url, token='dummy-token')
+        # warm up
+        run(before, 10)
+        run(after, 10)
+
+        print("before (new connection per call): {:8.0f} requests/s".format(run(before, calls)))
+        print("after  (pooled keep-alive):       {:8.0f} requests/s".format(run(after, calls)))
+        before.close()
+        after.close()
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
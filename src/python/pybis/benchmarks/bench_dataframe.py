@@ -0,0 +1,58 @@
+"""
+bench_dataframe.py
+
+Building the get_samples() DataFrame from dereferenced searchSamples results:
+"before" builds a DataFrame of the whole objects and maps every column row by row,
+formatting the timestamps as strings; "after" extracts the columns in one pass
+and converts the timestamps to datetime64 all at once.
+
+    python bench_dataframe.py
+
+"""
+
+import time
+
+from pandas import DataFrame
+
+from pybis.pybis import _samples_df, parse_jackson, format_timestamp
+from pybis.pybis import extract_person, extract_identifier, extract_permid
+from pybis.pybis import extract_nested_identifier, extract_nested_permid
+from synthetic import search_samples_result
+
+
+def samples_df_before(objects):
+    samples = DataFrame(objects)
+    samples['registrationDate']= samples['registrationDate'].map(format_timestamp)
+    samples['modificationDate']= samples['modificationDate'].map(format_timestamp)
+    samples['registrator'] = samples['registrator'].map(extract_person)
+    samples['modifier'] = samples['modifier'].map(extract_person)
+    samples['identifier'] = samples['identifier'].map(extract_identifier)
+    samples['permId'] = samples['permId'].map(extract_permid)
+    samples['experiment'] = samples['experiment'].map(extract_nested_identifier)
+    samples['sample_type'] = samples['type'].map(extract_nested_permid)
+
+    return samples[['identifier', 'permId', 'experiment', 'sample_type', 'registrator', 'registrationDate', 'modifier', 'modificationDate']]
+
+
+def best_of(func, objects, repeat=3):
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(objects)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    print("{:>8} {:>12} {:>12}".format('samples', 'before (s)', 'after (s)'))
+    for n_samples in [1000, 10000, 100000]:
+        objects = search_samples_result(n_samples)['objects']
+        parse_jackson(objects)
+        print("{:>8} {:>12.3f} {:>12.3f}".format(
+            n_samples, best_of(samples_df_before, objects), best_of(_samples_df, objects)
+        ))
+
+
+if __name__ == '__main__':
+    main()
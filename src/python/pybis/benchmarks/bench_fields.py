@@ -0,0 +1,54 @@
+"""
+bench_fields.py
+
+get_samples() of 20000 samples against the local stand-in server, which serializes only
+the related objects the fetch options ask for (like openBIS), with all columns and with
+fields= projections. Compares the response size (from the instrumentation) and the time
+of the whole call.
+
+    python bench_fields.py [number_of_samples]
+
+"""
+
+import sys
+import time
+
+from pybis import Openbis
+from standin import StandinServer
+from synthetic import paged_search_samples
+
+
+projections = [
+    ('all columns', None),
+    ('identifier, registrator', ['identifier', 'registrator']),
+    ('identifier, sample_type', ['identifier', 'sample_type']),
+    ('identifier, dates', ['identifier', 'registrationDate', 'modificationDate']),
+]
+
+
+def best_of(func, repeat=3):
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(n_samples=20000):
+    with StandinServer(latency=0.05) as server:
+        server.handlers['searchSamples'] = paged_search_samples(n_samples)
+        o = Openbis(server.url, token='dummy-token', instrument=True)
+
+        print("{:>28} {:>14} {:>10}".format('fields', 'response (MB)', 'time (s)'))
+        for name, fields in projections:
+            before = o.instrumentation.stats().get('searchSamples', {}).get('response_bytes', 0)
+            o.get_samples(fields=fields)
+            response_bytes = o.instrumentation.stats()['searchSamples']['response_bytes'] - before
+            elapsed = best_of(lambda: o.get_samples(fields=fields))
+            print("{:>28} {:>14.1f} {:>10.3f}".format(name, response_bytes / 1e6, elapsed))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,60 @@
+"""
+bench_interning.py
+
+Memory (tracemalloc) retained by a decoded searchSamples response, with and without
+interning of repeated strings and identical small objects, and by the get_samples()
+DataFrame built from it, with and without sharing the strings of extract_person.
+
+    python bench_interning.py [number_of_samples]
+
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+
+from pybis import pybis
+from pybis.pybis import _json_loads, _json_loads_interned, parse_jackson, _samples_df
+from synthetic import search_samples_response
+
+
+def retained(func):
+    """ returns the result of func, the time it took and the memory it still holds (MB).
+    The time is measured without tracemalloc, which slows allocations down.
+    """
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    gc.collect()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, elapsed, current / 1e6
+
+
+def main(n_samples=100000):
+    body = search_samples_response(n_samples)
+    print("response: {} samples, {:.1f} MB".format(n_samples, len(body) / 1e6))
+
+    decoders = [(name, codec.loads) for name, codec in sorted(pybis.json_codecs.items())]
+    for name, loads in decoders + [('interned', _json_loads_interned)]:
+        data, elapsed, memory = retained(lambda: loads(body))
+        print("decode    {:12} {:>8.2f} s {:>10.1f} MB".format(name, elapsed, memory))
+        del data
+
+    memoize = pybis._memoize_by_identity
+    for name, wrapper in [('per row', lambda func: func), ('memoized', memoize)]:
+        objects = _json_loads(body)['result']['objects']
+        parse_jackson(objects)
+        pybis._memoize_by_identity = wrapper
+        df, elapsed, memory = retained(lambda: _samples_df(objects))
+        pybis._memoize_by_identity = memoize
+        print("dataframe {:12} {:>8.2f} s {:>10.1f} MB".format(name, elapsed, memory))
+        del df, objects
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
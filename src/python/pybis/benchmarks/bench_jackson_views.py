@@ -0,0 +1,60 @@
+"""
+bench_jackson_views.py
+
+Resolving references up front (parse_jackson) against lazy JacksonViews, for
+building the get_samples() DataFrame and for reading a single field of every sample.
+
+    python bench_jackson_views.py
+
+"""
+
+import json
+import time
+
+from pybis.pybis import parse_jackson, jackson_views, _samples_df
+from synthetic import search_samples_result
+
+
+def eager_df(objects):
+    parse_jackson(objects)
+    return _samples_df(objects)
+
+
+def lazy_df(objects):
+    return _samples_df(jackson_views(objects))
+
+
+def eager_codes(objects):
+    parse_jackson(objects)
+    return [obj['code'] for obj in objects]
+
+
+def lazy_codes(objects):
+    return [view['code'] for view in jackson_views(objects)]
+
+
+def timed(func, body, repeat=3):
+    best = None
+    for i in range(repeat):
+        objects = json.loads(body)
+        start = time.perf_counter()
+        func(objects)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    print("{:>8} {:>12} {:>12} {:>12} {:>12}".format(
+        'samples', 'eager df', 'lazy df', 'eager code', 'lazy code'))
+    for n_samples in [1000, 10000, 50000]:
+        body = json.dumps(search_samples_result(n_samples)['objects'])
+        print("{:>8} {:>12.3f} {:>12.3f} {:>12.3f} {:>12.3f}".format(
+            n_samples,
+            timed(eager_df, body), timed(lazy_df, body),
+            timed(eager_codes, body), timed(lazy_codes, body),
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+bench_json_codec.py
+
+Encoding of a searchSamples request and decoding of searchSamples responses of
+increasing size, for every JSON codec installed (orjson, ujson, json).
+
+    python bench_json_codec.py
+
+"""
+
+import json
+import timeit
+
+from pybis import Openbis
+from pybis import pybis
+from synthetic import search_samples_response
+
+
+def best_of(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def main():
+    o = Openbis('https://localhost:8443', token='admin-161216000000000x0000000000000000')
+    request = o._samples_request(space='SPACE_0', type='TYPE_1', NAME='SOME_NAME').to_dict()
+
+    print("{:8} {:>14} {:>10} {:>14} {:>14}".format(
+        'codec', 'encode request', 'samples', 'decode (ms)', 'MB/s'))
+    for n_samples in [1000, 10000, 100000]:
+        body = search_samples_response(n_samples)
+        size = len(body) / 1e6
+        number = max(1, 10000 // n_samples)
+
+        # what resp.json() used to do: decode bytes to str, then parse the str
+        before = best_of(lambda: json.loads(body.decode('utf-8')), number)
+        print("{:8} {:>14} {:>10} {:>14.2f} {:>14.1f}".format(
+            'resp.json', '', n_samples, before * 1000, size / before))
+
+        for name, codec in sorted(pybis.json_codecs.items()):
+            encode = best_of(lambda: codec.dumps(request), 1000)
+            decode = best_of(lambda: codec.loads(body), number)
+            print("{:8} {:>11.1f} us {:>10} {:>14.2f} {:>14.1f}".format(
+                name, encode * 1e6, n_samples, decode * 1000, size / decode))
+
+
+if __name__ == '__main__':
+    main()
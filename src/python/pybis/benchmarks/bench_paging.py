@@ -0,0 +1,60 @@
+"""
+bench_paging.py
+
+Iterating over 5000 samples with iter_samples() against the local stand-in server,
+which answers every request after a fixed latency, while the consumer spends some time on
+every page. With read_ahead=0 the pages are fetched one after the other; with read-ahead
+the next pages are fetched while the current one is processed. get_samples() fetches
+everything in one request. The peak memory (tracemalloc) is measured in a separate run.
+
+    python bench_paging.py
+
+"""
+
+import time
+import tracemalloc
+
+from pybis import Openbis
+from standin import StandinServer
+from synthetic import paged_search_samples
+
+
+n_samples = 5000
+page_size = 500
+
+
+def consume(pages, work=0.2):
+    rows = 0
+    for page in pages:
+        time.sleep(work)
+        rows += len(page)
+    return rows
+
+
+def measured(func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def main():
+    with StandinServer(latency=0.2) as server:
+        server.handlers['searchSamples'] = paged_search_samples(n_samples)
+        o = Openbis(server.url, token='dummy-token')
+
+        print("{:>24} {:>10} {:>10}".format('', 'time (s)', 'peak (MB)'))
+        elapsed, peak = measured(lambda: consume([o.get_samples().df]))
+        print("{:>24} {:>10.2f} {:>10.1f}".format('get_samples', elapsed, peak))
+        for read_ahead in [0, 1, 2]:
+            elapsed, peak = measured(lambda: consume(o.iter_samples(page_size, read_ahead)))
+            print("{:>24} {:>10.2f} {:>10.1f}".format(
+                'iter_samples read_ahead={}'.format(read_ahead), elapsed, peak))
+
+
+if __name__ == '__main__':
+    main()
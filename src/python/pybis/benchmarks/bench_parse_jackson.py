@@ -0,0 +1,56 @@
+"""
+bench_parse_jackson.py
+
+Dereferencing of searchSamples results with 10^5 to 10^6 nodes: the former
+recursive parse_jackson (two passes plus a pass over all found objects) against
+the current single-pass one. Both results are checked to be identical.
+
+    python bench_parse_jackson.py
+
+"""
+
+import json
+import time
+
+from pybis.pybis import parse_jackson
+from synthetic import search_samples_result
+from reference import parse_jackson_recursive
+
+
+def count_nodes(graph):
+    count = 0
+    stack = [graph]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if isinstance(node, dict):
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return count
+
+
+def timed(func, body, repeat=3):
+    best = None
+    for i in range(repeat):
+        objects = json.loads(body)
+        start = time.perf_counter()
+        func(objects)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, objects
+
+
+def main():
+    print("{:>10} {:>10} {:>14} {:>14}".format('samples', 'nodes', 'recursive (s)', 'iterative (s)'))
+    for n_samples in [3600, 12000, 36000]:
+        body = json.dumps(search_samples_result(n_samples)['objects'])
+        nodes = count_nodes(json.loads(body))
+        before, expected = timed(parse_jackson_recursive, body)
+        after, result = timed(parse_jackson, body)
+        assert result == expected
+        print("{:>10} {:>10} {:>14.3f} {:>14.3f}".format(n_samples, nodes, before, after))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+bench_property_columns.py
+
+Ten filters on numeric properties of the get_samples() result: "before" keeps the
+properties as a column of dicts and unpacks and converts them row by row for every
+filter; "after" builds the typed property columns of get_samples(with_properties=True)
+once and filters them vectorized.
+
+    python bench_property_columns.py
+
+"""
+
+import time
+
+from pybis.pybis import parse_jackson, _samples_df, _build_result, _sample_columns
+from synthetic import search_samples_result
+
+
+data_types = {
+    'PROP_0': 'INTEGER', 'PROP_1': 'INTEGER', 'PROP_2': 'REAL',
+    'PROP_3': 'REAL', 'PROP_4': 'CONTROLLEDVOCABULARY',
+}
+
+
+thresholds = range(0, 1000, 100)
+
+
+def filter_before(objects):
+    df = _samples_df(objects)
+    df['properties'] = [obj['properties'] for obj in objects]
+    results = []
+    for threshold in thresholds:
+        keep = [int(props['PROP_0']) > threshold and float(props['PROP_2']) < 500
+                for props in df['properties']]
+        results.append(df[keep])
+    return results
+
+
+def filter_after(objects):
+    df = _build_result(objects, _sample_columns, data_types=data_types)
+    return [df[(df['PROP_0'] > threshold) & (df['PROP_2'] < 500)] for threshold in thresholds]
+
+
+def best_of(func, objects, repeat=3):
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(objects)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    print("{:>8} {:>12} {:>12}".format('samples', 'before (s)', 'after (s)'))
+    for n_samples in [1000, 10000, 100000]:
+        objects = search_samples_result(n_samples)['objects']
+        parse_jackson(objects)
+        assert [len(df) for df in filter_before(objects)] == [len(df) for df in filter_after(objects)]
+        print("{:>8} {:>12.3f} {:>12.3f}".format(
+            n_samples, best_of(filter_before, objects), best_of(filter_after, objects)
+        ))
+
+
+if __name__ == '__main__':
+    main()
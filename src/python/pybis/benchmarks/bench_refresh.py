@@ -0,0 +1,76 @@
+"""
+bench_refresh.py
+
+A dashboard which keeps 20000 samples up to date, while 50 of them are modified between
+the updates. Running get_samples() again transfers all samples every time; Things.refresh()
+transfers the modified samples with their related objects, plus all samples without them
+(for their identifiers). The stand-in server evaluates the modificationDate criteria of the
+delta query, pages the results and leaves out the related objects which are not fetched.
+
+    python bench_refresh.py [number_of_samples]
+
+"""
+
+import sys
+import time
+from datetime import datetime, timezone
+
+from pybis import Openbis
+from pybis.pybis import parse_jackson
+from standin import StandinServer
+from synthetic import search_samples_result
+
+
+def modified_since(criteria):
+    if criteria['@type'] == "as.dto.common.search.ModificationDateSearchCriteria":
+        since = datetime.strptime(criteria['fieldValue']['value'], '%Y-%m-%d %H:%M:%S')
+        return since.replace(tzinfo=timezone.utc).timestamp() * 1000
+    for criterion in criteria.get('criteria', []):
+        since = modified_since(criterion)
+        if since is not None:
+            return since
+    return None
+
+
+def main(n_samples=20000, n_modified=50):
+    objects = search_samples_result(n_samples)['objects']
+    parse_jackson(objects)
+    newest = [max(obj['modificationDate'] for obj in objects)]
+
+    def search_samples(params):
+        criteria, options = params[1], params[2]
+        since = modified_since(criteria)
+        found = objects if since is None else [obj for obj in objects if obj['modificationDate'] >= since]
+        start = options.get('from') or 0
+        count = options.get('count')
+        page = found[start:] if count is None else found[start:start + count]
+        if not set(options) - {'@type', 'from', 'count', 'sort'}:
+            page = [{key: value for key, value in obj.items()
+                     if key in ('permId', 'identifier') or not isinstance(value, (dict, list))}
+                    for obj in page]
+        return {"objects": page, "totalCount": len(found)}
+
+    def modify():
+        newest[0] += 60 * 1000
+        for obj in objects[:n_modified]:
+            obj['modificationDate'] = newest[0]
+
+    with StandinServer(latency=0.05) as server:
+        server.handlers['searchSamples'] = search_samples
+        o = Openbis(server.url, token='dummy-token', instrument=True)
+        samples = o.get_samples()
+
+        print("{:>14} {:>14} {:>10}".format('', 'response (MB)', 'time (s)'))
+        for name, update in [('get_samples', lambda: o.get_samples()), ('refresh', samples.refresh)]:
+            modify()
+            before = o.instrumentation.stats()['searchSamples']['response_bytes']
+            start = time.perf_counter()
+            update()
+            elapsed = time.perf_counter() - start
+            response_bytes = o.instrumentation.stats()['searchSamples']['response_bytes'] - before
+            print("{:>14} {:>14.2f} {:>10.3f}".format(name, response_bytes / 1e6, elapsed))
+        assert len(samples.df) == n_samples
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
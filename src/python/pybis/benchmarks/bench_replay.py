@@ -0,0 +1,71 @@
+"""
+bench_replay.py
+
+Client-side cost of get_samples() for responses of increasing size, replayed from a
+cassette: the exchanges are recorded once against the stand-in and then answered
+without any server, optionally with simulated latency and bandwidth. The time is
+split into network, decode, parse_jackson and DataFrame building.
+
+    python bench_replay.py [cassette.json] [latency_s] [bandwidth_MB_s]
+
+If the cassette does not exist yet, it is recorded. A cassette recorded against a
+real openBIS (with Openbis.record()) can be used as well, as long as it contains
+the same searchSamples requests.
+
+"""
+
+import json
+import os
+import re
+import sys
+import time
+
+from pybis import Openbis
+from standin import StandinServer
+from synthetic import search_samples_result
+
+SIZES = [1000, 10000, 50000]
+TOKEN = 'admin-161216000000000x0000000000000000'
+
+
+def record(path):
+    server = StandinServer(handlers={
+        # the number of samples is part of the searched code
+        'searchSamples': lambda params: search_samples_result(
+            int(re.search(r'SAMPLES_(\d+)', json.dumps(params)).group(1))
+        )
+    })
+    with server:
+        o = Openbis(server.url, token=TOKEN)
+        with o.record(path):
+            for n in SIZES:
+                o.get_samples(code='SAMPLES_{}'.format(n))
+
+
+def main(path='samples-cassette.json', latency=0.0, bandwidth=None):
+    if not os.path.exists(path):
+        record(path)
+
+    o = Openbis('https://localhost:8443', token=TOKEN, instrument=True)
+    print("{:>8} {:>10} {:>10} {:>10} {:>10} {:>10} {:>10}".format(
+        'samples', 'MB', 'total (s)', 'network', 'decode', 'jackson', 'dataframe'))
+    with o.replay(path, latency=latency, bandwidth=bandwidth and bandwidth * 1e6):
+        for n in SIZES:
+            o.reset_stats()
+            start = time.perf_counter()
+            o.get_samples(code='SAMPLES_{}'.format(n))
+            total = time.perf_counter() - start
+            stats = o.stats()['searchSamples']
+            phases = stats['phases']
+            print("{:>8} {:>10.1f} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f}".format(
+                n, stats['response_bytes'] / 1e6, total, stats['latency'],
+                phases['decode'], phases['parse_jackson'], phases['dataframe']))
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(
+        args[0] if len(args) > 0 else 'samples-cassette.json',
+        float(args[1]) if len(args) > 1 else 0.0,
+        float(args[2]) if len(args) > 2 else None,
+    )
@@ -0,0 +1,89 @@
+"""
+bench_request_templates.py
+
+Per-call cost of building and serializing get_dataset() and get_samples() requests.
+"dict" builds the nested request dicts and serializes all of them on every call,
+which is what the request builders used to do; "template" fills the token, the
+identifiers and the criteria into a request whose fetch options were serialized once.
+
+    python bench_request_templates.py
+
+"""
+
+import timeit
+
+from pybis import Openbis
+from pybis import pybis
+from pybis.pybis import _json_dumps, fetch_option, search_samples_template
+from pybis.pybis import _gen_search_request, _subcriteria_for_code
+
+
+def dataset_request_dict(token, permid):
+    fetchopts = {
+        "parents":      { "@type": "as.dto.dataset.fetchoptions.DataSetFetchOptions" },
+        "children":     { "@type": "as.dto.dataset.fetchoptions.DataSetFetchOptions" },
+        "containers":   { "@type": "as.dto.dataset.fetchoptions.DataSetFetchOptions" },
+        "@type":        "as.dto.dataset.fetchoptions.DataSetFetchOptions",
+    }
+    for option in ['tags', 'properties', 'dataStore', 'physicalData', 'linkedData',
+                   'experiment', 'sample']:
+        fetchopts[option] = fetch_option[option]
+    return {
+        "method": "getDataSets",
+        "params": [token, [{"permId": permid, "@type": "as.dto.dataset.id.DataSetPermId"}], fetchopts],
+        "id": "1",
+        "jsonrpc": "2.0",
+    }
+
+
+def samples_criteria():
+    return {
+        "criteria": [
+            _gen_search_request({"space": "Space", "operator": "AND", "code": "SPACE_0"}),
+            _subcriteria_for_code("TYPE_1", 'sample_type'),
+        ],
+        "@type": "as.dto.sample.search.SampleSearchCriteria",
+        "operator": "AND"
+    }
+
+
+def samples_request_dict(token):
+    return {
+        "method": "searchSamples",
+        "params": [token, samples_criteria(), {
+            "properties": { "@type": "as.dto.property.fetchoptions.PropertyFetchOptions" },
+            "tags": { "@type": "as.dto.tag.fetchoptions.TagFetchOptions" },
+            "registrator": { "@type": "as.dto.person.fetchoptions.PersonFetchOptions" },
+            "modifier": { "@type": "as.dto.person.fetchoptions.PersonFetchOptions" },
+            "experiment": { "@type": "as.dto.experiment.fetchoptions.ExperimentFetchOptions" },
+            "type": { "@type": "as.dto.sample.fetchoptions.SampleTypeFetchOptions" },
+            "@type": "as.dto.sample.fetchoptions.SampleFetchOptions",
+        }],
+        "id": "1",
+        "jsonrpc": "2.0",
+    }
+
+
+def best_of(func, number=20000):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def main():
+    o = Openbis('https://localhost:8443', token='admin-161216000000000x0000000000000000')
+    permid = '20160101000000000-1234'
+    print("{:8} {:12} {:>14} {:>14}".format('codec', 'request', 'dict (us)', 'template (us)'))
+    for codec in sorted(pybis.json_codecs):
+        pybis.set_json_codec(codec)
+        before = best_of(lambda: _json_dumps(dataset_request_dict(o.token, permid)))
+        after = best_of(lambda: o._dataset_request(permid).body)
+        print("{:8} {:12} {:>14.2f} {:>14.2f}".format(codec, 'get_dataset', before * 1e6, after * 1e6))
+
+        # the criteria of get_samples() depend on the arguments and are still built per call
+        before = best_of(lambda: _json_dumps(samples_request_dict(o.token)))
+        after = best_of(
+            lambda: search_samples_template.render(token=o.token, criteria=samples_criteria()).body
+        )
+        print("{:8} {:12} {:>14.2f} {:>14.2f}".format(codec, 'get_samples', before * 1e6, after * 1e6))
+
+if __name__ == '__main__':
+    main()
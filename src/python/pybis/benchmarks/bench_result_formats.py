@@ -0,0 +1,50 @@
+"""
+bench_result_formats.py
+
+Building the get_samples() result from dereferenced searchSamples results in every
+result_format, and the memory the result holds: "pandas" via DataFrame.memory_usage(deep),
+"arrow" via Table.nbytes (the buffers are shared with Parquet writers and DuckDB as they are).
+
+    python bench_result_formats.py
+
+"""
+
+import sys
+import time
+
+from pybis.pybis import parse_jackson, _build_result, _sample_columns, pa
+from synthetic import search_samples_result
+
+
+def size_of(result):
+    if pa is not None and isinstance(result, pa.Table):
+        return result.nbytes
+    if isinstance(result, list):
+        return sum(sys.getsizeof(record) for record in result)
+    return result.memory_usage(deep=True).sum()
+
+
+def best_of(func, repeat=3):
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    formats = ['pandas', 'records'] + (['arrow'] if pa is not None else [])
+    print("{:>8} {:>8} {:>10} {:>10}".format('samples', 'format', 'time (s)', 'size (MB)'))
+    for n_samples in [10000, 100000]:
+        objects = search_samples_result(n_samples)['objects']
+        parse_jackson(objects)
+        for result_format in formats:
+            result, elapsed = best_of(lambda: _build_result(objects, _sample_columns, result_format))
+            print("{:>8} {:>8} {:>10.3f} {:>10.1f}".format(
+                n_samples, result_format, elapsed, size_of(result) / 1e6))
+
+
+if __name__ == '__main__':
+    main()
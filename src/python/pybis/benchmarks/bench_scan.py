@@ -0,0 +1,47 @@
+"""
+bench_scan.py
+
+Scanning 10000 samples in pages of 250 with scan_samples() and an increasing number of
+workers, against the local stand-in server. Every request takes 0.25 s on the server, which
+works on at most 8 requests at once: the throughput grows with the number of workers
+until the server is saturated.
+
+    python bench_scan.py
+
+"""
+
+import time
+
+from pybis import Openbis
+from standin import StandinServer
+from synthetic import paged_search_samples
+
+
+n_samples = 10000
+page_size = 250
+
+
+def scan(o, workers, ordered):
+    rows = 0
+    for page in o.scan_samples(workers=workers, page_size=page_size, ordered=ordered):
+        rows += len(page)
+    assert rows == n_samples
+
+
+def main():
+    with StandinServer(latency=0.25, capacity=8) as server:
+        server.handlers['searchSamples'] = paged_search_samples(n_samples)
+        o = Openbis(server.url, token='dummy-token')
+
+        print("{:>8} {:>8} {:>10} {:>14}".format('workers', 'ordered', 'time (s)', 'samples/s'))
+        for workers in [1, 2, 4, 8, 16]:
+            for ordered in [True, False]:
+                start = time.perf_counter()
+                scan(o, workers, ordered)
+                elapsed = time.perf_counter() - start
+                print("{:>8} {:>8} {:>10.2f} {:>14.0f}".format(
+                    workers, str(ordered), elapsed, n_samples / elapsed))
+
+
+if __name__ == '__main__':
+    main()
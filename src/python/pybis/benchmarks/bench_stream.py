@@ -0,0 +1,58 @@
+"""
+bench_stream.py
+
+Peak client memory (tracemalloc) for get_samples() vs. stream_samples() on a large
+searchSamples response. The stand-in server runs in its own process, so that only the
+client's allocations are measured.
+
+    python bench_stream.py [number_of_samples]
+
+"""
+
+import sys
+import time
+import tracemalloc
+from multiprocessing import Process, Queue
+
+from pybis import Openbis
+from standin import StandinServer
+from synthetic import search_samples_result
+
+
+def serve(n_samples, queue):
+    result = search_samples_result(n_samples)
+    server = StandinServer(handlers={'searchSamples': lambda params: result})
+    queue.put(server.url)
+    server.serve_forever()
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return rows, elapsed, peak / 1e6
+
+
+def main(n_samples=100000):
+    queue = Queue()
+    server = Process(target=serve, args=(n_samples, queue), daemon=True)
+    server.start()
+    o = Openbis(queue.get(), token='dummy-token')
+
+    def get_samples():
+        return len(o.get_samples(space='SPACE_0').df)
+
+    def stream_samples():
+        return sum(len(df) for df in o.stream_samples(chunksize=5000, space='SPACE_0'))
+
+    for name, func in [('get_samples', get_samples), ('stream_samples', stream_samples)]:
+        rows, elapsed, peak = measure(func)
+        print("{:15} {:>8} rows {:>8.2f} s   peak memory {:>8.1f} MB".format(name, rows, elapsed, peak))
+    server.terminate()
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,68 @@
+"""
+reference.py
+
+Former implementations of pybis functions, which the tests and benchmarks compare the
+current ones against.
+
+"""
+
+
+def parse_jackson_recursive(input_json):
+    """ parse_jackson as it was before it was made iterative, for comparison
+    """
+    interesting=['tags', 'registrator', 'modifier', 'type', 'parents',
+        'children', 'containers', 'properties', 'experiment', 'sample',
+        'project', 'space', 'propertyType'
+    ]
+    found = {}
+    def build_cache(graph):
+        if isinstance(graph, list):
+            for item in graph:
+                build_cache(item)
+        elif isinstance(graph, dict) and len(graph) > 0:
+            for key, value in graph.items():
+                if key in interesting:
+                    if isinstance(value, dict):
+                        if '@id' in value:
+                            found[value['@id']] = value
+                        build_cache(value)
+                    elif isinstance(value, list):
+                        for item in value:
+                            if isinstance(item, dict):
+                                if '@id' in item:
+                                    found[item['@id']] = item
+                                build_cache(item)
+                elif isinstance(value, dict):
+                    build_cache(value)
+                elif isinstance(value, list):
+                    build_cache(value)
+
+    def deref_graph(graph):
+        if isinstance(graph, list):
+            for i, list_item in enumerate(graph):
+                if isinstance(list_item, int):
+                    graph[i] = found[list_item]
+                else:
+                    deref_graph(list_item)
+        elif isinstance(graph, dict) and len(graph) > 0:
+            for key, value in graph.items():
+                if key in interesting:
+                    if isinstance(value, dict):
+                        deref_graph(value)
+                    elif isinstance(value, int):
+                        graph[key] = found[value]
+                    elif isinstance(value, list):
+                        for i, list_item in enumerate(value):
+                            if isinstance(list_item, int):
+                                if list_item in found:
+                                    value[i] = found[list_item]
+                                else:
+                                    value[i] = list_item
+                elif isinstance(value, dict):
+                    deref_graph(value)
+                elif isinstance(value, list):
+                    deref_graph(value)
+
+    build_cache(input_json)
+    deref_graph(found)
+    deref_graph(input_json)
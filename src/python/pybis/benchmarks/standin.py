@@ -0,0 +1,142 @@
+"""
+standin.py
+
+A minimal local stand-in for the openBIS AS and DSS, used by the benchmarks.
+It answers JSON-RPC POST requests with canned results and keeps connections
+alive (HTTP/1.1), so that client-side connection handling can be measured
+without a real openBIS installation.
+
+"""
+
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _default_handlers():
+    return {
+        "login":           lambda params: "admin-161216000000000x0000000000000000",
+        "logout":          lambda params: None,
+        "isSessionActive": lambda params: True,
+        "listDataStores":  lambda params: [{
+            "code": "DSS1",
+            "downloadUrl": "http://localhost",
+            "hostUrl": "http://localhost",
+        }],
+    }
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length).decode('utf-8'))
+        self.server.request_count += 1
+        if self.server.latency:
+            # a server with limited capacity works on at most that many requests at once
+            with self.server.capacity:
+                time.sleep(self.server.latency)
+
+        if self.server.failures:
+            # simulate a failure: an HTTP error status, or 0 for a dropped connection
+            status = self.server.failures.pop(0)
+            if status == 0:
+                self.close_connection = True
+                return
+            self.send_response(status)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        if isinstance(body, list):
+            response = [self.server.dispatch(item) for item in body]
+        else:
+            response = self.server.dispatch(body)
+
+        payload = json.dumps(response).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        if self.headers.get('Connection', '').lower() == 'close':
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class _Unlimited():
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+class StandinServer(ThreadingHTTPServer):
+    """ Runs in a background thread. Additional JSON-RPC methods can be registered
+    as functions which receive the params list and return the result.
+    Failures can be injected by appending HTTP status codes (or 0 for a dropped
+    connection) to the failures list: each is used for one request.
+    Every request takes latency seconds; if capacity is given, the server spends that
+    time on at most capacity requests at once, the others wait.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.0, handlers=None, capacity=None):
+        super(StandinServer, self).__init__(('127.0.0.1', port), StandinHandler)
+        self.latency = latency
+        self.capacity = threading.BoundedSemaphore(capacity) if capacity else _Unlimited()
+        self.request_count = 0
+        self.failures = []
+        self.handlers = _default_handlers()
+        if handlers is not None:
+            self.handlers.update(handlers)
+        self.thread = None
+
+    def handle_error(self, request, client_address):
+        # clients giving up on slow responses (timeouts) are expected, not errors
+        pass
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self.server_address[1])
+
+    def dispatch(self, request):
+        handler = self.handlers.get(request['method'])
+        if handler is None:
+            return {
+                "jsonrpc": "2.0", "id": request.get('id'),
+                "error": {"message": "unknown method " + request['method']}
+            }
+        try:
+            result = handler(request.get('params', []))
+        except Exception as exc:
+            return {
+                "jsonrpc": "2.0", "id": request.get('id'),
+                "error": {"message": str(exc)}
+            }
+        return {"jsonrpc": "2.0", "id": request.get('id'), "result": result}
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
@@ -0,0 +1,175 @@
+"""
+synthetic.py
+
+Generates openBIS v3 search results which look like the real thing: every object carries
+its @type and @id, and objects which appear more than once (sample types, spaces,
+experiments, persons) are serialized in full the first time and only as an @id
+reference afterwards, the way jackson does it.
+
+"""
+
+import itertools
+import json
+import random
+
+
+class _Ids():
+
+    def __init__(self):
+        self.counter = itertools.count(1)
+        self.seen = {}
+
+    def ref_or_obj(self, key, build):
+        """ returns the object the first time a key is seen, its @id afterwards
+        """
+        if key in self.seen:
+            return self.seen[key]
+        obj = build()
+        self.seen[key] = obj['@id']
+        return obj
+
+    def next(self):
+        return next(self.counter)
+
+
+def _person(ids, user):
+    return {
+        "@type": "as.dto.person.Person",
+        "@id": ids.next(),
+        "userId": user,
+        "firstName": user.capitalize(),
+        "lastName": "Tester",
+        "email": user + "@ethz.ch",
+        "active": True,
+        "registrationDate": 1451606400000,
+    }
+
+
+def _space(ids, code):
+    return {
+        "@type": "as.dto.space.Space",
+        "@id": ids.next(),
+        "permId": {"@type": "as.dto.space.id.SpacePermId", "@id": ids.next(), "permId": code},
+        "code": code,
+        "description": None,
+        "registrationDate": 1451606400000,
+        "modificationDate": 1451606400000,
+    }
+
+
+def _sample_type(ids, code):
+    return {
+        "@type": "as.dto.sample.SampleType",
+        "@id": ids.next(),
+        "permId": {"@type": "as.dto.entitytype.id.EntityTypePermId", "@id": ids.next(), "permId": code},
+        "code": code,
+        "description": "sample type " + code,
+        "generatedCodePrefix": code[:2],
+        "autoGeneratedCode": False,
+        "modificationDate": 1451606400000,
+    }
+
+
+def _experiment(ids, space, code):
+    identifier = "/{}/PROJECT/{}".format(space, code)
+    return {
+        "@type": "as.dto.experiment.Experiment",
+        "@id": ids.next(),
+        "permId": {"@type": "as.dto.experiment.id.ExperimentPermId", "@id": ids.next(),
+                   "permId": "20160101000000000-" + code},
+        "identifier": {"@type": "as.dto.experiment.id.ExperimentIdentifier", "@id": ids.next(),
+                       "identifier": identifier},
+        "code": code,
+        "registrationDate": 1451606400000,
+        "modificationDate": 1451606400000,
+    }
+
+
+def search_samples_result(n_samples, n_types=5, n_spaces=3, n_experiments=20, n_persons=10,
+                          n_properties=5, seed=0, first=0, fetch=None):
+    """ returns the result of a searchSamples call with n_samples samples, numbered from
+    first on. fetch are the related objects (type, space, ...) which were fetched, all if
+    None; the others are null, like openBIS serializes them.
+    """
+    rnd = random.Random(seed + first)
+    ids = _Ids()
+    users = ["user{}".format(i) for i in range(n_persons)]
+    types = ["TYPE_{}".format(i) for i in range(n_types)]
+    spaces = ["SPACE_{}".format(i) for i in range(n_spaces)]
+    experiments = ["EXP_{}".format(i) for i in range(n_experiments)]
+
+    objects = []
+    for i in range(first, first + n_samples):
+        space = rnd.choice(spaces)
+        sample_type = rnd.choice(types)
+        experiment = rnd.choice(experiments)
+        code = "SAMPLE_{}".format(i)
+        timestamp = 1451606400000 + i * 60000
+        sample = {
+            "@type": "as.dto.sample.Sample",
+            "@id": ids.next(),
+            "fetchOptions": ids.ref_or_obj('fetchOptions', lambda: {
+                "@type": "as.dto.sample.fetchoptions.SampleFetchOptions", "@id": ids.next(),
+                "sort": None, "count": None, "from": None,
+            }),
+            "permId": {"@type": "as.dto.sample.id.SamplePermId", "@id": ids.next(),
+                       "permId": "20160101000000000-{}".format(i)},
+            "identifier": {"@type": "as.dto.sample.id.SampleIdentifier", "@id": ids.next(),
+                           "identifier": "/{}/{}".format(space, code)},
+            "code": code,
+            "frozen": False,
+            "registrationDate": timestamp,
+            "modificationDate": timestamp + rnd.randint(0, 10**8),
+        }
+        registrator = rnd.choice(users)
+        modifier = rnd.choice(users)
+        properties = {
+            "PROP_{}".format(p): str(rnd.randint(0, 1000)) for p in range(n_properties)
+        }
+        related = [
+            ("type", lambda: ids.ref_or_obj(('type', sample_type), lambda: _sample_type(ids, sample_type))),
+            ("space", lambda: ids.ref_or_obj(('space', space), lambda: _space(ids, space))),
+            ("experiment", lambda: ids.ref_or_obj(
+                ('experiment', space, experiment), lambda: _experiment(ids, space, experiment)
+            )),
+            ("registrator", lambda: ids.ref_or_obj(('person', registrator), lambda: _person(ids, registrator))),
+            ("modifier", lambda: ids.ref_or_obj(('person', modifier), lambda: _person(ids, modifier))),
+            ("properties", lambda: properties),
+            ("tags", lambda: []),
+        ]
+        for key, build in related:
+            sample[key] = build() if fetch is None or key in fetch else None
+        objects.append(sample)
+
+    return {
+        "@type": "as.dto.common.search.SearchResult",
+        "@id": 0,
+        "objects": objects,
+        "totalCount": n_samples,
+    }
+
+
+def paged_search_samples(n_samples, **kwargs):
+    """ returns a stand-in handler for searchSamples with n_samples samples in total, which
+    serves the page selected by the from and count of the fetch options and only the
+    related objects they fetch. Every page is serialized on its own, like openBIS does.
+    """
+    def handler(params):
+        options = params[2]
+        start = options.get('from') or 0
+        count = options.get('count')
+        if count is None:
+            count = n_samples
+        count = max(0, min(count, n_samples - start))
+        fetch = set(options) - {'@type', 'from', 'count', 'sort'}
+        result = search_samples_result(count, first=start, fetch=fetch, **kwargs)
+        result['totalCount'] = n_samples
+        return result
+    return handler
+
+
+def search_samples_response(n_samples, **kwargs):
+    """ the complete JSON-RPC response body (bytes) of a searchSamples call
+    """
+    response = {"jsonrpc": "2.0", "id": "1", "result": search_samples_result(n_samples, **kwargs)}
+    return json.dumps(response).encode('utf-8')
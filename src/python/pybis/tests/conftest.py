@@ -1,7 +1,14 @@
+import os
+import sys
 import pytest
 
 from pybis import Openbis
 
+# the stand-in openBIS server lives next to the benchmarks
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+from standin import StandinServer
+
+
 @pytest.yield_fixture(scope="module")
 def openbis_instance():
     instance = Openbis("http://localhost:20000")
@@ -10,3 +17,10 @@ def openbis_instance():
     yield instance
     instance.logout()
     print("LOGGED OUT...")
+
+
+@pytest.fixture
+def standin():
+    server = StandinServer().start()
+    yield server
+    server.stop()
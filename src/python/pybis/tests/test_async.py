@@ -0,0 +1,62 @@
+import asyncio
+import time
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from pybis import AsyncOpenbis, DataSet
+
+
+def get_datasets(params):
+    return {
+        ds_id['permId']: {"code": ds_id['permId'], "physicalData": None}
+        for ds_id in params[1]
+    }
+
+
+def search_sample_types(params):
+    return {"objects": [
+        {"code": "UNKNOWN", "description": "", "generatedCodePrefix": "S"},
+        {"code": "CELL", "description": "a cell", "generatedCodePrefix": "C"},
+    ]}
+
+
+def test_async_openbis(standin):
+    standin.handlers['getDataSets'] = get_datasets
+    standin.handlers['searchSampleTypes'] = search_sample_types
+    standin.latency = 0.2
+
+    async def run():
+        async with AsyncOpenbis(standin.url, token='dummy-token') as o:
+            token = await o.login('admin', 'password')
+            assert o.openbis.token == token
+
+            start = time.time()
+            datasets = await asyncio.gather(*[o.get_dataset('DS-%d' % i) for i in range(10)])
+            assert time.time() - start < 1.5
+            assert all(isinstance(ds, DataSet) for ds in datasets)
+            assert datasets[3].permId == 'DS-3'
+
+            types = await o.get_sample_types()
+            assert list(types['code']) == ['UNKNOWN', 'CELL']
+
+    asyncio.run(run())
+
+
+def test_cached_token_checked_asynchronously(standin, tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    standin.handlers['getDataSets'] = get_datasets
+    standin.handlers['isSessionActive'] = lambda params: False
+
+    async def run():
+        async with AsyncOpenbis(standin.url) as o:
+            assert o.token == 'cached-token'
+            # nothing is sent (blocking the event loop) before the first request
+            assert standin.request_count == 0
+            await o.get_dataset('DS-1')
+            assert o.token is None
+
+    (tmp_path / '.pybis').mkdir()
+    (tmp_path / '.pybis' / '127.0.0.1.token').write_text('cached-token')
+    asyncio.run(run())
+    assert not (tmp_path / '.pybis' / '127.0.0.1.token').exists()
@@ -0,0 +1,44 @@
+import pytest
+
+from pybis import Openbis
+from pybis.pybis import BatchFuture
+
+
+def get_spaces(params):
+    result = {}
+    for space_id in params[1]:
+        if space_id['permId'] == 'UNKNOWN':
+            raise Exception('no such space')
+        result[space_id['permId']] = {"code": space_id['permId'], "permId": space_id}
+    return result
+
+
+def test_batch(standin):
+    standin.handlers['getSpaces'] = get_spaces
+    o = Openbis(standin.url, token='dummy-token')
+
+    with o.batch():
+        futures = [o.get_space(code) for code in ['S1', 'S2', 'UNKNOWN', 'S3']]
+        assert all(isinstance(f, BatchFuture) for f in futures)
+    assert standin.request_count == 1
+
+    assert futures[0].result().code == 'S1'
+    assert futures[3].result().code == 'S3'
+    with pytest.raises(ValueError):
+        futures[2].result()
+
+    # outside of a batch, calls are sent immediately
+    assert o.get_space('S4').code == 'S4'
+    assert standin.request_count == 2
+
+
+def test_batch_result_inside_block(standin):
+    standin.handlers['getSpaces'] = get_spaces
+    o = Openbis(standin.url, token='dummy-token')
+
+    with o.batch():
+        first = o.get_space('S1')
+        assert first.result().code == 'S1'
+        second = o.get_space('S2')
+    assert second.result().code == 'S2'
+    assert standin.request_count == 2
@@ -0,0 +1,55 @@
+import pytest
+
+from pybis import concat_results
+from pybis.pybis import parse_jackson, _build_result, _sample_columns, _shared_categories, _Categories
+from synthetic import search_samples_result
+
+
+def test_encode():
+    categories = _Categories()
+    assert categories.encode(['b', 'a', None, 'b']).tolist() == [0, 1, -1, 0]
+    assert categories.encode(['c', 'a']).tolist() == [2, 1]
+    assert categories.categories == ['b', 'a', 'c']
+
+
+def test_categorical_columns():
+    objects = search_samples_result(100)['objects']
+    parse_jackson(objects)
+    df = _build_result(objects, _sample_columns)
+    for column in ['experiment', 'sample_type', 'registrator', 'modifier']:
+        assert df[column].dtype == 'category'
+    assert df['identifier'].dtype != 'category'
+    assert df['sample_type'][3] == objects[3]['type']['permId']['permId']
+    assert len(df['sample_type'].cat.categories) == 5
+
+
+def test_shared_between_pages():
+    objects = search_samples_result(300)['objects']
+    parse_jackson(objects)
+    whole = _build_result(objects, _sample_columns)
+
+    dictionaries = _shared_categories()
+    pages = [_build_result(objects[i:i+50], _sample_columns, dictionaries=dictionaries)
+             for i in range(0, 300, 50)]
+    for first, later in zip(pages, pages[1:]):
+        n = len(first['experiment'].cat.categories)
+        assert list(later['experiment'].cat.categories[:n]) == list(first['experiment'].cat.categories)
+    assert concat_results(pages).equals(whole)
+
+
+def test_arrow_dictionaries():
+    pa = pytest.importorskip('pyarrow')
+    objects = search_samples_result(300)['objects']
+    parse_jackson(objects)
+    del objects[5]['properties']['PROP_4']
+    data_types = {'PROP_4': 'CONTROLLEDVOCABULARY'}
+    dictionaries = _shared_categories()
+    pages = [_build_result(objects[i:i+100], _sample_columns, 'arrow', data_types, dictionaries)
+             for i in range(0, 300, 100)]
+    assert pa.types.is_dictionary(pages[0].schema.field('registrator').type)
+    assert pa.types.is_dictionary(pages[0].schema.field('PROP_4').type)
+    table = concat_results(pages)
+    assert table.num_rows == 300
+    assert table.column('PROP_4').null_count == 1
+    assert table.column('registrator').to_pylist() == \
+        list(_build_result(objects, _sample_columns)['registrator'])
@@ -0,0 +1,54 @@
+import os
+import time
+import random
+
+import pandas as pd
+import pytest
+
+from pybis.pybis import local_datetimes, format_timestamp, _samples_df, parse_jackson
+from synthetic import search_samples_result
+
+
+@pytest.fixture
+def zurich():
+    tz = os.environ.get('TZ')
+    os.environ['TZ'] = 'Europe/Zurich'
+    time.tzset()
+    yield
+    if tz is None:
+        del os.environ['TZ']
+    else:
+        os.environ['TZ'] = tz
+    time.tzset()
+
+
+def test_local_datetimes(zurich):
+    rnd = random.Random(1)
+    # around the switches to and from summer time in 2016, and anywhere in between
+    timestamps = [1459040400000 + rnd.randint(-7200000, 7200000) for i in range(500)]
+    timestamps += [1477789200000 + rnd.randint(-7200000, 7200000) for i in range(500)]
+    timestamps += [rnd.randint(0, 2000000000000) for i in range(1000)]
+    timestamps += [1451606400500, 1451606401500]
+
+    expected = [format_timestamp(ts) for ts in timestamps]
+    result = pd.Series(local_datetimes(timestamps)).dt.strftime('%Y-%m-%d %H:%M:%S')
+    assert list(result) == expected
+
+
+def test_local_datetimes_missing():
+    result = local_datetimes([None, 1451606400000])
+    assert pd.isnull(result[0])
+    assert str(result.dtype) == 'datetime64[ns]'
+
+
+def test_samples_df():
+    objects = search_samples_result(100)['objects']
+    parse_jackson(objects)
+    df = _samples_df(objects)
+    assert list(df.columns) == ['identifier', 'permId', 'experiment', 'sample_type',
+                                'registrator', 'registrationDate', 'modifier', 'modificationDate']
+    assert df['identifier'][3] == objects[3]['identifier']['identifier']
+    assert df['sample_type'][3] == objects[3]['type']['permId']['permId']
+    assert str(df['registrationDate'].dtype) == 'datetime64[ns]'
+    assert df['registrationDate'][3].strftime('%Y-%m-%d %H:%M:%S') == \
+        format_timestamp(objects[3]['registrationDate'])
@@ -0,0 +1,74 @@
+import json
+import re
+import threading
+import time
+
+import pytest
+
+from pybis import Openbis, OpenbisTimeoutError
+
+
+counts = {'TYPE_0': 12, 'TYPE_1': 0, 'TYPE_2': 345}
+
+
+@pytest.fixture
+def counting(standin):
+    standin.requests = []
+    # requests which have to be in flight at the same time wait for each other here
+    standin.barrier = None
+
+    def search_samples(params):
+        standin.requests.append(params)
+        if standin.barrier is not None:
+            standin.barrier.wait()
+        match = re.search(r'TYPE_\d+', json.dumps(params[1]))
+        total = counts[match.group(0)] if match else sum(counts.values())
+        return {"objects": [], "totalCount": total}
+
+    def search_sample_types(params):
+        return {"objects": [
+            {"code": code, "description": "", "generatedCodePrefix": "S"} for code in counts
+        ]}
+
+    standin.handlers['searchSamples'] = search_samples
+    standin.handlers['searchSampleTypes'] = search_sample_types
+    return standin
+
+
+def test_count_samples(counting):
+    o = Openbis(counting.url, token='dummy-token')
+    assert o.count_samples() == 357
+    assert o.count_samples(type='TYPE_1') == 0
+    options = counting.requests[0][2]
+    assert options['count'] == 0
+    # no related objects are fetched
+    assert set(options) == {'@type', 'from', 'count'}
+
+
+def test_count_samples_by(counting):
+    o = Openbis(counting.url, token='dummy-token')
+    # the three counts are only answered once all of them have been sent
+    counting.barrier = threading.Barrier(len(counts), timeout=10)
+    by_type = o.count_samples_by('type', space='SPACE_0')
+    assert by_type.to_dict() == counts
+    assert by_type.index.name == 'type'
+    assert not counting.barrier.broken
+    counting.barrier = None
+    assert all('SPACE_0' in json.dumps(params[1]) for params in counting.requests)
+
+    assert o.count_samples_by('type', ['TYPE_2'], workers=1).to_dict() == {'TYPE_2': 345}
+
+    with pytest.raises(ValueError):
+        o.count_samples_by('code')
+    with pytest.raises(ValueError):
+        o.count_samples_by('type', type='TYPE_0')
+
+
+def test_count_samples_by_within_deadline(counting):
+    counting.latency = 2
+    o = Openbis(counting.url, token='dummy-token')
+    start = time.time()
+    with pytest.raises(OpenbisTimeoutError):
+        with o.deadline(0.5):
+            o.count_samples_by('type', ['TYPE_0', 'TYPE_2'])
+    assert time.time() - start < 1.5
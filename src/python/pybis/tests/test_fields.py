@@ -0,0 +1,119 @@
+import pytest
+
+from pybis import Openbis, concat_results
+from pybis.pybis import _fields_options, _sample_columns, search_samples_options, search_datasets_options, _dataset_columns
+from synthetic import paged_search_samples
+
+
+@pytest.fixture
+def projected(standin):
+    handler = paged_search_samples(250)
+    standin.requests = []
+
+    def search_samples(params):
+        standin.requests.append(params[2])
+        return handler(params)
+
+    standin.handlers['searchSamples'] = search_samples
+    return standin
+
+
+def test_fields_options():
+    options = _fields_options(search_samples_options, _sample_columns, ['identifier', 'registrator'])
+    assert options == {
+        'registrator': search_samples_options['registrator'],
+        '@type': search_samples_options['@type'],
+    }
+    options = _fields_options(search_samples_options, _sample_columns, 'identifier', with_properties=True)
+    assert set(options) == {'@type', 'properties', 'type'}
+    assert _fields_options(search_samples_options, _sample_columns, None) is None
+    # the dataset options have no @type
+    assert _fields_options(search_datasets_options, _dataset_columns, ['code']) == {}
+
+    with pytest.raises(ValueError):
+        _fields_options(search_samples_options, _sample_columns, ['identifier', 'nonsense'])
+
+
+def test_get_samples_fields(projected):
+    o = Openbis(projected.url, token='dummy-token')
+    full = o.get_samples().df
+    df = o.get_samples(fields=['identifier', 'sample_type', 'registrator']).df
+    assert list(df.columns) == ['identifier', 'sample_type', 'registrator']
+    assert df['registrator'].equals(full['registrator'])
+    assert df['sample_type'].equals(full['sample_type'])
+    assert set(projected.requests[-1]) == {'@type', 'type', 'registrator'}
+
+    # the columns of the default options are the same as before
+    assert full.equals(o.get_samples(fields=[spec[0] for spec in _sample_columns]).df)
+
+    with pytest.raises(ValueError):
+        o.get_samples(fields=['properties'])
+
+
+def test_iter_samples_fields(projected):
+    o = Openbis(projected.url, token='dummy-token')
+    pages = list(o.iter_samples(page_size=100, fields=['permId', 'modifier'], result_format='records'))
+    assert [len(page) for page in pages] == [100, 100, 50]
+    assert set(pages[0][0]) == {'permId', 'modifier'}
+    assert all(set(options) == {'@type', 'modifier', 'from', 'count', 'sort'} for options in projected.requests)
+
+    scanned = concat_results(o.scan_samples(workers=2, page_size=100, fields=['identifier']))
+    assert list(scanned.columns) == ['identifier']
+    assert len(scanned) == 250
+
+
+def test_get_dataset_fetch(standin):
+    standin.requests = []
+
+    def get_datasets(params):
+        standin.requests.append(params[2])
+        return {"20160101-1": {
+            "code": "20160101-1", "properties": {"NAME": "x"},
+            "physicalData": None, "tags": None, "parents": None,
+        }}
+
+    standin.handlers['getDataSets'] = get_datasets
+    o = Openbis(standin.url, token='dummy-token')
+    dataset = o.get_dataset('20160101-1', fetch=['properties'])
+    assert set(standin.requests[-1]) == {'@type', 'properties'}
+    assert dataset.location is None
+    assert 'NAME' in dataset._repr_html_()
+
+    o.get_dataset('20160101-1')
+    assert 'physicalData' in standin.requests[-1]
+
+    with pytest.raises(ValueError):
+        o.get_dataset('20160101-1', fetch=['nonsense'])
+
+
+def test_save_sample_fetched_partially(standin):
+    standin.updates = []
+    parent = {"identifier": "/SPACE_0/P1", "@type": "as.dto.sample.id.SampleIdentifier"}
+    sample = {
+        "@type": "as.dto.sample.Sample", "code": "S1", "permId": {"permId": "20160101-1"},
+        "identifier": {"identifier": "/SPACE_0/S1"}, "type": {"code": "CELL"},
+        "properties": {"NAME": "x"},
+        "parents": [{"identifier": parent}], "children": None, "tags": None,
+    }
+
+    def get_samples(params):
+        fetched = set(params[2])
+        return {"/SPACE_0/S1": {key: value for key, value in sample.items()
+                                if key not in ('parents', 'children', 'tags') or key in fetched}}
+
+    standin.handlers['getSamples'] = get_samples
+    standin.handlers['searchSampleTypes'] = lambda params: {"objects": [{
+        "@type": "as.dto.sample.SampleType", "code": "CELL", "description": "",
+        "generatedCodePrefix": "S", "autoGeneratedCode": False, "propertyAssignments": [],
+    }]}
+    standin.handlers['updateSamples'] = lambda params: standin.updates.append(params[1][0])
+
+    o = Openbis(standin.url, token='dummy-token')
+    s = o.get_sample('/SPACE_0/S1', fetch=['parents'])
+    assert s.parents == ['/SPACE_0/P1']
+    assert s.children is None and s.tags is None
+    s.save()
+    update = standin.updates[-1]
+    # relations which were not fetched are not touched
+    assert 'childIds' not in update and 'tagIds' not in update
+    assert update['parentIds']['actions'][0]['items'] == [parent]
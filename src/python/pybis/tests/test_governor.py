@@ -0,0 +1,64 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pybis import Openbis, RateGovernor, RetryPolicy, OpenbisHTTPError, OpenbisTimeoutError, Deadline
+from pybis.pybis import shared_governor
+
+
+def test_governor_limits_concurrency(standin):
+    standin.latency = 0.1
+    governor = RateGovernor(initial_limit=2, max_limit=2)
+    o = Openbis(standin.url, token='dummy-token', governor=governor, coalesce_requests=False)
+
+    start = time.time()
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda i: o.is_token_valid(), range(8)))
+    # 8 requests, at most 2 at a time
+    assert time.time() - start >= 0.35
+    assert governor.stats()['requests'] == 8
+    assert governor.stats()['inflight'] == 0
+
+
+def test_governor_decreases_limit_on_overload(standin):
+    # slow responses must not decrease the limit here, only the overload
+    governor = RateGovernor(initial_limit=10, latency_tolerance=1000)
+    o = Openbis(standin.url, token='dummy-token', governor=governor,
+                retry_policy=RetryPolicy(max_attempts=1))
+    standin.failures.append(503)
+    with pytest.raises(OpenbisHTTPError):
+        o.is_token_valid()
+    stats = governor.stats()
+    assert stats['limit'] == pytest.approx(7)
+    assert stats['overloads'] == 1
+    assert stats['decreases'] == 1
+
+    for i in range(5):
+        o.is_token_valid()
+    assert governor.stats()['limit'] > 7
+
+
+def test_governor_rate(standin):
+    governor = RateGovernor(rate=20, burst=1)
+    o = Openbis(standin.url, token='dummy-token', governor=governor, coalesce_requests=False)
+    start = time.time()
+    for i in range(6):
+        o.is_token_valid()
+    assert time.time() - start >= 0.2
+
+
+def test_governor_deadline():
+    governor = RateGovernor(initial_limit=1, max_limit=1)
+    with governor.slot('searchSamples'):
+        with pytest.raises(OpenbisTimeoutError):
+            with governor.slot('searchSamples', Deadline(0.05)):
+                pass
+    assert governor.stats()['inflight'] == 0
+
+
+def test_shared_governor():
+    a = Openbis('https://localhost:8443', token='dummy-token', governor=True)
+    b = Openbis('https://localhost:8443/openbis', token='dummy-token', governor=True)
+    assert a.governor is b.governor is shared_governor('https://localhost:8443')
+    assert Openbis('https://localhost:8443', token='dummy-token').governor is None
@@ -0,0 +1,48 @@
+import pytest
+
+from pybis import Openbis, RetryPolicy, OpenbisHTTPError
+from synthetic import search_samples_result
+
+
+def test_stats(standin):
+    standin.handlers['searchSamples'] = lambda params: search_samples_result(50)
+    o = Openbis(standin.url, token='dummy-token', instrument=True)
+
+    o.get_samples(space='SPACE_0')
+    o.get_samples(space='SPACE_1')
+    stats = o.stats()['searchSamples']
+    assert stats['count'] == 2
+    assert stats['errors'] == 0
+    assert sum(stats['latency_histogram'].values()) == 2
+    assert stats['latency_max'] <= stats['latency']
+    assert stats['request_bytes'] > 0
+    assert stats['response_bytes'] > stats['request_bytes']
+    assert set(stats['phases']) == {'decode', 'parse_jackson', 'dataframe'}
+
+    o.reset_stats()
+    assert o.stats() == {}
+
+
+def test_stats_disabled(standin):
+    o = Openbis(standin.url, token='dummy-token')
+    o.is_token_valid()
+    assert o.stats() == {}
+
+
+def test_callbacks(standin):
+    o = Openbis(standin.url, token='dummy-token', retry_policy=RetryPolicy(max_attempts=1))
+    events = []
+    o.add_callback(events.append)
+
+    o.is_token_valid()
+    standin.failures.append(500)
+    with pytest.raises(OpenbisHTTPError):
+        o.is_token_valid()
+
+    requests = [e for e in events if e['event'] == 'request']
+    assert [e['error'] is None for e in requests] == [True, False]
+    assert o.stats()['isSessionActive']['errors'] == 1
+
+    o.remove_callback(events.append)
+    o.is_token_valid()
+    assert len([e for e in events if e['event'] == 'request']) == 2
@@ -0,0 +1,27 @@
+from pandas.testing import assert_frame_equal
+
+from pybis import Openbis
+from pybis.pybis import _json_loads, _json_loads_interned
+from synthetic import search_samples_response, search_samples_result
+
+
+def test_interned_decoding():
+    body = search_samples_response(100, n_properties=1)
+    plain = _json_loads(body)
+    interned = _json_loads_interned(body)
+    assert interned == plain
+
+    objects = interned['result']['objects']
+    assert objects[0]['@type'] is objects[1]['@type']
+    # the only property has at most 1001 values, so some samples share their properties
+    properties = {id(obj['properties']) for obj in objects}
+    assert len(properties) < len(objects)
+    # objects with an @id are never shared
+    assert objects[0]['permId'] is not objects[1]['permId']
+
+
+def test_get_samples_interning(standin):
+    standin.handlers['searchSamples'] = lambda params: search_samples_result(200)
+    plain = Openbis(standin.url, token='dummy-token')
+    interned = Openbis(standin.url, token='dummy-token', interning=True)
+    assert_frame_equal(interned.get_samples().df, plain.get_samples().df)
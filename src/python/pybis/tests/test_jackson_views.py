@@ -0,0 +1,59 @@
+import json
+from collections.abc import Mapping
+
+import pytest
+from pandas.testing import assert_frame_equal
+
+from pybis import Openbis, JacksonView
+from pybis.pybis import parse_jackson, jackson_views, _samples_df
+from synthetic import search_samples_result
+
+
+def materialize(value):
+    if isinstance(value, Mapping):
+        return {key: materialize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [materialize(item) for item in value]
+    return value
+
+
+def test_views_resolve_like_parse_jackson():
+    body = json.dumps(search_samples_result(200)['objects'])
+    expected = json.loads(body)
+    parse_jackson(expected)
+
+    raw = json.loads(body)
+    views = jackson_views(raw)
+    assert all(isinstance(view, JacksonView) for view in views)
+    assert materialize(views) == expected
+    # the response itself is left alone
+    assert raw == json.loads(body)
+    assert_frame_equal(_samples_df(views), _samples_df(expected))
+
+
+def test_views_are_lazy():
+    views = jackson_views(search_samples_result(1000)['objects'])
+    index = views[0]._index
+    assert len(index.found) == 0
+    # a reference to a person: only the beginning of the response is searched for it
+    assert views[-1]['registrator']['userId'].startswith('user')
+    assert 0 < len(index.found) < 30
+    assert len(index._pending) == 0 and len(index._stack) > 0
+
+
+def test_unknown_reference():
+    views = jackson_views([{"code": "S1", "type": 42}])
+    assert views[0]['code'] == 'S1'
+    with pytest.raises(ValueError):
+        views[0]['type']
+
+
+def test_lazy_get_samples(standin):
+    standin.handlers['searchSamples'] = lambda params: search_samples_result(300)
+    eager = Openbis(standin.url, token='dummy-token')
+    lazy = Openbis(standin.url, token='dummy-token', lazy_references=True)
+    assert_frame_equal(lazy.get_samples().df, eager.get_samples().df)
+
+    chunks = list(lazy.stream_samples(chunksize=100))
+    assert [len(chunk) for chunk in chunks] == [100, 100, 100]
+    assert list(chunks[2]['registrator']) == list(eager.get_samples().df['registrator'][200:])
@@ -0,0 +1,24 @@
+import pytest
+
+from pybis import pybis
+
+
+def test_json_codecs():
+    data = {"method": "searchSamples", "params": ["token", {"code": "ÄBC/1"}, None], "id": "1"}
+    for name, codec in pybis.json_codecs.items():
+        encoded = codec.dumps(data)
+        assert isinstance(encoded, bytes)
+        for other in pybis.json_codecs.values():
+            assert other.loads(encoded) == data
+
+
+def test_set_json_codec():
+    current = pybis.get_json_codec()
+    try:
+        pybis.set_json_codec('json')
+        assert pybis.get_json_codec() == 'json'
+        assert pybis._json_loads(pybis._json_dumps([1, "a"])) == [1, "a"]
+        with pytest.raises(ValueError):
+            pybis.set_json_codec('no_such_codec')
+    finally:
+        pybis.set_json_codec(current)
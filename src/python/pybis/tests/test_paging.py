@@ -0,0 +1,125 @@
+import threading
+import time
+
+import pytest
+
+from pybis import Openbis, OpenbisTimeoutError, concat_results
+from synthetic import paged_search_samples
+
+
+@pytest.fixture
+def paged(standin):
+    handler = paged_search_samples(350)
+    standin.requests = []
+
+    def search_samples(params):
+        standin.requests.append(params[2])
+        return handler(params)
+
+    standin.handlers['searchSamples'] = search_samples
+    return standin
+
+
+def test_iter_samples(paged):
+    o = Openbis(paged.url, token='dummy-token')
+    pages = list(o.iter_samples(page_size=100, space='SPACE_0'))
+    assert [len(page) for page in pages] == [100, 100, 100, 50]
+
+    codes = [identifier.split('/')[-1] for identifier in concat_results(pages)['identifier']]
+    assert codes == ['SAMPLE_{}'.format(i) for i in range(350)]
+
+    assert sorted(options['from'] for options in paged.requests) == [0, 100, 200, 300]
+    assert all(options['count'] == 100 for options in paged.requests)
+    assert paged.requests[0]['sort']['sortings'][0]['field'] == 'PERM_ID'
+    # the fetch options of get_samples() are kept
+    assert 'registrator' in paged.requests[0]
+
+
+def test_last_page_is_full(paged):
+    paged.handlers['searchSamples'] = paged_search_samples(300)
+    o = Openbis(paged.url, token='dummy-token')
+    pages = list(o.iter_samples(page_size=100, read_ahead=0, result_format='records'))
+    assert [len(page) for page in pages] == [100, 100, 100]
+    assert paged.request_count == 3
+
+
+def test_read_ahead_is_bounded(paged):
+    o = Openbis(paged.url, token='dummy-token')
+    pages = o.iter_samples(page_size=10, read_ahead=2)
+    first = next(pages)
+    assert len(first) == 10
+    pages.close()
+    # the first page and at most two pages read ahead
+    assert len(paged.requests) <= 3
+
+
+@pytest.fixture
+def slow_pages(standin):
+    """ the first page is answered at once, the others take 2 seconds each
+    """
+    handler = paged_search_samples(400)
+
+    def search_samples(params):
+        if params[2].get('from'):
+            time.sleep(2)
+        return handler(params)
+
+    standin.handlers['searchSamples'] = search_samples
+    return standin
+
+
+def test_read_ahead_within_deadline(slow_pages):
+    o = Openbis(slow_pages.url, token='dummy-token')
+    start = time.time()
+    with pytest.raises(OpenbisTimeoutError):
+        with o.deadline(0.5):
+            for page in o.iter_samples(page_size=100, read_ahead=2):
+                pass
+    assert time.time() - start < 1.5
+
+
+def test_scan_within_deadline(slow_pages):
+    o = Openbis(slow_pages.url, token='dummy-token')
+    start = time.time()
+    with pytest.raises(OpenbisTimeoutError):
+        with o.deadline(0.5):
+            concat_results(o.scan_samples(workers=4, page_size=100))
+    assert time.time() - start < 1.5
+
+
+def test_invalid_arguments(paged):
+    o = Openbis(paged.url, token='dummy-token')
+    with pytest.raises(ValueError):
+        o.iter_samples(page_size=0)
+    with pytest.raises(ValueError):
+        o.iter_datasets(read_ahead=-1)
+
+
+def test_scan_samples(paged):
+    handler = paged_search_samples(1000)
+    lock = threading.Lock()
+    active = [0, 0]
+
+    def search_samples(params):
+        with lock:
+            active[0] += 1
+            active[1] = max(active)
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return handler(params)
+
+    paged.handlers['searchSamples'] = search_samples
+    o = Openbis(paged.url, token='dummy-token')
+    expected = list(concat_results(o.iter_samples(page_size=100, read_ahead=0))['identifier'])
+    active[1] = 0
+
+    ordered = concat_results(o.scan_samples(workers=4, page_size=100))
+    assert list(ordered['identifier']) == expected
+    assert active[1] == 4
+
+    unordered = concat_results(o.scan_samples(workers=4, page_size=100, ordered=False))
+    assert sorted(unordered['identifier']) == sorted(expected)
+
+    with pytest.raises(ValueError):
+        o.scan_datasets(workers=0)
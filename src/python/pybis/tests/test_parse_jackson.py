@@ -0,0 +1,54 @@
+import json
+
+from pybis.pybis import parse_jackson
+from synthetic import search_samples_result
+from reference import parse_jackson_recursive
+
+
+def test_same_result_as_recursive():
+    body = json.dumps(search_samples_result(300)['objects'])
+    expected = json.loads(body)
+    parse_jackson_recursive(expected)
+    result = json.loads(body)
+    parse_jackson(result)
+    assert result == expected
+    assert result[0]['type']['@type'] == 'as.dto.sample.SampleType'
+
+
+def test_incremental():
+    objects = search_samples_result(50)['objects']
+    found = {}
+    for obj in objects:
+        parse_jackson(obj, found)
+    assert all(isinstance(obj['registrator'], dict) for obj in objects)
+    assert objects[-1]['space'] is found[objects[-1]['space']['@id']]
+
+
+def test_deep_parent_graph():
+    # a chain of 10000 samples, each the parent of the next one
+    root = sample = {"@id": 1, "code": "S1", "parents": [], "type": {"@id": 0, "code": "CELL"}}
+    for i in range(2, 10001):
+        child = {"@id": i, "code": "S%d" % i, "parents": [], "type": 0}
+        sample["children"] = [child]
+        sample = child
+    data = [root, {"code": "LAST", "parents": [10000]}]
+    parse_jackson(data)
+    assert data[1]['parents'][0]['code'] == 'S10000'
+    assert data[1]['parents'][0]['type']['code'] == 'CELL'
+
+
+def test_cycles():
+    data = [{
+        "@id": 1, "code": "A",
+        "children": [{"@id": 2, "code": "B", "parents": [1], "children": [3]}],
+        "parents": [3, {"@id": 3, "code": "C", "sample": 2}],
+    }]
+    parse_jackson(data)
+    a = data[0]
+    b = a['children'][0]
+    c = a['parents'][1]
+    # A itself is never registered: it is not below one of the interesting keys
+    assert b['parents'] == [1]
+    assert b['children'][0] is c
+    assert c['sample'] is b
+    assert a['parents'][0] is c
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import re
+
+import pandas as pd
+import pytest
+
+from pybis import Openbis, concat_results
+from synthetic import search_samples_result
+
+
+data_types = {
+    'PROP_0': 'INTEGER',
+    'PROP_1': 'REAL',
+    'PROP_2': 'BOOLEAN',
+    'PROP_3': 'TIMESTAMP',
+    'PROP_4': 'CONTROLLEDVOCABULARY',
+}
+
+
+type_lookups = []
+
+
+def search_types(params):
+    code = re.search(r'TYPE_\d+', json.dumps(params[1])).group(0)
+    type_lookups.append(code)
+    return {"objects": [{
+        "@type": "as.dto.sample.SampleType",
+        "code": code,
+        "description": "",
+        "generatedCodePrefix": "S",
+        "propertyAssignments": [
+            {"mandatory": False, "propertyType": {"code": prop, "dataType": data_type, "label": prop}}
+            for prop, data_type in sorted(data_types.items())
+        ],
+    }]}
+
+
+def samples_with_properties(n_samples):
+    result = search_samples_result(n_samples)
+    for i, sample in enumerate(result['objects']):
+        sample['properties'] = {
+            'PROP_0': str(i),
+            'PROP_1': '{}.5'.format(i),
+            'PROP_2': 'true' if i % 2 else 'false',
+            'PROP_3': '2017-03-01 12:00:00 +0100',
+            'PROP_4': 'RED' if i % 3 else 'BLUE',
+            'NOTES': 'sample {}'.format(i),
+        }
+    # not every sample has every property
+    del result['objects'][0]['properties']['PROP_0']
+    result['objects'][1]['properties']['PROP_1'] = 'n/a'
+    return result
+
+
+@pytest.fixture
+def samples_standin(standin):
+    del type_lookups[:]
+    standin.handlers['searchSamples'] = lambda params: samples_with_properties(100)
+    standin.handlers['searchSampleTypes'] = search_types
+    return standin
+
+
+def check_columns(df):
+    assert str(df['PROP_0'].dtype) == 'Int64'
+    assert df['PROP_0'].isna().tolist()[:2] == [True, False]
+    assert df['PROP_0'].sum() == sum(range(100))
+    assert df['PROP_1'].dtype == 'float64'
+    assert pd.isna(df['PROP_1'][1]) and df['PROP_1'][2] == 2.5
+    assert str(df['PROP_2'].dtype) == 'boolean'
+    assert df['PROP_2'].sum() == 50
+    assert df['PROP_3'][0] == pd.Timestamp('2017-03-01 11:00:00', tz='UTC')
+    assert df['PROP_4'].dtype == 'category'
+    assert set(df['PROP_4'].cat.categories) == {'RED', 'BLUE'}
+    # properties without an assignment are kept as they are
+    assert df['NOTES'][5] == 'sample 5'
+
+
+def test_get_samples_with_properties(samples_standin):
+    o = Openbis(samples_standin.url, token='dummy-token')
+    assert 'PROP_0' not in o.get_samples().df
+
+    df = o.get_samples(with_properties=True).df
+    check_columns(df)
+    assert list(df.columns[:2]) == ['identifier', 'permId']
+    # every sample type is looked up once
+    assert sorted(type_lookups) == ['TYPE_%d' % i for i in range(5)]
+
+
+def test_stream_samples_with_properties(samples_standin):
+    o = Openbis(samples_standin.url, token='dummy-token')
+    chunks = list(o.stream_samples(chunksize=30, with_properties=True))
+    check_columns(concat_results(chunks))
+    assert sorted(type_lookups) == ['TYPE_%d' % i for i in range(5)]
+
+
+def test_async_get_samples_with_properties(samples_standin):
+    pytest.importorskip('aiohttp')
+    from pybis import AsyncOpenbis
+
+    async def run():
+        async with AsyncOpenbis(samples_standin.url, token='dummy-token') as o:
+            return await o.get_samples(with_properties=True)
+
+    check_columns(asyncio.run(run()).df)
@@ -0,0 +1,109 @@
+from datetime import date, datetime
+
+import pytest
+
+from pybis import Openbis, Query, prop, attr
+from synthetic import search_samples_result
+
+
+def test_comparisons():
+    assert (prop('concentration') > 0.5).criteria('Sample') == {
+        "@type": "as.dto.common.search.NumberPropertySearchCriteria",
+        "fieldName": "CONCENTRATION",
+        "fieldType": "PROPERTY",
+        "fieldValue": {"value": 0.5, "@type": "as.dto.common.search.NumberGreaterThanValue"},
+    }
+    criteria = prop('NAME').startswith('Cell').criteria('Sample')
+    assert criteria['@type'] == "as.dto.common.search.StringPropertySearchCriteria"
+    assert criteria['fieldValue']['@type'] == "as.dto.common.search.StringStartsWithValue"
+
+    criteria = (attr('code') == 'sample_1').criteria('Sample')
+    assert criteria == {
+        "@type": "as.dto.common.search.CodeSearchCriteria",
+        "fieldValue": {"value": "SAMPLE_1", "@type": "as.dto.common.search.StringEqualToValue"},
+    }
+
+    criteria = (prop('HARVESTED') <= date(2017, 3, 1)).criteria('Sample')
+    assert criteria['@type'] == "as.dto.common.search.DatePropertySearchCriteria"
+    assert criteria['fieldValue']['value'] == '2017-03-01'
+
+
+def test_combinations():
+    query = (prop('A') == 'x') & (prop('B') > 1) & ~attr('code').contains('TEST')
+    criteria = query.criteria('DataSet')
+    assert criteria['@type'] == "as.dto.dataset.search.DataSetSearchCriteria"
+    assert criteria['operator'] == 'AND'
+    assert len(criteria['criteria']) == 3
+    negated = criteria['criteria'][2]
+    assert negated['negated'] is True
+    assert negated['criteria'][0]['fieldValue']['@type'] == "as.dto.common.search.StringContainsValue"
+
+    criteria = (attr('permId').isin(['1', '2']) | (prop('A') != 'x')).criteria('Experiment')
+    assert criteria['operator'] == 'OR'
+    assert [c.get('negated', False) for c in criteria['criteria']] == [False, False, True]
+
+    registered = attr('registrationDate').between(date(2017, 1, 1), datetime(2017, 3, 31, 12, 0))
+    criteria = registered.criteria('Sample')
+    assert [c['fieldValue'] for c in criteria['criteria']] == [
+        {"value": "2017-01-01", "@type": "as.dto.common.search.DateLaterThanOrEqualValue"},
+        {"value": "2017-03-31 12:00:00", "@type": "as.dto.common.search.DateEarlierThanOrEqualValue"},
+    ]
+
+
+def test_invalid_queries():
+    with pytest.raises(ValueError):
+        attr('registrationDate') < '2017-01-01'
+    with pytest.raises(ValueError):
+        prop('NAME') > 'abc'
+    with pytest.raises(ValueError):
+        attr('code') == 5
+    with pytest.raises(ValueError):
+        attr('nonsense')
+    with pytest.raises(ValueError):
+        (prop('A') == 1) and (prop('B') == 2)
+    with pytest.raises(ValueError):
+        (prop('A') == 1) & 'B'
+    with pytest.raises(ValueError):
+        attr('permId').isin([])
+    with pytest.raises(TypeError):
+        Query()
+
+
+def test_get_samples_where(standin):
+    standin.requests = []
+
+    def search_samples(params):
+        standin.requests.append(params[1])
+        return search_samples_result(3)
+
+    standin.handlers['searchSamples'] = search_samples
+    o = Openbis(standin.url, token='dummy-token')
+    query = (prop('CONCENTRATION') >= 2) | attr('code').startswith('CTRL')
+    assert len(o.get_samples(type='CELL', where=query).df) == 3
+    criteria = standin.requests[-1]['criteria']
+    assert criteria[0]['@type'] == "as.dto.sample.search.SampleTypeSearchCriteria"
+    assert criteria[-1] == query.criteria('Sample')
+
+    with pytest.raises(ValueError):
+        o.get_samples(where={'code': 'X'})
+
+
+def test_negation_needs_server_support(standin):
+    standin.requests = []
+
+    def search_samples(params):
+        standin.requests.append(params[1])
+        return search_samples_result(3)
+
+    standin.handlers['searchSamples'] = search_samples
+    query = (prop('CONCENTRATION') >= 2) & (attr('code') != 'CTRL')
+    # older servers might ignore the negation, so it is not sent to them
+    with pytest.raises(ValueError):
+        Openbis(standin.url, token='dummy-token').get_samples(where=query)
+    with pytest.raises(ValueError):
+        Openbis(standin.url, token='dummy-token').count_samples(where=~query)
+    assert standin.requests == []
+
+    o = Openbis(standin.url, token='dummy-token', negated_criteria=True)
+    assert len(o.get_samples(where=query).df) == 3
+    assert standin.requests[-1]['criteria'][-1] == query.criteria('Sample')
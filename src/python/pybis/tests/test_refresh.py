@@ -0,0 +1,131 @@
+import copy
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from pybis import Openbis, prop
+from pybis.pybis import parse_jackson
+from synthetic import search_samples_result
+
+
+def without_ids(obj):
+    if isinstance(obj, dict):
+        return {key: without_ids(value) for key, value in obj.items() if key != '@id'}
+    if isinstance(obj, list):
+        return [without_ids(value) for value in obj]
+    return obj
+
+
+def modified_since(criteria):
+    """ the modificationDate (ms) a delta query asks for, None for other queries
+    """
+    if criteria['@type'] == "as.dto.common.search.ModificationDateSearchCriteria":
+        assert criteria['timeZone']['hourOffset'] == 0
+        since = datetime.strptime(criteria['fieldValue']['value'], '%Y-%m-%d %H:%M:%S')
+        return since.replace(tzinfo=timezone.utc).timestamp() * 1000
+    for criterion in criteria.get('criteria', []):
+        since = modified_since(criterion)
+        if since is not None:
+            return since
+    return None
+
+
+def permids(criteria):
+    """ the permIds a query asks for, None for other queries
+    """
+    if criteria['@type'] == "as.dto.common.search.PermIdSearchCriteria":
+        return {criteria['fieldValue']['value']}
+    found = [permids(criterion) for criterion in criteria.get('criteria', [])]
+    found = [values for values in found if values is not None]
+    return set().union(*found) if found else None
+
+
+@pytest.fixture
+def server(standin):
+    objects = search_samples_result(200)['objects']
+    parse_jackson(objects)
+    standin.samples = without_ids(json.loads(json.dumps(objects)))
+    # in the trash: not found by searches
+    standin.deleted = []
+    standin.searches = []
+
+    def search_samples(params):
+        criteria, options = params[1], params[2]
+        samples = [sample for sample in standin.samples
+                   if sample['permId']['permId'] not in standin.deleted]
+        since = modified_since(criteria)
+        if since is not None:
+            samples = [sample for sample in samples if sample['modificationDate'] >= since]
+        wanted = permids(criteria)
+        if wanted is not None:
+            samples = [sample for sample in samples if sample['permId']['permId'] in wanted]
+        # the identifier scan asks for no related objects
+        fetched = bool(set(options) - {'@type', 'from', 'count', 'sort'})
+        standin.searches.append((since, len(samples), fetched))
+        return {"objects": samples, "totalCount": len(samples)}
+
+    standin.handlers['searchSamples'] = search_samples
+    return standin
+
+
+def test_refresh(server):
+    o = Openbis(server.url, token='dummy-token')
+    samples = o.get_samples()
+    df = samples.df
+    assert len(df) == 200
+
+    newest = max(sample['modificationDate'] for sample in server.samples)
+    server.samples[3]['modificationDate'] = newest + 3600 * 1000
+    server.samples[3]['modifier'] = server.samples[0]['registrator']
+    server.deleted.append(server.samples[7]['permId']['permId'])
+    assert samples.refresh() is samples
+
+    # only the changed sample and the newest one before it (within the overlap) were transferred,
+    # plus the identifiers of all samples
+    assert [(since is not None, transferred, fetched)
+            for since, transferred, fetched in server.searches[1:]] == [(True, 2, True), (False, 199, False)]
+    assert len(samples.df) == 199
+    refreshed = samples.df.set_index('identifier')
+    assert df['identifier'][7] not in refreshed.index
+    assert refreshed.loc[df['identifier'][3], 'modifier'] == df['registrator'][0]
+    assert sorted(refreshed.index) == sorted(set(df['identifier']) - {df['identifier'][7]})
+
+
+def test_refresh_notices_samples_leaving_and_joining(server):
+    o = Openbis(server.url, token='dummy-token')
+    samples = o.get_samples(where=prop('PROP_0') > 0)
+    identifiers = list(samples.df['identifier'])
+
+    # deleted permanently (not in the trash) or moved elsewhere: dropped by the identifier scan
+    del server.samples[10]
+    samples.refresh()
+    assert server.searches[-1] == (None, 199, False)
+    assert sorted(samples.df['identifier']) == sorted(identifiers[:10] + identifiers[11:])
+
+    # one sample leaves the query while another one joins it without being modified,
+    # the number of samples stays the same
+    del server.samples[20]
+    joined = copy.deepcopy(server.samples[0])
+    joined['code'] = 'JOINED'
+    joined['permId']['permId'] = '20160101-JOINED'
+    joined['identifier']['identifier'] = '/SPACE_0/JOINED'
+    server.samples.append(joined)
+    samples.refresh()
+    # only the sample which joined is fetched
+    assert server.searches[-1] == (None, 1, True)
+    assert sorted(samples.df['identifier']) == sorted(
+        sample['identifier']['identifier'] for sample in server.samples)
+
+
+def test_refresh_with_other_default_format(server):
+    o = Openbis(server.url, token='dummy-token', result_format='records')
+    samples = o.get_samples(result_format='pandas')
+    server.samples[3]['modificationDate'] += 3600 * 1000
+    assert len(samples.refresh().df) == 200
+
+
+def test_refresh_needs_query(server):
+    o = Openbis(server.url, token='dummy-token')
+    with pytest.raises(ValueError):
+        o.get_samples(fields=['identifier']).refresh()
@@ -0,0 +1,71 @@
+import time
+import pytest
+
+from pybis import Openbis, OpenbisConnectionError
+from pandas.testing import assert_frame_equal
+from synthetic import search_samples_result
+
+
+def test_record_replay(standin, tmpdir):
+    standin.handlers['searchSamples'] = lambda params: search_samples_result(100)
+    cassette = str(tmpdir.join('cassette.json'))
+
+    o = Openbis(standin.url, token='admin-161216151709412xD5FF0B8C9A2A9DAB')
+    with o.record(cassette) as recorder:
+        recorded = o.get_samples(space='SPACE_0').df
+        streamed = list(o.stream_samples(chunksize=40, space='SPACE_1'))
+    assert len(recorder.interactions) == 2
+    count = standin.request_count
+
+    # another session token, same requests
+    o = Openbis(standin.url, token='admin-161217090000000x0123456789ABCDEF')
+    with o.replay(cassette):
+        assert_frame_equal(o.get_samples(space='SPACE_0').df, recorded)
+        assert [len(c) for c in o.stream_samples(chunksize=40, space='SPACE_1')] == [40, 40, 20]
+        with pytest.raises(OpenbisConnectionError):
+            o.get_samples(space='SPACE_2')
+    assert standin.request_count == count
+
+
+def test_replay_latency_and_bandwidth(standin, tmpdir):
+    standin.handlers['searchSamples'] = lambda params: search_samples_result(200)
+    cassette = str(tmpdir.join('cassette.json'))
+    o = Openbis(standin.url, token='dummy-token', instrument=True)
+    with o.record(cassette):
+        o.get_samples()
+    size = o.stats()['searchSamples']['response_bytes']
+
+    with o.replay(cassette, latency=0.1, bandwidth=size * 5):
+        start = time.time()
+        o.get_samples()
+        assert time.time() - start >= 0.3
+
+
+def test_record_keeps_pool_settings(standin, tmpdir):
+    o = Openbis(standin.url, token='dummy-token', pool_maxsize=7, pool_block=True)
+    with o.record(str(tmpdir.join('cassette.json'))) as recorder:
+        assert o.session.adapters['http://'] is recorder
+        assert recorder._pool_maxsize == 7
+        assert recorder._pool_block is True
+        assert recorder.poolmanager.connection_pool_kw['maxsize'] == 7
+
+
+def test_cassette_without_secrets(standin, tmpdir):
+    standin.handlers['searchSamples'] = lambda params: search_samples_result(10)
+    cassette = str(tmpdir.join('cassette.json'))
+    o = Openbis(standin.url)
+    with o.record(cassette):
+        token = o.login('alice', 's3cret-pw')
+        o.get_samples()
+    with open(cassette) as f:
+        recorded = f.read()
+    assert 'alice' not in recorded and 's3cret-pw' not in recorded
+    assert token not in recorded
+
+    # logins with any credentials are replayed
+    o = Openbis(standin.url, token='dummy-token')
+    count = standin.request_count
+    with o.replay(cassette):
+        o.login('bob', 'other-pw')
+        assert len(o.get_samples().df) == 10
+    assert standin.request_count == count
@@ -0,0 +1,54 @@
+from datetime import datetime
+
+import pytest
+
+from pybis import Openbis
+from pybis.pybis import parse_jackson, _samples_df, _build_result, _sample_columns
+from synthetic import search_samples_result
+
+
+def test_records():
+    objects = search_samples_result(50)['objects']
+    parse_jackson(objects)
+    df = _samples_df(objects)
+    records = _build_result(objects, _sample_columns, 'records')
+    assert len(records) == 50
+    assert list(records[0]) == list(df.columns)
+    assert records[7]['identifier'] == df['identifier'][7]
+    assert isinstance(records[7]['registrationDate'], datetime)
+    assert records[7]['registrationDate'] == df['registrationDate'][7].to_pydatetime()
+
+
+def test_arrow():
+    pa = pytest.importorskip('pyarrow')
+    objects = search_samples_result(50)['objects']
+    parse_jackson(objects)
+    objects[3]['modificationDate'] = None
+    table = _build_result(objects, _sample_columns, 'arrow')
+    assert isinstance(table, pa.Table)
+    assert table.column_names == list(_samples_df(objects).columns)
+    assert table.schema.field('registrationDate').type == pa.timestamp('ns')
+    assert table.column('modificationDate').null_count == 1
+    assert table.column('identifier').to_pylist() == list(_samples_df(objects)['identifier'])
+
+    properties = _build_result(objects, _sample_columns, 'arrow', {'PROP_0': 'INTEGER'})
+    assert properties.schema.field('PROP_0').type == pa.int64()
+    assert properties.schema.field('PROP_1').type == pa.string()
+
+
+def test_result_format_option(standin):
+    standin.handlers['searchSamples'] = lambda params: search_samples_result(20)
+    o = Openbis(standin.url, token='dummy-token', result_format='records')
+    records = o.get_samples()
+    assert isinstance(records, list) and len(records) == 20
+    assert o.get_samples(result_format='pandas').df['identifier'].tolist() == \
+        [record['identifier'] for record in records]
+
+    chunks = list(o.stream_samples(chunksize=8))
+    assert [len(chunk) for chunk in chunks] == [8, 8, 4]
+    assert chunks[0][0] == records[0]
+
+    with pytest.raises(ValueError):
+        o.get_samples(result_format='excel')
+    with pytest.raises(ValueError):
+        Openbis(standin.url, result_format='excel')
@@ -0,0 +1,75 @@
+import pytest
+
+from pybis import Openbis, RetryPolicy
+from pybis import OpenbisHTTPError, OpenbisConnectionError, OpenbisServerError, OpenbisTimeoutError
+
+
+def fast_policy(**kwargs):
+    return RetryPolicy(backoff=0.01, **kwargs)
+
+
+def test_read_requests_are_retried(standin):
+    standin.failures = [503, 0, 502]
+    o = Openbis(standin.url, token='dummy-token', retry_policy=fast_policy())
+    assert o.is_token_valid() is True
+    assert standin.request_count == 4
+
+
+def test_give_up_after_max_attempts(standin):
+    standin.failures = [503] * 10
+    o = Openbis(standin.url, token='dummy-token', retry_policy=fast_policy(max_attempts=3))
+    with pytest.raises(OpenbisHTTPError) as excinfo:
+        o.is_token_valid()
+    assert excinfo.value.status_code == 503
+    assert excinfo.value.method == 'isSessionActive'
+    assert standin.request_count == 3
+
+
+def test_writes_are_not_retried(standin):
+    standin.handlers['updateSamples'] = lambda params: None
+    standin.failures = [503]
+    o = Openbis(standin.url, token='dummy-token', retry_policy=fast_policy())
+    with pytest.raises(OpenbisHTTPError):
+        o.update_sample('PERMID', properties={'A': '1'})
+    assert standin.request_count == 1
+
+
+def test_server_errors_are_not_retried(standin):
+    o = Openbis(standin.url, token='dummy-token', retry_policy=fast_policy())
+    with pytest.raises(OpenbisServerError) as excinfo:
+        o.get_tags()
+    assert excinfo.value.method == 'searchTags'
+    assert standin.request_count == 1
+    # still a ValueError, as before
+    assert isinstance(excinfo.value, ValueError)
+
+
+def test_connection_error():
+    o = Openbis('http://127.0.0.1:1', token='dummy-token', retry_policy=RetryPolicy(max_attempts=1))
+    with pytest.raises(OpenbisConnectionError):
+        o.is_token_valid()
+
+
+def test_retry_budget():
+    policy = RetryPolicy(budget=0)
+    error = OpenbisHTTPError('unavailable', status_code=503)
+    retries = 0
+    while policy.should_retry(error, 1):
+        retries += 1
+    assert retries == policy.reserve
+
+
+def test_read_timeouts_are_not_retried(standin):
+    standin.latency = 0.5
+    timeouts = {'isSessionActive': (5, 0.1)}
+    o = Openbis(standin.url, token='dummy-token', timeouts=timeouts, retry_policy=fast_policy())
+    with pytest.raises(OpenbisTimeoutError) as excinfo:
+        o.is_token_valid()
+    assert excinfo.value.read_timeout
+    assert standin.request_count == 1
+
+    o = Openbis(standin.url, token='dummy-token', timeouts=timeouts,
+                retry_policy=fast_policy(max_attempts=2, retry_read_timeouts=True))
+    with pytest.raises(OpenbisTimeoutError):
+        o.is_token_valid()
+    assert standin.request_count == 3
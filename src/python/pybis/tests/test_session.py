@@ -0,0 +1,14 @@
+from pybis import Openbis
+
+
+def test_session_pool():
+    o = Openbis('https://localhost:8443', token='dummy-token', pool_maxsize=7)
+    adapter = o.session.get_adapter('https://localhost:8443')
+    assert adapter._pool_maxsize == 7
+    assert o.session.headers.get('Connection') != 'close'
+    o.close()
+
+
+def test_session_without_keep_alive():
+    o = Openbis('https://localhost:8443', token='dummy-token', keep_alive=False)
+    assert o.session.headers['Connection'] == 'close'
@@ -0,0 +1,59 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pybis import Openbis
+
+
+class Arrivals(dict):
+    """ the calls in flight of a SingleFlight, which sets arrived once n callers found a
+    call in flight (and are going to wait for it)
+    """
+
+    def __init__(self, n):
+        super(Arrivals, self).__init__()
+        self.n = n
+        self.count = 0
+        self.arrived = threading.Event()
+
+    def get(self, key, default=None):
+        call = super(Arrivals, self).get(key, default)
+        if call is not None:
+            self.count += 1
+            if self.count == self.n:
+                self.arrived.set()
+        return call
+
+
+def test_identical_reads_are_coalesced(standin):
+    o = Openbis(standin.url, token='dummy-token')
+    o._single_flight.calls = arrivals = Arrivals(7)
+
+    def search_sample_types(params):
+        # answer only once the other 7 callers are waiting for this request
+        arrivals.arrived.wait(10)
+        return {"objects": [{"code": "UNKNOWN", "description": "", "generatedCodePrefix": "S"}]}
+
+    standin.handlers['searchSampleTypes'] = search_sample_types
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda i: o.get_sample_types(), range(8)))
+    assert arrivals.arrived.is_set()
+    assert standin.request_count == 1
+    assert all(list(types['code']) == ['UNKNOWN'] for types in results)
+    # every caller got its own copy
+    assert results[0] is not results[1]
+
+
+def test_writes_are_not_coalesced(standin):
+    # the updates are only answered once all of them have been sent
+    barrier = threading.Barrier(4, timeout=10)
+
+    def update_samples(params):
+        barrier.wait()
+
+    standin.handlers['updateSamples'] = update_samples
+    o = Openbis(standin.url, token='dummy-token')
+
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda i: o.update_sample('PERMID', properties={'A': '1'}), range(4)))
+    assert not barrier.broken
+    assert standin.request_count == 4
@@ -0,0 +1,62 @@
+import json
+import pytest
+from pandas.testing import assert_frame_equal
+
+from pybis import Openbis, RetryPolicy, OpenbisConnectionError, concat_results
+from pybis.pybis import _iter_json_objects
+from synthetic import search_samples_response, search_samples_result
+
+
+def test_iter_json_objects():
+    body = search_samples_response(20)
+    expected = json.loads(body)['result']['objects']
+    # feed the response byte by byte
+    items = list(_iter_json_objects(body[i:i+1] for i in range(len(body))))
+    assert items == expected
+
+
+def test_iter_json_objects_large_items():
+    # items which span many chunks, the last one completed by the last chunk
+    objects = [{"x": [{"a": i, "b": "}{"} for i in range(5000)]}, {"y": 1}, {"z": "]" * 3000}]
+    body = json.dumps({"jsonrpc": "2.0", "id": "1", "result": {"objects": objects}})[:-3].encode()
+    chunks = [body[i:i+100] for i in range(0, len(body), 100)] + [b']}}']
+    assert list(_iter_json_objects(chunks)) == objects
+
+
+def test_iter_json_objects_error():
+    body = json.dumps({"jsonrpc": "2.0", "id": "1", "error": {"message": "no session"}}).encode()
+    with pytest.raises(ValueError):
+        list(_iter_json_objects([body[:10], body[10:]]))
+
+
+def test_stream_samples(standin):
+    standin.handlers['searchSamples'] = lambda params: search_samples_result(500)
+    o = Openbis(standin.url, token='dummy-token')
+
+    chunks = list(o.stream_samples(chunksize=200, space='SPACE_0'))
+    assert [len(chunk) for chunk in chunks] == [200, 200, 100]
+
+    streamed = concat_results(chunks)
+    assert_frame_equal(streamed, o.get_samples(space='SPACE_0').df.reset_index(drop=True))
+
+
+def test_stream_goes_through_the_transport(standin):
+    standin.handlers['searchSamples'] = lambda params: search_samples_result(50)
+    standin.failures = [503]
+    o = Openbis(standin.url, token='dummy-token', retry_policy=RetryPolicy(backoff=0.01))
+    assert sum(len(chunk) for chunk in o.stream_samples(chunksize=20)) == 50
+    assert standin.request_count == 2
+
+    o = Openbis('http://127.0.0.1:1', token='dummy-token', retry_policy=RetryPolicy(max_attempts=1))
+    with pytest.raises(OpenbisConnectionError):
+        list(o.stream_samples())
+
+
+def test_stream_keeps_only_related_objects(standin):
+    standin.handlers['searchSamples'] = lambda params: search_samples_result(2000, n_experiments=20)
+    o = Openbis(standin.url, token='dummy-token')
+    found = {}
+    request = o._samples_request()
+    assert sum(len(chunk) for chunk in o._stream_objects(o.as_v3, request, 100, found)) == 2000
+    # persons, sample types, spaces and experiments, but none of the samples
+    assert len(found) <= 10 + 5 + 3 + 3 * 20
@@ -0,0 +1,40 @@
+import json
+import pytest
+
+from pybis import Openbis
+from pybis.pybis import RequestTemplate, Slot, get_dataset_template
+
+
+def test_render():
+    template = RequestTemplate("getThings", [
+        Slot("token"), [ {"permId": Slot("permid"), "@type": "PermId"} ], Slot("options", default={"a": 1})
+    ])
+    request = template.render(token='admin-token', permid='20160101-1')
+    assert request.method == 'getThings'
+    assert json.loads(request.body) == {
+        "id": "1", "jsonrpc": "2.0", "method": "getThings",
+        "params": ["admin-token", [{"permId": "20160101-1", "@type": "PermId"}], {"a": 1}],
+    }
+    assert request.to_dict()['params'][2] == {"a": 1}
+    overridden = template.render(token='t', permid='p', options={"b": 2}, id="7")
+    assert overridden.to_dict()['params'][2] == {"b": 2}
+    assert overridden.to_dict()['id'] == "7"
+
+    with pytest.raises(ValueError):
+        template.render(token='admin-token')
+
+
+def test_templates_in_batch(standin):
+    requests = []
+    def get_datasets(params):
+        requests.append(params)
+        return {ds_id['permId']: {"code": ds_id['permId'], "physicalData": None} for ds_id in params[1]}
+    standin.handlers['getDataSets'] = get_datasets
+    o = Openbis(standin.url, token='dummy-token')
+
+    with o.batch():
+        futures = [o.get_dataset('DS-%d' % i) for i in range(3)]
+    assert [f.result().permId for f in futures] == ['DS-0', 'DS-1', 'DS-2']
+    assert o.get_dataset('DS-3').permId == 'DS-3'
+    expected = get_dataset_template.render(token='dummy-token', permid='DS-3').to_dict()['params']
+    assert requests[-1] == expected
@@ -0,0 +1,44 @@
+import time
+import pytest
+
+from pybis import Openbis, RetryPolicy, Deadline, OpenbisTimeoutError
+from pybis.pybis import DataSetDownloadQueue
+
+
+def test_per_method_timeout(standin):
+    standin.latency = 0.5
+    o = Openbis(standin.url, token='dummy-token', retry_policy=RetryPolicy(max_attempts=1),
+                timeouts={'isSessionActive': (1, 0.1)})
+    with pytest.raises(OpenbisTimeoutError) as excinfo:
+        o.is_token_valid()
+    assert excinfo.value.method == 'isSessionActive'
+
+
+def test_deadline(standin):
+    standin.latency = 0.3
+    o = Openbis(standin.url, token='dummy-token')
+
+    start = time.time()
+    with pytest.raises(OpenbisTimeoutError):
+        with o.deadline(0.5):
+            while True:
+                o.is_token_valid()
+    assert time.time() - start < 1.0
+
+    # nested deadlines: the earlier one counts
+    with o.deadline(10) as outer:
+        with o.deadline(20) as inner:
+            assert inner is outer
+    assert o._current_deadline() is None
+
+
+def test_expired_deadline_cancels_queue(tmpdir):
+    queue = DataSetDownloadQueue(workers=2, deadline=Deadline(0))
+    for i in range(5):
+        queue.put(['http://127.0.0.1:1/file', str(tmpdir.join('file%d' % i)), 0, False])
+    with pytest.raises(OpenbisTimeoutError):
+        queue.join()
+    # the workers drop the remaining items without downloading them
+    queue.download_queue.join()
+    assert len(queue.errors) == 5
+    assert all(isinstance(error, OpenbisTimeoutError) for error in queue.errors)